@@ -1,7 +1,6 @@
 // All 91 Adventure Realm locations from the 69 chapters
-import fs from 'fs';
-import path from 'path';
-import { parse } from 'csv-parse/sync';
+import locationData from '@/data/all_locations_complete.json';
+import { LocationStore, locationRecords } from './locationStore';
 
 export interface Location {
   name: string;
@@ -20,33 +19,11 @@ export function getAllLocations(): Location[] {
     return cachedLocations;
   }
 
-  const csvPath = path.join(process.cwd(), 'data', 'all_locations_complete.csv');
-  const fileContents = fs.readFileSync(csvPath, 'utf-8');
-  
-  const records = parse(fileContents, {
-    columns: true,
-    skip_empty_lines: true,
-  });
-
-  const locations = records.map((record: any) => {
-    const safeName = record.name
-      .toLowerCase()
-      .replace(/ /g, '-')
-      .replace(/'/g, '')
-      .replace(/,/g, '')
-      .replace(/!/g, '')
-      .substring(0, 50);
-    
-    return {
-      name: record.name,
-      chapters: record.chapters,
-      first_chapter: parseInt(record.first_chapter),
-      appearances: parseInt(record.appearances),
-      terrain: record.terrain,
-      description: record.description || `Explore ${record.name} from Chapter ${record.first_chapter}`,
-      mapFile: `${safeName}.png`,
-    };
-  });
+  // Columns, chapter lists, map files and the sort order are prebuilt
+  const locations = locationRecords(locationData as LocationStore).map((record) => ({
+    ...record,
+    description: record.description || `Explore ${record.name} from Chapter ${record.first_chapter}`,
+  }));
 
   cachedLocations = locations;
   return locations;
@@ -1,7 +1,6 @@
 // ALL 143 locations from the entire book - every place mentioned
-import fs from 'fs';
-import path from 'path';
-import { parse } from 'csv-parse/sync';
+import locationData from '@/data/all_locations_comprehensive.json';
+import { LocationStore, locationRecords } from './locationStore';
 
 export interface RealLocation {
   name: string;
@@ -20,39 +19,12 @@ export function getAllRealLocations(): RealLocation[] {
     return cachedLocations;
   }
 
-  const csvPath = path.join(process.cwd(), 'data', 'all_locations_comprehensive.csv');
-  const fileContents = fs.readFileSync(csvPath, 'utf-8');
-  
-  const records = parse(fileContents, {
-    columns: true,
-    skip_empty_lines: true,
-  });
+  // Columns, chapter lists, map files and the sort order are prebuilt
+  const locations = locationRecords(locationData as LocationStore, 'first_chapter').map((record) => ({
+    ...record,
+    description: record.description || `Appears in Chapter ${record.first_chapter}`,
+  }));
 
-  const locations = records.map((record: any) => {
-    const safeName = record.name
-      .toLowerCase()
-      .replace(/ /g, '-')
-      .replace(/'/g, '')
-      .replace(/,/g, '')
-      .replace(/!/g, '')
-      .replace(/\(/g, '')
-      .replace(/\)/g, '')
-      .substring(0, 50);
-    
-    return {
-      name: record.name,
-      chapters: record.chapters,
-      first_chapter: parseInt(record.first_chapter),
-      appearances: parseInt(record.appearances),
-      terrain: record.terrain,
-      description: record.description || `Appears in Chapter ${record.first_chapter}`,
-      mapFile: `${safeName}.png`,
-    };
-  });
-
-  // Sort by first appearance
-  locations.sort((a: RealLocation, b: RealLocation) => a.first_chapter - b.first_chapter);
-  
   cachedLocations = locations;
   return locations;
 }
@@ -1,7 +1,6 @@
 // All 69 chapter locations from the book
-import fs from 'fs';
-import path from 'path';
-import { parse } from 'csv-parse/sync';
+import locationData from '@/data/all_chapters_locations.json';
+import { LocationStore, locationRecords } from './locationStore';
 
 export interface Chapter {
   name: string;
@@ -20,37 +19,11 @@ export function getAllChapters(): Chapter[] {
     return cachedChapters;
   }
 
-  const csvPath = path.join(process.cwd(), 'data', 'all_chapters_locations.csv');
-  const fileContents = fs.readFileSync(csvPath, 'utf-8');
-  
-  const records = parse(fileContents, {
-    columns: true,
-    skip_empty_lines: true,
-  });
-
-  const chapters = records.map((record: any) => {
-    const chapterNum = parseInt(record.first_chapter);
-    const safeName = record.name
-      .toLowerCase()
-      .replace(/ /g, '-')
-      .replace(/'/g, '')
-      .replace(/!/g, '')
-      .replace(/,/g, '')
-      .substring(0, 40);
-    
-    return {
-      name: record.name,
-      chapters: record.chapters,
-      first_chapter: chapterNum,
-      appearances: parseInt(record.appearances),
-      terrain: record.terrain,
-      description: record.description || `Chapter ${chapterNum}: ${record.name}`,
-      mapFile: `chapter${chapterNum.toString().padStart(2, '0')}-${safeName}.png`,
-    };
-  });
-
-  // Sort by chapter number
-  chapters.sort((a: Chapter, b: Chapter) => a.first_chapter - b.first_chapter);
+  // Columns, chapter lists, map files and the sort order are prebuilt
+  const chapters = locationRecords(locationData as LocationStore, 'first_chapter').map((record) => ({
+    ...record,
+    description: record.description || `Chapter ${record.first_chapter}: ${record.name}`,
+  }));
 
   cachedChapters = chapters;
   return chapters;
@@ -0,0 +1,53 @@
+// Columnar location data prebuilt from the location CSVs by
+// scripts/build-location-store.py (data/<csv name>.json)
+
+export interface LocationStore {
+  version: number;
+  count: number;
+  name: string[];
+  chapters: number[][];
+  first_chapter: number[];
+  appearances: number[];
+  terrain: string[];
+  description: string[];
+  mapFile: string[];
+  order: {
+    first_chapter: number[];
+    name: number[];
+    appearances: number[];
+  };
+  // The CSV this was built from; scripts/check-location-store.ts fails
+  // the build when the CSV no longer matches
+  source: {
+    csv: string;
+    sha256: string;
+  };
+}
+
+export interface LocationRecord {
+  name: string;
+  chapters: string;
+  first_chapter: number;
+  appearances: number;
+  terrain: string;
+  description: string;
+  mapFile: string;
+}
+
+// Rows in CSV order, or in one of the precomputed (stable) sort orders
+export function locationRecords(
+  store: LocationStore,
+  order?: keyof LocationStore['order']
+): LocationRecord[] {
+  const indices = order ? store.order[order] : store.name.map((_, i) => i);
+
+  return indices.map((i) => ({
+    name: store.name[i],
+    chapters: store.chapters[i].join(','),
+    first_chapter: store.first_chapter[i],
+    appearances: store.appearances[i],
+    terrain: store.terrain[i],
+    description: store.description[i],
+    mapFile: store.mapFile[i],
+  }));
+}
@@ -0,0 +1,41 @@
+// Hover/click hit-testing for the world maps, using the <map>.hits.json
+// sidecar the map generators write (see scripts/realm/hitindex.py)
+
+export interface MapHitIndex {
+  version: number;
+  size: [number, number];
+  cellSize: number;
+  columns: number;
+  rows: number;
+  names: string[];
+  // x0, y0, x1, y1 per marker, inclusive pixel bounds
+  boxes: number[];
+  // Cell c holds items[offsets[c]] .. items[offsets[c + 1] - 1]
+  offsets: number[];
+  items: number[];
+}
+
+export async function loadMapHitIndex(mapSrc: string): Promise<MapHitIndex> {
+  const response = await fetch(mapSrc.replace(/\.png$/, '.hits.json'));
+  return response.json();
+}
+
+// Names of the markers under map pixel (x, y), topmost first
+export function hitTest(index: MapHitIndex, x: number, y: number): string[] {
+  const column = Math.floor(x / index.cellSize);
+  const row = Math.floor(y / index.cellSize);
+  if (column < 0 || row < 0 || column >= index.columns || row >= index.rows) {
+    return [];
+  }
+
+  const cell = row * index.columns + column;
+  const hits: string[] = [];
+  for (let i = index.offsets[cell + 1] - 1; i >= index.offsets[cell]; i--) {
+    const item = index.items[i];
+    const [x0, y0, x1, y1] = index.boxes.slice(item * 4, item * 4 + 4);
+    if (x >= x0 && x <= x1 && y >= y0 && y <= y1) {
+      hits.push(index.names[item]);
+    }
+  }
+  return hits;
+}
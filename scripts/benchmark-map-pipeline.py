@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark every stage of the map pipeline and check for regressions
+Times tileset loading, terrain layout, tile rendering, world map
+annotation and PNG encoding separately at grid sizes from 32x32 up to
+1024x1024, every terrain's noise preset at 1024x1024 against its time
+budget, plus full serial batch runs over the 69-chapter and 143-location
+CSVs. Runs offline against the committed tilesets; results are written
+to JSON and compared against a stored baseline
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from realm.journey import build_journey_graph, journey_segments
+from realm.locstore import chapter_lists, load_location_store, location_rows
+from realm.noise import NOISE_PRESETS, noise_preset, noise_terrain_layout
+from realm.output import encode_map
+from realm.terrain import create_terrain_layout
+from realm.tilesets import CACHE_DIR, PROJECT_ROOT, TILESET_FILES, TOPDOWN_DIR, load_wang_tileset
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
+from realm.worldmap import DrawList
+
+RESULTS_VERSION = 1
+SIZES = (32, 64, 128, 256, 512, 1024)
+TILE_SIZE = 16
+SEED = 42
+DENSITY = 0.45
+
+# Stages that hold or write the whole image stop at this grid size by
+# default: a 1024x1024 grid is a 16384x16384 RGBA image (1 GiB) and its
+# PNG encode takes minutes
+DEFAULT_MAX_IMAGE_GRID = 256
+
+# Repeat a measurement until this many runs or this much time, keeping the fastest
+REPEATS = 5
+TIME_BUDGET = 2.0
+
+# Every noise preset must lay out a grid this size within the budget
+NOISE_PRESET_GRID = 1024
+NOISE_BUDGET = 0.100
+
+# Timings under this are too noisy to fail a run on
+MIN_COMPARED_SECONDS = 0.005
+
+DEFAULT_OUTPUT = os.path.join(PROJECT_ROOT, '.cache/benchmarks/map-pipeline.json')
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, '.cache/benchmarks/map-pipeline-baseline.json')
+
+def load_script(filename):
+    """Import one of the generator scripts (their names are not valid module names)."""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(os.path.splitext(filename)[0].replace('-', '_'), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def best_of(func, repeats=REPEATS, budget=TIME_BUDGET):
+    """Return (fastest wall time, last result), stopping early once budget seconds are spent."""
+    best = None
+    result = None
+    spent = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        if spent >= budget:
+            break
+    return best, result
+
+def tileset_paths():
+    """(json, png) paths of every top-down tileset."""
+    return [(f'{TOPDOWN_DIR}/{stem}.json', f'{TOPDOWN_DIR}/{stem}.png') for stem in TILESET_FILES.values()]
+
+def bench_load_tilesets(timings):
+    """Cold (compile) and warm (cached) load_wang_tileset over every top-down tileset."""
+    def cold():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            return [load_wang_tileset(json_path, png_path, cache_dir) for json_path, png_path in tileset_paths()]
+
+    def warm():
+        return [load_wang_tileset(json_path, png_path, CACHE_DIR) for json_path, png_path in tileset_paths()]
+
+    timings['load_wang_tileset/cold'], _ = best_of(cold)
+    warm()
+    timings['load_wang_tileset/warm'], tilesets = best_of(warm)
+    return tilesets[0]
+
+def annotate(size, store, image):
+    """Record and replay the 143-location journey annotations on an image of a grid size."""
+    pixels = size * TILE_SIZE
+    spiral = {'center': (pixels // 2, pixels // 2), 'rotations': 5, 'inner': pixels // 16,
+              'extent': pixels * 3 // 8}
+    order = store['columns']['order_first_chapter'].tolist()
+    locations = location_rows(store, order='first_chapter')
+    chapters = chapter_lists(store)
+    graph = build_journey_graph([chapters[i] for i in order], [loc['appearances'] for loc in locations], spiral)
+
+    draw = DrawList()
+    draw.segments(journey_segments(graph), fill=(255, 220, 100, 128), width=1)
+    for x, y in graph['locations'].tolist():
+        draw.ellipse([x - 6, y - 6, x + 6, y + 6], fill=(200, 150, 100), outline=(255, 255, 255), width=2)
+    draw.text((20, 20), 'ADVENTURE REALM', fill=(255, 255, 255))
+    draw.replay(ImageDraw.Draw(image))
+    return image
+
+def bench_stages(timings, tileset, sizes, max_image_grid, output_dir):
+    """Per-size timings of terrain layout, rendering, annotation and PNG encoding."""
+    atlas = tileset_atlas(tileset)
+    store = load_location_store(os.path.join(PROJECT_ROOT, 'data/all_locations_comprehensive.csv'))
+
+    for size in sizes:
+        label = f'{size}x{size}'
+        print(f"  📐 {label}")
+
+        timings[f'create_terrain_layout/{label}'], grid = best_of(
+            lambda: create_terrain_layout(size, size, SEED, density=DENSITY, compat=True))
+        timings[f'noise_terrain_layout/{label}'], _ = best_of(
+            lambda: noise_terrain_layout(size, size, SEED, density=DENSITY))
+        timings[f'render_map_from_tileset/{label}'], img = best_of(
+            lambda: composite_tiles(atlas, wang_index_grid(grid)))
+
+        if size > max_image_grid:
+            del img
+            continue
+
+        base = img.convert('RGB')
+        timings[f'world_annotation/{label}'], _ = best_of(lambda: annotate(size, store, base.copy()))
+        del base
+
+        output_path = os.path.join(output_dir, f'bench-{label}.png')
+        timings[f'png_encode/{label}'], _ = best_of(lambda: encode_map(img, output_path, ('png',)))
+        del img
+
+def bench_noise_presets(timings):
+    """Time noise_terrain_layout() with every terrain's preset at NOISE_PRESET_GRID."""
+    label = f'{NOISE_PRESET_GRID}x{NOISE_PRESET_GRID}'
+    for terrain in NOISE_PRESETS:
+        timings[f'noise_preset/{terrain}/{label}'], _ = best_of(
+            lambda: noise_terrain_layout(NOISE_PRESET_GRID, NOISE_PRESET_GRID, SEED, density=DENSITY,
+                                         **noise_preset(terrain)))
+
+def over_budget(timings):
+    """Return the noise presets slower than NOISE_BUDGET, baseline or not."""
+    return [stage for stage, seconds in timings.items()
+            if stage.startswith('noise_preset/') and seconds > NOISE_BUDGET]
+
+def bench_batches(timings, output_dir):
+    """Full serial batch runs of the 69-chapter and 143-location generators."""
+    tileset_files = dict(TILESET_FILES)
+    tilesets = {key: load_wang_tileset(f'{TOPDOWN_DIR}/{stem}.json', f'{TOPDOWN_DIR}/{stem}.png')
+                for key, stem in tileset_files.items()}
+
+    chapters_module = load_script('generate-69-chapter-maps.py')
+    chapters = location_rows(load_location_store(os.path.join(PROJECT_ROOT, 'data/all_chapters_locations.csv')),
+                             order='first_chapter')
+    chapter_dir = os.path.join(output_dir, 'chapters')
+    os.makedirs(chapter_dir, exist_ok=True)
+    timings['batch/69-chapters'], _ = best_of(
+        lambda: [chapters_module.generate_chapter_map(chapter, tilesets, chapter_dir) for chapter in chapters],
+        repeats=1)
+
+    locations_module = load_script('generate-all-143-location-maps.py')
+    locations = location_rows(load_location_store(os.path.join(PROJECT_ROOT, 'data/all_locations_comprehensive.csv')))
+    plans = [locations_module.plan_location_map(loc) for loc in locations]
+    location_dir = os.path.join(output_dir, 'locations')
+    os.makedirs(location_dir, exist_ok=True)
+    timings['batch/143-locations'], _ = best_of(
+        lambda: [locations_module.render_location_map(plan, tilesets, location_dir) for plan in plans],
+        repeats=1)
+
+def compare(timings, baseline, threshold):
+    """Print every timing against the baseline; return the stages slower than threshold allows."""
+    regressions = []
+    for stage, seconds in timings.items():
+        before = baseline.get(stage)
+        if before is None:
+            print(f"  {stage:40s} {seconds * 1000:10.1f} ms   (new)")
+            continue
+
+        ratio = seconds / before if before else float('inf')
+        failed = ratio > 1 + threshold and max(seconds, before) >= MIN_COMPARED_SECONDS
+        if failed:
+            regressions.append(stage)
+        print(f"  {stage:40s} {seconds * 1000:10.1f} ms   baseline {before * 1000:10.1f} ms   "
+              f"x{ratio:5.2f} {'❌' if failed else '✅'}")
+    return regressions
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the map pipeline stages against a baseline')
+    parser.add_argument('--sizes', type=lambda value: [int(size) for size in value.split(',')],
+                        default=list(SIZES), help='comma-separated square grid sizes')
+    parser.add_argument('--max-image-grid', type=int, default=DEFAULT_MAX_IMAGE_GRID,
+                        help='largest grid size for annotation and PNG encoding')
+    parser.add_argument('--skip-batches', action='store_true',
+                        help='skip the full 69-chapter and 143-location batch runs')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='where to write the results JSON')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline results JSON to compare with')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='store these results as the new baseline instead of comparing')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='fail when a stage is more than this fraction slower than the baseline')
+    args = parser.parse_args()
+
+    print("⏱️  MAP PIPELINE BENCHMARK")
+    print("=" * 70)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        print("\n🧩 Loading tilesets...")
+        tileset = bench_load_tilesets(timings)
+
+        print("\n🎨 Stages by grid size...")
+        bench_stages(timings, tileset, args.sizes, args.max_image_grid, output_dir)
+
+        print(f"\n🌿 Noise presets at {NOISE_PRESET_GRID}x{NOISE_PRESET_GRID}...")
+        bench_noise_presets(timings)
+
+        if not args.skip_batches:
+            print("\n📚 Batch runs...")
+            bench_batches(timings, output_dir)
+
+    results = {
+        'version': RESULTS_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pillow': Image.__version__,
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'cpus': os.cpu_count()
+        },
+        'timings': timings
+    }
+    write_json(args.output, results)
+    print(f"\n💾 Results saved to: {args.output}")
+
+    slow_presets = over_budget(timings)
+    if slow_presets:
+        print(f"❌ {len(slow_presets)} noise preset(s) over the {NOISE_BUDGET * 1000:.0f} ms budget: "
+              f"{', '.join(slow_presets)}")
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        print(f"📌 Baseline saved to: {args.baseline}")
+        compare(timings, {}, args.threshold)
+        sys.exit(1 if slow_presets else 0)
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        baseline = None
+
+    if not baseline or baseline.get('version') != RESULTS_VERSION:
+        print("\nℹ️  No baseline to compare with (run with --save-baseline to store one)")
+        compare(timings, {}, args.threshold)
+        sys.exit(1 if slow_presets else 0)
+
+    print(f"\n📊 Against baseline from {baseline['created']} (threshold +{args.threshold:.0%}):")
+    regressions = compare(timings, baseline['timings'], args.threshold)
+
+    print()
+    if regressions:
+        print(f"❌ {len(regressions)} stage(s) slower than the baseline allows: {', '.join(regressions)}")
+        sys.exit(1)
+    if slow_presets:
+        sys.exit(1)
+
+    print("✅ No stage regressed beyond the threshold")
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the array tile compositor against the old per-cell Image.paste path
+Renders every top-down tileset at location and world sizes and checks that
+both paths produce identical pixels
+"""
+
+import os
+import random
+import sys
+import time
+from PIL import Image
+
+from realm.tilesets import load_wang_tileset
+from realm.wang import build_tile_atlas, composite_tiles, wang_index_grid
+
+def render_with_paste(tileset, wang_grid):
+    """Reference renderer: one Image.paste per cell."""
+    tiles = tileset['tiles']
+    tile_size = tileset['tile_size']
+    height, width = wang_grid.shape
+
+    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
+
+    for y, row in enumerate(wang_grid.tolist()):
+        for x, wang_idx in enumerate(row):
+            if wang_idx in tiles:
+                map_img.paste(tiles[wang_idx], (x * tile_size, y * tile_size))
+
+    return map_img
+
+def best_of(func, repeats):
+    """Return (fastest wall time, last result) over several runs."""
+    best = None
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+if __name__ == '__main__':
+    print("⏱️  TILE COMPOSITOR BENCHMARK")
+    print("=" * 70)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    base_dir = os.path.join(project_root, 'public/tilesets/topdown')
+
+    sizes = [(32, 32), (80, 80), (256, 256), (320, 320)]
+    repeats = 3
+    mismatches = 0
+
+    for filename in sorted(os.listdir(base_dir)):
+        if not filename.endswith('.json'):
+            continue
+
+        name = filename[:-5]
+        tileset = load_wang_tileset(f'{base_dir}/{name}.json', f'{base_dir}/{name}.png')
+        atlas = build_tile_atlas(tileset['tiles'], tileset['tile_size'])
+
+        print(f"\n🎨 {name}")
+
+        for width, height in sizes:
+            rng = random.Random(width * 1000 + height)
+            terrain_grid = [[1 if rng.random() < 0.4 else 0 for _ in range(width + 1)]
+                            for _ in range(height + 1)]
+            wang_grid = wang_index_grid(terrain_grid)
+
+            paste_time, paste_img = best_of(lambda: render_with_paste(tileset, wang_grid), repeats)
+            array_time, array_img = best_of(lambda: composite_tiles(atlas, wang_grid), repeats)
+
+            identical = (paste_img.size == array_img.size and
+                         paste_img.mode == array_img.mode and
+                         paste_img.tobytes() == array_img.tobytes())
+            if not identical:
+                mismatches += 1
+
+            print(f"  {width:3d}x{height:<3d} ({width * height:6d} cells)  "
+                  f"paste {paste_time * 1000:8.1f} ms  array {array_time * 1000:7.1f} ms  "
+                  f"x{paste_time / array_time:5.1f}  {'✅ identical' if identical else '❌ MISMATCH'}")
+
+    print()
+    if mismatches:
+        print(f"❌ {mismatches} render(s) differ from the paste path!")
+        sys.exit(1)
+
+    print("✅ Array compositor output matches the paste path for every tileset and size")
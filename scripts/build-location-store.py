@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Compile the location CSVs into the columnar location store
+Writes the memory-mapped .locs files the generators load and the
+data/<csv name>.json files the site reads instead of parsing the CSVs.
+The extractors refresh these whenever they rewrite a CSV; run this after
+editing a CSV by hand, or npm run build stops at the staleness check in
+scripts/check-location-store.ts.
+"""
+
+import os
+import argparse
+import time
+
+from realm.locstore import DATA_DIR, MAP_FILE_RULES, publish_location_store
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build the columnar location store')
+    parser.add_argument('--data-dir', default=DATA_DIR,
+                        help='directory holding the location CSVs')
+    args = parser.parse_args()
+
+    print("📦 BUILDING LOCATION STORE")
+    print("=" * 60)
+
+    for csv_name in MAP_FILE_RULES:
+        csv_path = os.path.join(args.data_dir, csv_name)
+        if not os.path.exists(csv_path):
+            print(f"⚠️  {csv_name} not found, skipping")
+            continue
+
+        start = time.perf_counter()
+        store = publish_location_store(csv_path)
+        elapsed = time.perf_counter() - start
+        chapters = len(store['columns']['chapter_values'])
+        print(f"✅ {csv_name}: {store['count']} locations, {chapters} chapter entries, "
+              f"{len(store['terrains'])} terrains ({elapsed * 1000:.1f} ms)")
@@ -0,0 +1,41 @@
+import { createHash } from 'crypto';
+import { existsSync, readFileSync } from 'fs';
+
+// The site imports data/<csv name>.json, which only
+// scripts/build-location-store.py and the Python extractors write. Fail
+// the build when a CSV was edited without rebuilding its JSON.
+const LOCATION_CSVS = [
+  'data/all_locations_comprehensive.csv',
+  'data/all_locations_complete.csv',
+  'data/all_chapters_locations.csv',
+];
+
+console.log('🔍 Checking the location store against its CSVs...\n');
+
+const stale: string[] = [];
+
+for (const csvPath of LOCATION_CSVS) {
+  const jsonPath = csvPath.replace(/\.csv$/, '.json');
+  if (!existsSync(jsonPath)) {
+    stale.push(`${jsonPath} (missing)`);
+    continue;
+  }
+
+  const store = JSON.parse(readFileSync(jsonPath, 'utf-8'));
+  const digest = createHash('sha256').update(readFileSync(csvPath)).digest('hex');
+
+  if (store.source?.sha256 !== digest) {
+    stale.push(`${jsonPath} (${csvPath} changed)`);
+  } else {
+    console.log(`   ✅ ${jsonPath}`);
+  }
+}
+
+if (stale.length > 0) {
+  console.error('\n❌ Location store is out of date:');
+  stale.forEach((entry) => console.error(`   - ${entry}`));
+  console.error('\nRun: python3 scripts/build-location-store.py');
+  process.exit(1);
+}
+
+console.log('\n✅ Location store is up to date');
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Compile every PixelLab tileset into the compiled .atlas tileset cache
+Run after downloading new tilesets so batch map runs start warm
+"""
+
+import os
+import sys
+import time
+
+from realm.tilesets import CACHE_DIR, PROJECT_ROOT, cache_path_for, load_wang_tileset
+
+if __name__ == '__main__':
+    print("🧱 COMPILING TILESET CACHE")
+    print("=" * 60)
+
+    tileset_root = os.path.join(PROJECT_ROOT, 'public/tilesets')
+    folders = sys.argv[1:] or ['topdown', 'sidescroller']
+    compiled = 0
+
+    for folder in folders:
+        base_dir = os.path.join(tileset_root, folder)
+        if not os.path.isdir(base_dir):
+            print(f"⚠️  Missing folder: {base_dir}")
+            continue
+
+        for filename in sorted(os.listdir(base_dir)):
+            if not filename.endswith('.json'):
+                continue
+
+            stem = filename[:-5]
+            json_path = os.path.join(base_dir, filename)
+            png_path = os.path.join(base_dir, f'{stem}.png')
+            if not os.path.exists(png_path):
+                print(f"⚠️  Missing sprite sheet for {folder}/{stem}")
+                continue
+
+            start = time.perf_counter()
+            tileset = load_wang_tileset(json_path, png_path)
+            elapsed = (time.perf_counter() - start) * 1000
+            compiled += 1
+
+            print(f"✅ {folder}/{stem}: {len(tileset['tiles'])} tiles @ {tileset['tile_size']}px "
+                  f"({elapsed:.1f} ms) -> {os.path.relpath(cache_path_for(json_path), PROJECT_ROOT)}")
+
+    print(f"\n🎉 {compiled} tilesets cached in {CACHE_DIR}/")
@@ -5,124 +5,81 @@ Not just chapter titles - every named place, landmark, region, city, forest, etc
 """
 
 import os
-import re
+import argparse
 from collections import defaultdict
 
-def extract_all_locations_from_content():
-    chapter_dir = "/home/dave/Documents/GitHub/turtlebook/COMPLETED CHAPTERS"
-    
-    # Track locations and which chapters they appear in
-    location_mentions = defaultdict(set)
-    location_contexts = {}
+from realm.batch import resolve_workers
+from realm.chapters import CHAPTER_DIR, ingest_chapters, iter_chapter_files, open_extract_cache, save_extract_cache
+from realm.classify import classify_terrains
+from realm.extract import LOCATION_PATTERNS, LOCATION_SUFFIXES, compile_scanner, scan
+from realm.gazetteer import build_gazetteer, chapters_by_name, chapter_mentions, load_known_names
+from realm.locstore import publish_location_store
+
+# Bump when parse_chapter() or chapter_mentions() change what they return,
+# so the extract cache is not reused
+EXTRACTOR_VERSION = 1
+
+def parse_chapter(chapter_num, filepath, content, scanner):
+    """Return {location: context of its first mention} for one chapter, in mention order."""
+    found = {}
     
-    # Patterns for finding locations
-    # Looking for capitalized multi-word names that sound like places
-    location_patterns = [
-        # Explicit location indicators
-        r'(?:in|at|to|from|near|through|across|beyond|within)\s+(?:the\s+)?([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){0,4}(?:\s+(?:Forest|Woods?|Grove|Desert|Mountain|Peak|Valley|Canyon|Cave|Cavern|Labyrinth|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Temple|Sanctum|Library|Realm|Kingdom|Palace|Tower|Castle|Hall|Chamber|Garden|Oasis|Dune|Cliff|Ridge|Summit|Highlands?|Lowlands?|Plains?|Meadow|Glade|Hollow|Haven|Sanctuary))+)',
+    # Extract locations using all patterns in one scan
+    for pattern_name, match in scan(scanner, content):
+        location = match.group(1).strip()
         
-        # Chapter titles (these are definitely locations)
-        r'Chapter \d+:\s+(.+)$',
+        # Clean up the location name
+        location = location.replace('\n', ' ').replace('  ', ' ').strip()
+        
+        # Filter out noise
+        if len(location) < 3:
+            continue
+        if not location[0].isupper():
+            continue
         
-        # Named places in quotes or emphasized
-        r'(?:called|named|known as)\s+"([A-Z][^"]+)"',
-        r'(?:called|named|known as)\s+([A-Z][A-Za-z\s]+)',
+        # Skip common false positives
+        skip_words = ['The End', 'Chapter', 'Uncle Matt', 'Bob', 'Matt', 'Uncle', 'Magical Talking Turtle']
+        if any(skip in location for skip in skip_words):
+            continue
         
-        # Proper nouns that end with location words
-        r'\b([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){0,3}\s+(?:Forest|Woods?|Grove|Desert|Mountain|Peak|Valley|Canyon|Cave|Cavern|Labyrinth|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Temple|Sanctum|Library|Realm|Kingdom|Palace|Tower|Castle|Hall|Chamber|Garden|Oasis|Dune|Cliff|Ridge|Summit|Highlands?|Lowlands?|Plains?|Meadow|Glade|Hollow|Haven|Sanctuary))\b',
-    ]
+        # Store context (first 200 chars around mention)
+        if location not in found:
+            match_pos = match.start()
+            context_start = max(0, match_pos - 100)
+            context_end = min(len(content), match_pos + 200)
+            context = content[context_start:context_end].replace('\n', ' ')
+            found[location] = context.strip()
+    
+    return found
+
+def extract_all_locations_from_content(chapter_dir=CHAPTER_DIR, workers=1, cache=None):
+    
+    # Track locations and which chapters they appear in
+    location_mentions = defaultdict(set)
+    location_contexts = {}
     
     print("📖 Reading all 69 chapters and extracting locations...\n")
     
-    for filename in sorted(os.listdir(chapter_dir)):
-        if not filename.endswith('.md'):
-            continue
-        
-        filepath = os.path.join(chapter_dir, filename)
-        
-        # Handle Chapter 38 parts
-        if 'Chapter 38' in filename or 'Chapter38' in filename:
-            chapter_num = 38
-        else:
-            chapter_match = re.search(r'Chapter(\d+)', filename)
-            if not chapter_match:
-                continue
-            chapter_num = int(chapter_match.group(1))
-        
+    # Location patterns (see realm.extract) are compiled once per worker into a
+    # single-pass scanner; chapters come back in file order, so the first
+    # context kept for each location is the same as in a serial run
+    tasks = list(iter_chapter_files(chapter_dir))
+    results = ingest_chapters(parse_chapter, tasks, compile_scanner, (LOCATION_PATTERNS,), workers, cache)
+    for (chapter_num, filepath), found in zip(tasks, results):
         print(f"  Reading Chapter {chapter_num}...")
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # Extract locations using all patterns
-            for pattern in location_patterns:
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
-                    location = match.group(1).strip()
-                    
-                    # Clean up the location name
-                    location = location.replace('\n', ' ').replace('  ', ' ').strip()
-                    
-                    # Filter out noise
-                    if len(location) < 3:
-                        continue
-                    if not location[0].isupper():
-                        continue
-                    
-                    # Skip common false positives
-                    skip_words = ['The End', 'Chapter', 'Uncle Matt', 'Bob', 'Matt', 'Uncle', 'Magical Talking Turtle']
-                    if any(skip in location for skip in skip_words):
-                        continue
-                    
-                    # Add to tracking
-                    location_mentions[location].add(chapter_num)
-                    
-                    # Store context (first 200 chars around mention)
-                    if location not in location_contexts:
-                        match_pos = match.start()
-                        context_start = max(0, match_pos - 100)
-                        context_end = min(len(content), match_pos + 200)
-                        context = content[context_start:context_end].replace('\n', ' ')
-                        location_contexts[location] = context.strip()
+        for location, context in found.items():
+            location_mentions[location].add(chapter_num)
+            location_contexts.setdefault(location, context)
     
     # Convert to list with metadata
     locations_data = []
     
-    for location, chapters in sorted(location_mentions.items()):
-        chapters_list = sorted(list(chapters))
-        
-        # Categorize by terrain
-        loc_lower = location.lower()
-        if any(x in loc_lower for x in ['desert', 'sand', 'dune', 'oasis']):
-            terrain = 'Desert'
-        elif any(x in loc_lower for x in ['forest', 'woods', 'grove', 'tree', 'jungle']):
-            terrain = 'Forest'
-        elif any(x in loc_lower for x in ['mountain', 'peak', 'cliff', 'summit', 'ridge', 'highland']):
-            terrain = 'Mountains'
-        elif any(x in loc_lower for x in ['city', 'metropolis', 'town', 'palace']):
-            terrain = 'City'
-        elif any(x in loc_lower for x in ['ocean', 'sea', 'lake', 'river', 'water', 'tide']):
-            terrain = 'Water'
-        elif any(x in loc_lower for x in ['cave', 'cavern', 'labyrinth', 'dungeon', 'crypt']):
-            terrain = 'Dungeon'
-        elif any(x in loc_lower for x in ['digital', 'pixel', 'cyber', 'algorithmic', 'code']):
-            terrain = 'Digital'
-        elif any(x in loc_lower for x in ['cosmic', 'space', 'star', 'void', 'nebula', 'galaxy', 'cosmos']):
-            terrain = 'Cosmic'
-        elif any(x in loc_lower for x in ['village', 'settlement', 'hollow', 'hamlet', 'haven']):
-            terrain = 'Village'
-        elif any(x in loc_lower for x in ['valley', 'canyon', 'gorge', 'glade', 'meadow']):
-            terrain = 'Valley'
-        elif any(x in loc_lower for x in ['isle', 'island']):
-            terrain = 'Island'
-        elif any(x in loc_lower for x in ['temple', 'sanctum', 'shrine', 'cathedral', 'sanctuary']):
-            terrain = 'Temple'
-        elif any(x in loc_lower for x in ['garden', 'orchard']):
-            terrain = 'Garden'
-        elif any(x in loc_lower for x in ['library', 'hall', 'chamber', 'tower']):
-            terrain = 'Structure'
-        else:
-            terrain = 'Mixed'
+    # Categorize by terrain (see realm.classify), all names in one batch
+    names = sorted(location_mentions)
+    terrains = classify_terrains(names)
+    
+    for location, terrain in zip(names, terrains):
+        chapters_list = sorted(location_mentions[location])
         
         context = location_contexts.get(location, '')
         
@@ -137,12 +94,101 @@ def extract_all_locations_from_content():
     
     return locations_data
 
+def recount_known_locations(chapter_dir, data_dir, workers=1, force=False):
+    """Re-derive the chapter lists of already-known locations from their mentions.
+    
+    Instead of rediscovering names with the heuristic patterns, every name in
+    the location CSVs is matched in one gazetteer pass over each chapter. Each
+    mention is written to location_mentions.csv with its offsets and context,
+    the comprehensive CSV gets fresh chapters/first_chapter/appearances, and
+    chapter lists in adventure_realm_locations.csv that disagree are reported.
+    """
+    import csv
+    comprehensive_csv = os.path.join(data_dir, 'all_locations_comprehensive.csv')
+    realm_csv = os.path.join(data_dir, 'adventure_realm_locations.csv')
+    mentions_csv = os.path.join(data_dir, 'location_mentions.csv')
+    
+    names = load_known_names([comprehensive_csv, realm_csv])
+    print(f"📖 Matching {len(names)} known location names across all chapters...\n")
+    
+    # Each worker builds the gazetteer once; chapters come back in file order
+    tasks = list(iter_chapter_files(chapter_dir))
+    cache = open_extract_cache('gazetteer', {'version': EXTRACTOR_VERSION, 'names': names}, fresh=force)
+    mentions = []
+    for found in ingest_chapters(chapter_mentions, tasks, build_gazetteer, (names,), workers, cache):
+        mentions.extend(found)
+    save_extract_cache(cache)
+    print(f"♻️  {cache['reused']} chapters reused from the extract cache, {cache['parsed']} parsed")
+    found = chapters_by_name(mentions)
+    print(f"✅ {len(mentions)} mentions of {len(found)} locations")
+    
+    with open(mentions_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['name', 'alias', 'chapter', 'file', 'start', 'end', 'context'],
+                                quoting=csv.QUOTE_MINIMAL, escapechar='\\')
+        writer.writeheader()
+        writer.writerows(mentions)
+    print(f"💾 Saved mentions to: {mentions_csv}")
+    
+    with open(comprehensive_csv, 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        fieldnames = reader.fieldnames
+        locations = list(reader)
+    
+    changed = 0
+    for loc in locations:
+        chapters_list = found.get(loc['name'].strip())
+        if not chapters_list:
+            print(f"  ⚠️  No mentions found for {loc['name']}, keeping its chapters")
+            continue
+        chapters = ','.join(map(str, chapters_list))
+        if chapters != loc['chapters']:
+            changed += 1
+        loc['chapters'] = chapters
+        loc['first_chapter'] = chapters_list[0]
+        loc['appearances'] = len(chapters_list)
+    
+    with open(comprehensive_csv, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_MINIMAL, escapechar='\\')
+        writer.writeheader()
+        writer.writerows(locations)
+    print(f"💾 Updated {changed} chapter lists in: {comprehensive_csv}")
+    publish_location_store(comprehensive_csv)
+    
+    # The curated realm CSV is only checked, not rewritten
+    with open(realm_csv, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = row['Location Name'].strip()
+            listed = [int(c) for c in row['Chapters'].replace(' ', '').split(',') if c.isdigit()]
+            if name in found and listed != found[name]:
+                print(f"  📝 {name}: listed in chapters {listed}, mentioned in {found[name]}")
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract every location mentioned across the chapters')
+    parser.add_argument('--chapter-dir', default=CHAPTER_DIR,
+                        help='directory holding the ChapterN.md files')
+    parser.add_argument('--gazetteer', action='store_true',
+                        help='recount the chapters of the locations already in the CSVs instead of extracting new ones')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for reading chapters (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-parse every chapter even if the extract cache has its results')
+    args = parser.parse_args()
+    workers = resolve_workers(args.workers)
+    
+    if args.gazetteer:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        recount_known_locations(args.chapter_dir, os.path.join(os.path.dirname(script_dir), 'data'), workers, args.force)
+        raise SystemExit(0)
+    
     print("🗺️  COMPREHENSIVE LOCATION EXTRACTION")
     print("=" * 70)
     print("Extracting EVERY location mentioned across all 69 chapters...\n")
     
-    locations = extract_all_locations_from_content()
+    extractor = {'version': EXTRACTOR_VERSION, 'patterns': LOCATION_PATTERNS, 'suffixes': LOCATION_SUFFIXES}
+    cache = open_extract_cache('extract-all-locations-comprehensive', extractor, fresh=args.force)
+    locations = extract_all_locations_from_content(args.chapter_dir, workers, cache)
+    save_extract_cache(cache)
+    print(f"\n♻️  {cache['reused']} chapters reused from the extract cache, {cache['parsed']} parsed")
     
     print(f"\n✅ Found {len(locations)} unique locations!\n")
     
@@ -180,6 +226,8 @@ if __name__ == '__main__':
         writer.writerows(locations)
     
     print(f"\n💾 Saved to: {output_file}")
+    publish_location_store(output_file)
+    print(f"📦 Location store and {os.path.splitext(output_file)[0]}.json refreshed")
     print(f"\n📋 Sample locations:")
     for loc in locations[:15]:
         print(f"  Ch{loc['first_chapter']:2d}: {loc['name'][:50]} ({loc['terrain']})")
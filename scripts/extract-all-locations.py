@@ -7,10 +7,49 @@ Extracts EVERY location mentioned, not just chapter titles
 import os
 import re
 import csv
+import argparse
 
-def extract_locations():
-    chapter_dir = "/home/dave/Documents/GitHub/turtlebook/COMPLETED CHAPTERS"
-    locations_data = []
+from realm.batch import resolve_workers
+from realm.chapters import CHAPTER_DIR, ingest_chapters, open_extract_cache, save_extract_cache
+from realm.classify import CHAPTER_TERRAIN_CLASSIFIER, classify_map_types, classify_terrains
+
+# Bump when parse_chapter() changes what it returns, so the extract cache is not reused
+EXTRACTOR_VERSION = 3
+
+def parse_chapter(chapter_num, filepath, content, context=None):
+    """Return the location row for one chapter, or None if it has no title"""
+    lines = content.split('\n')
+    
+    # Get chapter title
+    title = None
+    for line in lines[:10]:
+        if 'Chapter' in line and ':' in line:
+            title = line.split(':', 1)[1].strip()
+            break
+    
+    if not title:
+        return None
+    
+    # Extract description (first substantive paragraph)
+    description = []
+    for line in lines[2:20]:  # Skip title lines
+        line = line.strip()
+        if line and not line.startswith('#') and len(line) > 50:
+            description.append(line)
+            if len(description) >= 2:
+                break
+    
+    desc_text = ' '.join(description)[:300] if description else ''
+    
+    return {
+        'chapter': chapter_num,
+        'name': title,
+        'description': desc_text,
+        'filename': os.path.basename(filepath)
+    }
+
+def extract_locations(chapter_dir=CHAPTER_DIR, workers=1, cache=None):
+    tasks = []
     
     chapter_files = sorted([f for f in os.listdir(chapter_dir) if f.endswith('.md')])
     
@@ -21,103 +60,37 @@ def extract_locations():
         match = re.search(r'Chapter(\d+)', filename)
         if not match:
             continue
-        chapter_num = match.group(1)
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
-            
-            # Get chapter title
-            title = None
-            for line in lines[:10]:
-                if 'Chapter' in line and ':' in line:
-                    title = line.split(':', 1)[1].strip()
-                    break
-            
-            if not title:
-                continue
-            
-            # Extract description (first substantive paragraph)
-            description = []
-            for line in lines[2:20]:  # Skip title lines
-                line = line.strip()
-                if line and not line.startswith('#') and len(line) > 50:
-                    description.append(line)
-                    if len(description) >= 2:
-                        break
-            
-            desc_text = ' '.join(description)[:300] if description else ''
-            
-            # Determine terrain type from title and description
-            terrain_type = determine_terrain(title, desc_text)
-            
-            # Determine map type
-            map_type = determine_map_type(title, desc_text)
-            
-            locations_data.append({
-                'chapter': chapter_num,
-                'name': title,
-                'description': desc_text,
-                'terrain_type': terrain_type,
-                'map_type': map_type,
-                'filename': filename
-            })
-    
-    return locations_data
-
-def determine_terrain(title, description):
-    """Determine terrain type from title and description"""
-    title_lower = title.lower()
-    desc_lower = description.lower()
-    combined = title_lower + ' ' + desc_lower
-    
-    # Check for specific terrain keywords
-    if any(word in combined for word in ['desert', 'sand', 'dune', 'oasis']):
-        return 'Desert'
-    elif any(word in combined for word in ['forest', 'woods', 'grove', 'tree']):
-        return 'Forest'
-    elif any(word in combined for word in ['city', 'metropolis', 'urban', 'concrete', 'skyscraper']):
-        return 'City'
-    elif any(word in combined for word in ['mountain', 'peak', 'cliff', 'summit', 'frozen', 'ice']):
-        return 'Mountains'
-    elif any(word in combined for word in ['ocean', 'sea', 'water', 'lake', 'island']):
-        return 'Water'
-    elif any(word in combined for word in ['cave', 'cavern', 'labyrinth', 'dungeon']):
-        return 'Dungeon'
-    elif any(word in combined for word in ['digital', 'pixel', 'cyber', 'algorithmic', 'code']):
-        return 'Digital'
-    elif any(word in combined for word in ['cosmic', 'space', 'star', 'planet', 'void', 'cosmos']):
-        return 'Cosmic'
-    elif any(word in combined for word in ['library', 'sanctum', 'temple', 'monastery']):
-        return 'Sacred'
-    elif any(word in combined for word in ['valley', 'canyon', 'gorge']):
-        return 'Valley'
-    elif any(word in combined for word in ['village', 'town', 'settlement']):
-        return 'Village'
-    elif any(word in combined for word in ['carnival', 'festival', 'celebration']):
-        return 'Festival'
-    elif any(word in combined for word in ['orchard', 'garden', 'meadow']):
-        return 'Grassland'
-    else:
-        return 'Mixed'
-
-def determine_map_type(title, description):
-    """Determine if top-down or sidescroller would work better"""
-    combined = (title + ' ' + description).lower()
-    
-    # Sidescroller indicators
-    if any(word in combined for word in ['labyrinth', 'dungeon', 'cave', 'platform', 'climb', 'ascend']):
-        return 'Sidescroller'
-    elif any(word in combined for word in ['digital', 'pixel', 'cyber', 'algorithmic']):
-        return 'Sidescroller'
-    # Top-down indicators  
-    else:
-        return 'Top-down'
+        tasks.append((match.group(1), filepath))
+    
+    # One task per chapter; results come back in file order
+    locations = [loc for loc in ingest_chapters(parse_chapter, tasks, workers=workers, cache=cache) if loc]
+    
+    # Classified after the merge so the extract cache never holds a stale
+    # rule table's output (see realm.classify)
+    texts = [f"{loc['name']} {loc['description']}" for loc in locations]
+    for loc, terrain, map_type in zip(locations, classify_terrains(texts, CHAPTER_TERRAIN_CLASSIFIER),
+                                      classify_map_types(texts)):
+        loc['terrain_type'] = terrain
+        loc['map_type'] = map_type
+    
+    return locations
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract the chapter title locations')
+    parser.add_argument('--chapter-dir', default=CHAPTER_DIR,
+                        help='directory holding the ChapterN.md files')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for reading chapters (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-parse every chapter even if the extract cache has its results')
+    args = parser.parse_args()
+    
     print("Extracting ALL locations from 69 chapters...\n")
     
-    locations = extract_locations()
+    cache = open_extract_cache('extract-all-locations', {'version': EXTRACTOR_VERSION}, fresh=args.force)
+    locations = extract_locations(args.chapter_dir, resolve_workers(args.workers), cache)
+    save_extract_cache(cache)
+    print(f"♻️  {cache['reused']} chapters reused from the extract cache, {cache['parsed']} parsed\n")
     
     print(f"✅ Found {len(locations)} chapter locations!\n")
     
@@ -7,71 +7,92 @@ Fixed CSV formatting issues
 import os
 import re
 import csv
+import argparse
 from collections import defaultdict
 
-def extract_all_locations_from_chapters():
-    chapter_dir = "/home/dave/Documents/GitHub/turtlebook/COMPLETED CHAPTERS"
+from realm.batch import resolve_workers
+from realm.chapters import CHAPTER_DIR, ingest_chapters, open_extract_cache, save_extract_cache
+from realm.classify import classify_terrain
+from realm.locstore import publish_location_store
+
+# Bump when parse_chapter() changes what it returns, so the extract cache is not reused
+EXTRACTOR_VERSION = 1
+
+def is_chapter_38_part(filename):
+    # Chapter 38 was split into parts
+    return 'Chapter 38' in filename or 'Chapter38' in filename
+
+def parse_chapter(chapter_num, filepath, content, context=None):
+    """Return (title, description) for one chapter file"""
+    lines = content.split('\n')
+    
+    # Chapter 38 parts only contribute their title
+    if is_chapter_38_part(os.path.basename(filepath)):
+        for line in lines[:10]:
+            if 'Chapter 38' in line and ':' in line:
+                return line.split(':', 1)[1].strip(), None
+        return None, None
     
+    # Get chapter title
+    for line in lines[:10]:
+        if f'Chapter {chapter_num}' in line and ':' in line:
+            title = line.split(':', 1)[1].strip()
+            # Clean up title - remove any newlines or quotes
+            title = title.replace('\n', ' ').replace('"', '').strip()
+            
+            # Get description from first substantive paragraph
+            desc_lines = []
+            for l in lines[2:20]:
+                l = l.strip()
+                if l and not l.startswith('#') and len(l) > 50:
+                    # Clean the description too
+                    l = l.replace('\n', ' ').replace('"', '').replace(',', ';').strip()
+                    desc_lines.append(l)
+                    if len(desc_lines) >= 2:
+                        break
+            description = ' '.join(desc_lines)[:300] if desc_lines else None
+            return title, description
+    
+    return None, None
+
+def extract_all_locations_from_chapters(chapter_dir=CHAPTER_DIR, workers=1, cache=None):
     all_chapter_titles = {}
     location_chapters = defaultdict(list)
     location_descriptions = {}
     
-    # First pass: Get all chapter titles explicitly
+    tasks = []
     for filename in sorted(os.listdir(chapter_dir)):
         if not filename.endswith('.md'):
             continue
         
         filepath = os.path.join(chapter_dir, filename)
         
-        # Handle special Chapter 38 files
-        if 'Chapter 38' in filename or 'Chapter38' in filename:
-            # Chapter 38 was split into parts
-            chapter_num = 38
-            if chapter_num not in all_chapter_titles:
-                # Find the title from Part A
-                if 'Part A' in filename:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        lines = content.split('\n')
-                        for line in lines[:10]:
-                            if 'Chapter 38' in line and ':' in line:
-                                title = line.split(':', 1)[1].strip()
-                                all_chapter_titles[chapter_num] = title
-                                break
+        # Handle special Chapter 38 files: the title comes from Part A
+        if is_chapter_38_part(filename):
+            if 'Part A' in filename:
+                tasks.append((38, filepath))
             continue
         
         # Regular chapter files
         chapter_match = re.search(r'Chapter(\d+)', filename)
         if not chapter_match:
             continue
-        chapter_num = int(chapter_match.group(1))
+        tasks.append((int(chapter_match.group(1)), filepath))
+    
+    # First pass: Get all chapter titles explicitly, one task per chapter,
+    # merged in file order
+    results = ingest_chapters(parse_chapter, tasks, workers=workers, cache=cache)
+    for (chapter_num, filepath), (title, description) in zip(tasks, results):
+        if title is None:
+            continue
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
-            
-            # Get chapter title
-            for line in lines[:10]:
-                if f'Chapter {chapter_num}' in line and ':' in line:
-                    title = line.split(':', 1)[1].strip()
-                    # Clean up title - remove any newlines or quotes
-                    title = title.replace('\n', ' ').replace('"', '').strip()
-                    all_chapter_titles[chapter_num] = title
-                    
-                    # Get description from first substantive paragraph
-                    desc_lines = []
-                    for l in lines[2:20]:
-                        l = l.strip()
-                        if l and not l.startswith('#') and len(l) > 50:
-                            # Clean the description too
-                            l = l.replace('\n', ' ').replace('"', '').replace(',', ';').strip()
-                            desc_lines.append(l)
-                            if len(desc_lines) >= 2:
-                                break
-                    if desc_lines:
-                        description = ' '.join(desc_lines)[:300]
-                        location_descriptions[title] = description
-                    break
+        if is_chapter_38_part(os.path.basename(filepath)):
+            all_chapter_titles.setdefault(chapter_num, title)
+            continue
+        
+        all_chapter_titles[chapter_num] = title
+        if description:
+            location_descriptions[title] = description
     
     # Now we have all chapter titles - categorize them
     locations_data = []
@@ -79,34 +100,8 @@ def extract_all_locations_from_chapters():
     for chapter_num in sorted(all_chapter_titles.keys()):
         title = all_chapter_titles[chapter_num]
         
-        # Determine terrain based on title
-        title_lower = title.lower()
-        if any(x in title_lower for x in ['desert', 'sand', 'dune', 'oasis']):
-            terrain = 'Desert'
-        elif any(x in title_lower for x in ['forest', 'woods', 'grove', 'tree', 'jungle']):
-            terrain = 'Forest'
-        elif any(x in title_lower for x in ['mountain', 'peak', 'cliff', 'summit', 'heights']):
-            terrain = 'Mountains'
-        elif any(x in title_lower for x in ['city', 'metropolis', 'town', 'palace']):
-            terrain = 'City'
-        elif any(x in title_lower for x in ['ocean', 'sea', 'lake', 'river', 'water', 'tide']):
-            terrain = 'Water'
-        elif any(x in title_lower for x in ['cave', 'cavern', 'labyrinth', 'dungeon', 'crypt']):
-            terrain = 'Dungeon'
-        elif any(x in title_lower for x in ['digital', 'pixel', 'cyber', 'algorithmic', 'code']):
-            terrain = 'Digital'
-        elif any(x in title_lower for x in ['cosmic', 'space', 'star', 'void', 'nebula', 'galaxy']):
-            terrain = 'Cosmic'
-        elif any(x in title_lower for x in ['village', 'settlement', 'hollow', 'hamlet']):
-            terrain = 'Village'
-        elif any(x in title_lower for x in ['valley', 'canyon', 'gorge']):
-            terrain = 'Valley'
-        elif any(x in title_lower for x in ['isle', 'island']):
-            terrain = 'Island'
-        elif any(x in title_lower for x in ['temple', 'sanctum', 'shrine', 'cathedral']):
-            terrain = 'Temple'
-        else:
-            terrain = 'Mixed'
+        # Determine terrain based on title (see realm.classify)
+        terrain = classify_terrain(title)
         
         desc = location_descriptions.get(title, f'Chapter {chapter_num} of the adventure')
         
@@ -122,9 +117,21 @@ def extract_all_locations_from_chapters():
     return locations_data
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract the chapter title locations')
+    parser.add_argument('--chapter-dir', default=CHAPTER_DIR,
+                        help='directory holding the ChapterN.md files')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for reading chapters (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-parse every chapter even if the extract cache has its results')
+    args = parser.parse_args()
+    
     print("🔍 Extracting EVERY location from all 69 chapters (FIXED)...\n")
     
-    locations = extract_all_locations_from_chapters()
+    cache = open_extract_cache('extract-every-location-FIXED', {'version': EXTRACTOR_VERSION}, fresh=args.force)
+    locations = extract_all_locations_from_chapters(args.chapter_dir, resolve_workers(args.workers), cache)
+    save_extract_cache(cache)
+    print(f"♻️  {cache['reused']} chapters reused from the extract cache, {cache['parsed']} parsed\n")
     
     print(f"✅ Found {len(locations)} chapter locations!\n")
     
@@ -148,6 +155,8 @@ if __name__ == '__main__':
         writer.writerows(locations)
     
     print(f"\n💾 Saved to: {output_file}")
+    publish_location_store(output_file)
+    print(f"📦 Location store and {os.path.splitext(output_file)[0]}.json refreshed")
     
     # Verify
     print(f"\n📍 All chapter titles (first 10):")
@@ -7,23 +7,68 @@ Not just chapter titles - every named place, landmark, region, etc.
 import os
 import re
 import csv
+import argparse
 from collections import defaultdict
 
-def extract_all_locations_from_chapters():
-    chapter_dir = "/home/dave/Documents/GitHub/turtlebook/COMPLETED CHAPTERS"
+from realm.batch import resolve_workers
+from realm.chapters import CHAPTER_DIR, ingest_chapters, open_extract_cache, save_extract_cache
+from realm.classify import classify_terrains
+from realm.locstore import publish_location_store
+
+# Bump when parse_chapter() changes what it returns, so the extract cache is not reused
+EXTRACTOR_VERSION = 1
+
+# Patterns for location names
+LOCATION_PATTERNS = [
+    r'(?:arrived at|reached|entered|left|traveled to|journeyed to|explored|visited|discovered)\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Valley|Mountains?|Peak|Forest|Woods?|Grove|Desert|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Canyon|Cavern|Cave|Labyrinth|Temple|Sanctum|Library|Realm|Kingdom|Land|Territory))',
+    r'(?:in|at|near|beyond|across|through)\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Valley|Mountains?|Peak|Forest|Woods?|Grove|Desert|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Canyon|Cavern|Cave|Labyrinth|Temple|Sanctum|Library|Realm|Kingdom|Land|Territory))',
+    r'(?:called|named|known as)\s+([A-Z][A-Za-z\s]+)',
+    r'Chapter \d+[^:]*:\s*(.+)$',  # Chapter titles
+]
+
+def compile_patterns():
+    return [re.compile(pattern, re.MULTILINE) for pattern in LOCATION_PATTERNS]
+
+def parse_chapter(chapter_num, filepath, content, patterns):
+    """Return (title, description, locations in mention order) for one chapter"""
+    lines = content.split('\n')
+    title = None
+    description = None
+    locations = []
     
-    # Patterns for location names
-    location_patterns = [
-        r'(?:arrived at|reached|entered|left|traveled to|journeyed to|explored|visited|discovered)\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Valley|Mountains?|Peak|Forest|Woods?|Grove|Desert|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Canyon|Cavern|Cave|Labyrinth|Temple|Sanctum|Library|Realm|Kingdom|Land|Territory))',
-        r'(?:in|at|near|beyond|across|through)\s+(?:the\s+)?([A-Z][A-Za-z\s]+(?:Valley|Mountains?|Peak|Forest|Woods?|Grove|Desert|City|Town|Village|Isle?|Sea|Ocean|Lake|River|Canyon|Cavern|Cave|Labyrinth|Temple|Sanctum|Library|Realm|Kingdom|Land|Territory))',
-        r'(?:called|named|known as)\s+([A-Z][A-Za-z\s]+)',
-        r'Chapter \d+[^:]*:\s*(.+)$',  # Chapter titles
-    ]
+    # Get chapter title location
+    for line in lines[:10]:
+        if f'Chapter {chapter_num}' in line and ':' in line:
+            title = line.split(':', 1)[1].strip()
+            locations.append(title)
+            
+            # Get first paragraph as description
+            desc_lines = []
+            for l in lines[2:15]:
+                l = l.strip()
+                if l and not l.startswith('#') and len(l) > 40:
+                    desc_lines.append(l)
+                    if len(desc_lines) >= 2:
+                        break
+            if desc_lines:
+                description = ' '.join(desc_lines)[:300]
+            break
+    
+    # Find all location mentions in content
+    for pattern in patterns:
+        for match in pattern.finditer(content):
+            location = match.group(1).strip()
+            if len(location) > 3 and location[0].isupper():
+                locations.append(location)
     
+    return title, description, locations
+
+def extract_all_locations_from_chapters(chapter_dir=CHAPTER_DIR, workers=1, cache=None):
     all_locations = set()
     location_chapters = defaultdict(list)
     location_descriptions = {}
     
+    tasks = []
     for filename in sorted(os.listdir(chapter_dir)):
         if not filename.endswith('.md'):
             continue
@@ -32,73 +77,27 @@ def extract_all_locations_from_chapters():
         chapter_match = re.search(r'Chapter(\d+)', filename)
         if not chapter_match:
             continue
-        chapter_num = int(chapter_match.group(1))
-        
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.split('\n')
-            
-            # Get chapter title location
-            for line in lines[:10]:
-                if f'Chapter {chapter_num}' in line and ':' in line:
-                    title = line.split(':', 1)[1].strip()
-                    all_locations.add(title)
-                    location_chapters[title].append(chapter_num)
-                    
-                    # Get first paragraph as description
-                    desc_lines = []
-                    for l in lines[2:15]:
-                        l = l.strip()
-                        if l and not l.startswith('#') and len(l) > 40:
-                            desc_lines.append(l)
-                            if len(desc_lines) >= 2:
-                                break
-                    if desc_lines and title not in location_descriptions:
-                        location_descriptions[title] = ' '.join(desc_lines)[:300]
-                    break
-            
-            # Find all location mentions in content
-            for pattern in location_patterns:
-                matches = re.finditer(pattern, content, re.MULTILINE)
-                for match in matches:
-                    location = match.group(1).strip()
-                    if len(location) > 3 and location[0].isupper():
-                        all_locations.add(location)
-                        location_chapters[location].append(chapter_num)
+        tasks.append((int(chapter_match.group(1)), filepath))
+    
+    # One task per chapter; merging in file order keeps the first description
+    # seen for each title, as a serial run would
+    results = ingest_chapters(parse_chapter, tasks, compile_patterns, workers=workers, cache=cache)
+    for (chapter_num, filepath), (title, description, locations) in zip(tasks, results):
+        if description and title not in location_descriptions:
+            location_descriptions[title] = description
+        for location in locations:
+            all_locations.add(location)
+            location_chapters[location].append(chapter_num)
     
     # Convert to sorted list with details
     locations_data = []
-    for loc in sorted(all_locations):
+    names = sorted(all_locations)
+    
+    # Determine terrain (see realm.classify), all names in one batch
+    for loc, terrain in zip(names, classify_terrains(names)):
         chapters = sorted(set(location_chapters[loc]))
         desc = location_descriptions.get(loc, '')
         
-        # Determine terrain
-        loc_lower = loc.lower()
-        if any(x in loc_lower for x in ['desert', 'sand', 'dune', 'oasis']):
-            terrain = 'Desert'
-        elif any(x in loc_lower for x in ['forest', 'woods', 'grove', 'tree']):
-            terrain = 'Forest'
-        elif any(x in loc_lower for x in ['mountain', 'peak', 'cliff', 'summit']):
-            terrain = 'Mountains'
-        elif any(x in loc_lower for x in ['city', 'metropolis', 'town']):
-            terrain = 'City'
-        elif any(x in loc_lower for x in ['ocean', 'sea', 'lake', 'river', 'water']):
-            terrain = 'Water'
-        elif any(x in loc_lower for x in ['cave', 'cavern', 'labyrinth', 'dungeon']):
-            terrain = 'Dungeon'
-        elif any(x in loc_lower for x in ['digital', 'pixel', 'cyber', 'algorithmic']):
-            terrain = 'Digital'
-        elif any(x in loc_lower for x in ['cosmic', 'space', 'star', 'void']):
-            terrain = 'Cosmic'
-        elif any(x in loc_lower for x in ['village', 'settlement', 'hollow']):
-            terrain = 'Village'
-        elif any(x in loc_lower for x in ['valley', 'canyon']):
-            terrain = 'Valley'
-        elif any(x in loc_lower for x in ['isle', 'island']):
-            terrain = 'Island'
-        else:
-            terrain = 'Mixed'
-        
         locations_data.append({
             'name': loc,
             'chapters': ','.join(map(str, chapters)),
@@ -111,9 +110,22 @@ def extract_all_locations_from_chapters():
     return locations_data
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Extract every location mentioned in the chapters')
+    parser.add_argument('--chapter-dir', default=CHAPTER_DIR,
+                        help='directory holding the ChapterN.md files')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for reading chapters (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-parse every chapter even if the extract cache has its results')
+    args = parser.parse_args()
+    
     print("🔍 Extracting EVERY location from all 69 chapters...\n")
     
-    locations = extract_all_locations_from_chapters()
+    extractor = {'version': EXTRACTOR_VERSION, 'patterns': LOCATION_PATTERNS}
+    cache = open_extract_cache('extract-every-location', extractor, fresh=args.force)
+    locations = extract_all_locations_from_chapters(args.chapter_dir, resolve_workers(args.workers), cache)
+    save_extract_cache(cache)
+    print(f"♻️  {cache['reused']} chapters reused from the extract cache, {cache['parsed']} parsed\n")
     
     print(f"✅ Found {len(locations)} total locations!\n")
     
@@ -136,6 +148,8 @@ if __name__ == '__main__':
         writer.writerows(locations)
     
     print(f"\n💾 Saved to: {output_file}")
+    publish_location_store(output_file)
+    print(f"📦 Location store and {os.path.splitext(output_file)[0]}.json refreshed")
     print(f"\n📍 Sample locations:")
     for loc in locations[:20]:
         print(f"  Ch{loc['first_chapter']:2d}: {loc['name']} ({loc['terrain']})")
@@ -4,107 +4,31 @@ Generate maps for all 69 chapters + master world map
 Using CORRECT chapter data
 """
 
-import json
 import os
-import csv
-import random
+import argparse
+from functools import partial
 from PIL import Image, ImageDraw, ImageFont
 
-def load_wang_tileset(metadata_path, image_path):
-    """Load Wang tileset."""
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    sprite_sheet = Image.open(image_path)
-    tiles = {}
-    
-    for tile in metadata['tileset_data']['tiles']:
-        corners = tile['corners']
-        bbox = tile['bounding_box']
-        
-        tile_img = sprite_sheet.crop((
-            bbox['x'], bbox['y'],
-            bbox['x'] + bbox['width'],
-            bbox['y'] + bbox['height']
-        ))
-        
-        nw = 1 if corners['NW'] == 'upper' else 0
-        ne = 1 if corners['NE'] == 'upper' else 0
-        sw = 1 if corners['SW'] == 'upper' else 0
-        se = 1 if corners['SE'] == 'upper' else 0
-        wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-        
-        tiles[wang_idx] = tile_img
-    
-    tile_size = metadata['tileset_image']['dimensions']['width'] // 4
-    
-    return {
-        'tiles': tiles,
-        'tile_size': tile_size
-    }
-
-def create_terrain_layout(width, height, seed, density=0.4):
-    """Create procedural terrain layout."""
-    random.seed(seed)
-    grid = [[0 for _ in range(width + 1)] for _ in range(height + 1)]
-    
-    for y in range(height + 1):
-        for x in range(width + 1):
-            center_x, center_y = width // 2, height // 2
-            dist = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-            max_dist = ((width / 2) ** 2 + (height / 2) ** 2) ** 0.5
-            
-            prob = density * (1 - (dist / max_dist) * 0.5)
-            
-            if random.random() < prob:
-                grid[y][x] = 1
-    
-    return grid
+from realm.batch import resolve_workers, run_batch
+from realm.classify import tileset_for_terrain
+from realm.locstore import load_location_store, location_rows
+from realm.output import DEFAULT_FORMATS, encode_map, format_report, parse_formats, print_summary
+from realm.terrain import create_terrain_layout
+from realm.tilesets import load_tilesets, load_wang_tileset
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
 
 def render_map_from_tileset(tileset, terrain_grid):
     """Render map using Wang tiles."""
-    tiles = tileset['tiles']
-    tile_size = tileset['tile_size']
-    
-    height = len(terrain_grid) - 1
-    width = len(terrain_grid[0]) - 1
-    
-    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
-    
-    for y in range(height):
-        for x in range(width):
-            nw = terrain_grid[y][x]
-            ne = terrain_grid[y][x + 1]
-            sw = terrain_grid[y + 1][x]
-            se = terrain_grid[y + 1][x + 1]
-            
-            wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-            
-            if wang_idx in tiles:
-                map_img.paste(tiles[wang_idx], (x * tile_size, y * tile_size))
-    
-    return map_img
+    return composite_tiles(tileset_atlas(tileset), wang_index_grid(terrain_grid))
 
-def generate_chapter_map(chapter, tilesets, output_dir):
+def generate_chapter_map(chapter, tilesets, output_dir, formats=DEFAULT_FORMATS, report_savings=False):
     """Generate map for a single chapter."""
     terrain = chapter['terrain']
     name = chapter['name']
     chapter_num = chapter['first_chapter']
     
-    # Select tileset based on terrain
-    tileset = None
-    if terrain == 'Desert':
-        tileset = tilesets.get('desert')
-    elif terrain == 'Water':
-        tileset = tilesets.get('ocean')
-    elif terrain in ['Dungeon', 'Temple']:
-        tileset = tilesets.get('dungeon')
-    elif terrain == 'City':
-        tileset = tilesets.get('city')
-    elif terrain == 'Cosmic':
-        tileset = tilesets.get('cosmic')
-    else:  # Forest, Mixed, Village, Valley, Island, Digital
-        tileset = tilesets.get('grass')
+    # Select tileset based on terrain (see realm.classify)
+    tileset = tilesets.get(tileset_for_terrain(terrain))
     
     if not tileset:
         print(f"  ⚠️  No tileset for {terrain}")
@@ -118,7 +42,7 @@ def generate_chapter_map(chapter, tilesets, output_dir):
     
     # Generate terrain
     seed = chapter_num * 1000  # Use chapter number as seed for consistency
-    terrain_grid = create_terrain_layout(size[0], size[1], seed, density=0.45)
+    terrain_grid = create_terrain_layout(size[0], size[1], seed, density=0.45, compat=True)
     
     # Render map
     map_img = render_map_from_tileset(tileset, terrain_grid)
@@ -126,16 +50,17 @@ def generate_chapter_map(chapter, tilesets, output_dir):
     # Save with chapter number prefix
     safe_name = f"chapter{chapter_num:02d}-{name.lower().replace(' ', '-').replace('!', '').replace(',', '').replace(chr(39), '')[:40]}"
     output_path = f"{output_dir}/{safe_name}.png"
-    map_img.save(output_path)
+    report = encode_map(map_img, output_path, formats, report_savings)
     
     return {
         'chapter': chapter_num,
         'name': name,
         'file': safe_name + '.png',
-        'size': size
+        'size': size,
+        'report': report
     }
 
-def create_world_map(chapters, output_path, tilesets):
+def create_world_map(chapters, output_path, tilesets, formats=DEFAULT_FORMATS, report_savings=False):
     """Create master world map with 69-chapter journey path."""
     
     # World map size
@@ -145,7 +70,7 @@ def create_world_map(chapters, output_path, tilesets):
     
     # Create base terrain using grass tileset
     print("🌍 Creating world map base terrain...")
-    terrain_grid = create_terrain_layout(world_width, world_height, seed=42, density=0.35)
+    terrain_grid = create_terrain_layout(world_width, world_height, seed=42, density=0.35, compat=True)
     
     if 'grass' in tilesets:
         world_map = render_map_from_tileset(tilesets['grass'], terrain_grid)
@@ -241,10 +166,21 @@ def create_world_map(chapters, output_path, tilesets):
     draw.text((20, 40), "From Cedar Hollow (Ch1) to the Cosmic Void (Ch69)", fill=(200, 200, 200), font=title_font, stroke_width=1, stroke_fill=(0, 0, 0))
     
     # Save
-    world_map.save(output_path)
+    report = encode_map(world_map, output_path, formats, report_savings)
     print(f"\n✅ World map saved to: {output_path}")
+    print(f"  💾 {format_report(report)}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate all 69 chapter maps and the master world map')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for chapter maps (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--formats', type=parse_formats, default=DEFAULT_FORMATS,
+                        help='comma-separated map formats: png (always written), webp, avif')
+    parser.add_argument('--report-savings', action='store_true',
+                        help='also encode a plain PNG of every map to report the bytes saved')
+    args = parser.parse_args()
+    workers = resolve_workers(args.workers)
+    
     print("🗺️ GENERATING ALL 69 CHAPTER MAPS")
     print("=" * 60)
     
@@ -254,16 +190,7 @@ if __name__ == '__main__':
     
     # Load chapter locations
     csv_path = os.path.join(project_root, 'data/all_chapters_locations.csv')
-    chapters = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            row['first_chapter'] = int(row['first_chapter'])
-            row['appearances'] = int(row['appearances'])
-            chapters.append(row)
-    
-    chapters.sort(key=lambda x: x['first_chapter'])
+    chapters = location_rows(load_location_store(csv_path), order='first_chapter')
     
     print(f"\n📊 Loaded {len(chapters)} chapters from CSV")
     
@@ -293,7 +220,7 @@ if __name__ == '__main__':
         else:
             print(f"⚠️  Missing: {filename} tileset")
     
-    print(f"\n🎨 Generating individual chapter maps...")
+    print(f"\n🎨 Generating individual chapter maps ({workers} worker{'s' if workers != 1 else ''})...")
     print("=" * 60)
     
     output_dir = os.path.join(project_root, 'public/maps/chapters')
@@ -303,17 +230,25 @@ if __name__ == '__main__':
     generated_maps = []
     terrain_stats = {}
     
-    for chapter in chapters:
-        result = generate_chapter_map(chapter, tilesets, output_dir)
+    # Each worker loads the tilesets once; results arrive in chapter order
+    results = run_batch(partial(generate_chapter_map, output_dir=output_dir, formats=args.formats,
+                                report_savings=args.report_savings), chapters,
+                        load_tilesets, (tileset_files, base_dir), workers=workers)
+    reports = []
+    
+    for chapter, result in zip(chapters, results):
         if result:
             generated_maps.append(result)
             terrain = chapter['terrain']
             terrain_stats[terrain] = terrain_stats.get(terrain, 0) + 1
+            reports.append(result['report'])
+            print(f"  💾 {format_report(result['report'])}")
             
             if result['chapter'] % 10 == 0:
                 print(f"  Generated Chapter {result['chapter']}: {result['name']}")
     
     print(f"\n✅ Generated {len(generated_maps)} chapter maps!")
+    print_summary(reports)
     print(f"\n📊 Maps by terrain type:")
     for terrain, count in sorted(terrain_stats.items(), key=lambda x: x[1], reverse=True):
         print(f"  {terrain}: {count} chapters")
@@ -323,7 +258,7 @@ if __name__ == '__main__':
     print("=" * 60)
     
     world_output = os.path.join(project_root, 'public/maps/adventure-realm-world-map.png')
-    create_world_map(chapters, world_output, tilesets)
+    create_world_map(chapters, world_output, tilesets, args.formats, args.report_savings)
     
     print(f"\n🎉 COMPLETE!")
     print(f"   📁 Chapter maps: {output_dir}/")
@@ -3,110 +3,72 @@
 Generate maps for ALL 143 locations + comprehensive world map with journey markers
 """
 
-import json
 import os
-import csv
-import random
-from PIL import Image, ImageDraw, ImageFont
-import math
+import argparse
+from functools import partial
+from PIL import ImageFont
 
-def load_wang_tileset(metadata_path, image_path):
-    """Load Wang tileset."""
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    sprite_sheet = Image.open(image_path)
-    tiles = {}
-    
-    for tile in metadata['tileset_data']['tiles']:
-        corners = tile['corners']
-        bbox = tile['bounding_box']
-        
-        tile_img = sprite_sheet.crop((
-            bbox['x'], bbox['y'],
-            bbox['x'] + bbox['width'],
-            bbox['y'] + bbox['height']
-        ))
-        
-        nw = 1 if corners['NW'] == 'upper' else 0
-        ne = 1 if corners['NE'] == 'upper' else 0
-        sw = 1 if corners['SW'] == 'upper' else 0
-        se = 1 if corners['SE'] == 'upper' else 0
-        wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-        
-        tiles[wang_idx] = tile_img
-    
-    tile_size = metadata['tileset_image']['dimensions']['width'] // 4
-    
-    return {
-        'tiles': tiles,
-        'tile_size': tile_size
-    }
+from realm.batch import resolve_workers, run_batch
+from realm.classify import tileset_for_terrain
+from realm.hitindex import hit_index_path, write_hit_index
+from realm.journey import (build_journey_graph, chapter_path_segments, journey_segments, layout_journey_graph,
+                           write_journey_json)
+from realm.layers import create_layered_layout, palette_tilesets, render_layered_map, terrain_palette
+from realm.layout import CACHE_DIR as LAYOUT_CACHE_DIR, LAYOUT_VERSION, load_connections, match_connections
+from realm.locstore import chapter_lists, load_location_store, location_rows
+from realm.manifest import content_hash, is_stale, load_manifest, prune_orphans, record_map, save_manifest
+from realm.noise import NOISE_VERSION, noise_preset, noise_terrain_layout
+from realm.output import (DEFAULT_FORMATS, encode_map, format_report, parse_formats, print_summary, report_files,
+                          variant_path)
+from realm.seeding import location_seed
+from realm.terrain import create_terrain_layout
+from realm.tilepyramid import DESCRIPTOR_NAME
+from realm.tilesets import load_tilesets, load_wang_tileset
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
+from realm.wfc import wfc_terrain_layout
+from realm.worldmap import DEFAULT_BAND_ROWS, DrawList, render_world_map
+
+# Bump whenever a change here alters the pixels of maps built from the same inputs
+GENERATOR_VERSION = 2
+
+WORLD_MAP_SIZE = (320, 320)
+WORLD_MAP_SEED = 42
+WORLD_MAP_DENSITY = 0.35
+WORLD_TILE_SIZE = 16
+WORLD_TILES_DIR = 'world-tiles'
+WORLD_JOURNEY_FILE = 'adventure-realm-journey.json'
+WORLD_LAYOUT_CACHE = 'adventure-realm-complete-map.json'
+
+# Markers are at most 12px in radius, so centers this far apart never touch
+WORLD_MIN_DISTANCE = 32
 
-def create_terrain_layout(width, height, seed, density=0.4):
-    """Create procedural terrain layout."""
-    random.seed(seed)
-    grid = [[0 for _ in range(width + 1)] for _ in range(height + 1)]
-    
-    for y in range(height + 1):
-        for x in range(width + 1):
-            center_x, center_y = width // 2, height // 2
-            dist = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-            max_dist = ((width / 2) ** 2 + (height / 2) ** 2) ** 0.5
-            
-            prob = density * (1 - (dist / max_dist) * 0.5)
-            
-            if random.random() < prob:
-                grid[y][x] = 1
-    
-    return grid
+LOCATION_DENSITY = 0.45
+
+# Location terrain engines: seeded random vertices, Wave Function Collapse
+# over the tileset's own adjacency rules, coherent noise shaped per
+# terrain (see realm.noise), or layered levels over several tilesets
+# (see realm.layers)
+TERRAIN_ENGINES = ('random', 'wfc', 'noise', 'layered')
+DEFAULT_TERRAIN_ENGINE = 'random'
+
+def parse_location_terrain(value):
+    """Parse a --location-terrain value such as "Cedar Hollow=noise" into (name, engine)."""
+    name, _, engine = value.rpartition('=')
+    if not name.strip() or engine.strip() not in TERRAIN_ENGINES:
+        raise argparse.ArgumentTypeError(f"expected NAME=ENGINE with ENGINE one of {', '.join(TERRAIN_ENGINES)}")
+    return name.strip(), engine.strip()
 
 def render_map_from_tileset(tileset, terrain_grid):
     """Render map using Wang tiles."""
-    tiles = tileset['tiles']
-    tile_size = tileset['tile_size']
-    
-    height = len(terrain_grid) - 1
-    width = len(terrain_grid[0]) - 1
-    
-    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
-    
-    for y in range(height):
-        for x in range(width):
-            nw = terrain_grid[y][x]
-            ne = terrain_grid[y][x + 1]
-            sw = terrain_grid[y + 1][x]
-            se = terrain_grid[y + 1][x + 1]
-            
-            wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-            
-            if wang_idx in tiles:
-                map_img.paste(tiles[wang_idx], (x * tile_size, y * tile_size))
-    
-    return map_img
+    return composite_tiles(tileset_atlas(tileset), wang_index_grid(terrain_grid))
 
-def generate_location_map(location, tilesets, output_dir):
-    """Generate map for a single location."""
+def plan_location_map(location, engine=DEFAULT_TERRAIN_ENGINE):
+    """Work out the tileset, size, seed, terrain engine and output file for a location map."""
     terrain = location['terrain']
     name = location['name']
     
-    # Select tileset based on terrain
-    tileset = None
-    if terrain == 'Desert':
-        tileset = tilesets.get('desert')
-    elif terrain == 'Water':
-        tileset = tilesets.get('ocean')
-    elif terrain in ['Dungeon', 'Temple', 'Structure']:
-        tileset = tilesets.get('dungeon')
-    elif terrain == 'City':
-        tileset = tilesets.get('city')
-    elif terrain == 'Cosmic':
-        tileset = tilesets.get('cosmic')
-    else:  # Forest, Mixed, Village, Valley, Island, Garden, Digital, Mountains
-        tileset = tilesets.get('grass')
-    
-    if not tileset:
-        return None
+    # Select tileset based on terrain (see realm.classify)
+    tileset_key = tileset_for_terrain(terrain)
     
     # Map size based on importance
     appearances = location['appearances']
@@ -119,100 +81,180 @@ def generate_location_map(location, tilesets, output_dir):
     else:
         size = (32, 32)  # Single mentions
     
-    # Generate terrain
-    seed = hash(name) % 100000
-    terrain_grid = create_terrain_layout(size[0], size[1], seed, density=0.45)
-    
-    # Render map
-    map_img = render_map_from_tileset(tileset, terrain_grid)
-    
-    # Save
     safe_name = name.lower().replace(' ', '-').replace("'", '').replace(',', '').replace('!', '').replace('(', '').replace(')', '')[:50]
-    output_path = f"{output_dir}/{safe_name}.png"
-    map_img.save(output_path)
     
-    return {
+    plan = {
         'name': name,
         'file': safe_name + '.png',
-        'size': size
+        'size': size,
+        'seed': location_seed(name),
+        'tileset': tileset_key,
+        'engine': engine
     }
+    if engine == 'noise':
+        plan['noise'] = noise_preset(terrain)
+    elif engine == 'layered':
+        plan['palette'] = list(terrain_palette(terrain))
+    return plan
 
-def create_comprehensive_world_map(locations, output_path, tilesets):
-    """Create master world map with ALL locations and journey paths."""
-    
-    # World map size
-    world_width = 320
-    world_height = 320
-    tile_size = 16
+def plan_tilesets(plan):
+    """Keys of every tileset a plan's map is drawn with."""
+    return palette_tilesets(plan['palette']) if plan.get('palette') else [plan['tileset']]
+
+def location_terrain(plan, tileset):
+    """Build the vertex grid for a plan with its terrain engine."""
+    size = plan['size']
+    if plan.get('engine') == 'wfc':
+        return wfc_terrain_layout(size[0], size[1], plan['seed'], tileset, density=LOCATION_DENSITY)
+    if plan.get('engine') == 'noise':
+        return noise_terrain_layout(size[0], size[1], plan['seed'], density=LOCATION_DENSITY, **plan['noise'])
+    return create_terrain_layout(size[0], size[1], plan['seed'], density=LOCATION_DENSITY, compat=True)
+
+def render_location_map(plan, tilesets, output_dir, formats=DEFAULT_FORMATS, report_savings=False):
+    """Render and save the map described by a plan_location_map() plan."""
+    if not all(key in tilesets for key in plan_tilesets(plan)):
+        return None
     
-    # Create base terrain using grass tileset
-    print("🌍 Creating comprehensive world map base...")
-    terrain_grid = create_terrain_layout(world_width, world_height, seed=42, density=0.35)
+    size = plan['size']
     
-    if 'grass' in tilesets:
-        world_map = render_map_from_tileset(tilesets['grass'], terrain_grid)
+    if plan.get('palette'):
+        # One level per palette class, drawn across their tilesets at once
+        levels = create_layered_layout(size[0], size[1], plan['seed'], len(plan['palette']),
+                                       density=LOCATION_DENSITY, compat=True)
+        map_img = render_layered_map(plan['palette'], tilesets, levels)
     else:
-        world_map = Image.new('RGBA', (world_width * tile_size, world_height * tile_size), (100, 150, 100, 255))
+        tileset = tilesets[plan['tileset']]
+        terrain_grid = location_terrain(plan, tileset)
+        map_img = render_map_from_tileset(tileset, terrain_grid)
+    
+    # Save every requested format
+    output_path = f"{output_dir}/{plan['file']}"
+    report = encode_map(map_img, output_path, formats, report_savings)
     
-    # Convert to RGB for drawing
-    world_map = world_map.convert('RGB')
-    draw = ImageDraw.Draw(world_map)
+    return {
+        'name': plan['name'],
+        'file': plan['file'],
+        'size': size,
+        'report': report
+    }
+
+def generate_location_map(location, tilesets, output_dir):
+    """Generate map for a single location."""
+    return render_location_map(plan_location_map(location), tilesets, output_dir)
+
+def location_map_hash(location, plan, tilesets, formats=DEFAULT_FORMATS):
+    """Hash every input that affects a location map's pixels and output files."""
+    inputs = {
+        'generator': GENERATOR_VERSION,
+        'formats': formats,
+        'row': location,
+        'seed': plan['seed'],
+        'size': plan['size'],
+        'tileset': tilesets[plan['tileset']]['source_hash']
+    }
+    # Only non-default engines are hashed, so existing maps stay up to date
+    if plan.get('engine', DEFAULT_TERRAIN_ENGINE) != DEFAULT_TERRAIN_ENGINE:
+        inputs['engine'] = plan['engine']
+    if plan.get('noise'):
+        inputs['noise'] = plan['noise']
+        inputs['noise_version'] = NOISE_VERSION
+    if plan.get('palette'):
+        inputs['palette'] = plan['palette']
+        inputs['tilesets'] = [tilesets[key]['source_hash'] for key in plan_tilesets(plan)]
+    return content_hash(inputs)
+
+def world_placement(layout, connections):
+    """The inputs that decide where the world map puts its locations."""
+    if layout == 'spiral':
+        return {'layout': 'spiral'}
+    return {
+        'layout': layout,
+        'version': LAYOUT_VERSION,
+        'min_distance': WORLD_MIN_DISTANCE,
+        'connections': connections
+    }
+
+def world_map_hash(locations, tilesets, placement):
+    """Hash every input that affects the comprehensive world map."""
+    return content_hash({
+        'generator': GENERATOR_VERSION,
+        'rows': locations,
+        'placement': placement,
+        'size': WORLD_MAP_SIZE,
+        'seed': WORLD_MAP_SEED,
+        'density': WORLD_MAP_DENSITY,
+        'tileset': tilesets['grass']['source_hash'] if 'grass' in tilesets else None
+    })
+
+def journey_graph_hash(locations, placement):
+    """Hash every input that affects the journey graph JSON."""
+    return content_hash({
+        'generator': GENERATOR_VERSION,
+        'rows': locations,
+        'placement': placement,
+        'size': WORLD_MAP_SIZE
+    })
+
+def world_journey(store, layout='force', connections=()):
+    """Return the locations in placement order and their journey graph.
+    
+    Locations spiral outward from the center in first-chapter order (5
+    rotations for 143 locations); the 69 chapters share the same spiral.
+    With layout='force' that spiral is only the starting point for the
+    overlap-free layout of realm.layout, which also pulls the
+    (name, name) connections together.
+    """
+    world_width, world_height = WORLD_MAP_SIZE
+    spiral = {
+        'center': (world_width * WORLD_TILE_SIZE // 2, world_height * WORLD_TILE_SIZE // 2),
+        'rotations': 5,
+        'inner': 40,
+        'extent': min(world_width, world_height) * WORLD_TILE_SIZE // 2 - 80
+    }
     
-    # Sort by first appearance
-    sorted_locs = sorted(locations, key=lambda x: x['first_chapter'])
+    # Sort by first appearance (precomputed in the location store)
+    order = store['columns']['order_first_chapter'].tolist()
+    sorted_locs = location_rows(store, order='first_chapter')
+    chapters = chapter_lists(store)
+    sorted_chapters = [chapters[i] for i in order]
+    graph = build_journey_graph(sorted_chapters, [loc['appearances'] for loc in sorted_locs], spiral)
+    
+    if layout == 'force':
+        graph = layout_journey_graph(graph, sorted_chapters, [loc['name'] for loc in sorted_locs], connections,
+                                     (world_width * WORLD_TILE_SIZE, world_height * WORLD_TILE_SIZE),
+                                     WORLD_MIN_DISTANCE, os.path.join(LAYOUT_CACHE_DIR, WORLD_LAYOUT_CACHE))
+    return sorted_locs, graph
+
+def create_comprehensive_world_map(sorted_locs, graph, output_path, tilesets, band_rows=DEFAULT_BAND_ROWS, tiles_dir=None,
+                                   formats=DEFAULT_FORMATS, report_savings=False):
+    """Create master world map with ALL locations and journey paths.
+    
+    sorted_locs and graph come from world_journey(). Annotations are
+    recorded first, then the map is rendered and streamed to disk as a
+    truecolor PNG band_rows tile rows at a time, or with band_rows=0
+    rendered whole and saved in formats like the location maps. With
+    tiles_dir set, a 256px z/x/y tile pyramid and tiles.json are written
+    there as well. Returns the world map's size report.
+    """
     
-    location_positions = {}
+    # World map size
+    world_width, world_height = WORLD_MAP_SIZE
+    tile_size = WORLD_TILE_SIZE
     
-    # Create spiral path from center
-    center_x = world_width * tile_size // 2
-    center_y = world_height * tile_size // 2
+    # Record paths, markers and labels; they are drawn band by band later
+    draw = DrawList()
     
     print(f"📍 Placing {len(sorted_locs)} locations on world map...")
+    location_positions = graph['locations'].tolist()
     
-    for i, loc in enumerate(sorted_locs):
-        # Spiral outward from center
-        angle = (i / len(sorted_locs)) * 6.28 * 5  # 5 rotations for 143 locations
-        radius = 40 + (i / len(sorted_locs)) * (min(world_width, world_height) * tile_size // 2 - 80)
-        
-        x = int(center_x + radius * math.cos(angle))
-        y = int(center_y + radius * math.sin(angle))
-        
-        location_positions[loc['name']] = (x, y)
-    
-    # Draw journey paths for multi-chapter locations
-    print("🛤️ Drawing journey paths...")
-    for loc in sorted_locs:
-        if loc['appearances'] > 1:
-            # Draw connections to chapters where this location appears
-            pos = location_positions[loc['name']]
-            chapter_nums = [int(c) for c in loc['chapters'].split(',')]
-            
-            # Draw path to this location from previous chapters
-            for ch_num in chapter_nums:
-                # Find chapter location
-                ch_idx = ch_num - 1
-                if ch_idx < len(sorted_locs):
-                    angle = (ch_idx / 69) * 6.28 * 5
-                    radius = 40 + (ch_idx / 69) * (min(world_width, world_height) * tile_size // 2 - 80)
-                    ch_pos = (int(center_x + radius * math.cos(angle)),
-                             int(center_y + radius * math.sin(angle)))
-                    
-                    # Draw light path
-                    draw.line([ch_pos, pos], fill=(255, 220, 100, 128), width=1)
+    # Draw journey paths for multi-chapter locations, light paths from
+    # every chapter they appear in
+    print(f"🛤️ Drawing {len(graph['edges'])} journey paths...")
+    draw.segments(journey_segments(graph), fill=(255, 220, 100, 128), width=1)
     
     # Draw main chapter path
-    print("🛤️ Drawing main 69-chapter path...")
-    prev_pos = None
-    for i in range(69):
-        angle = (i / 69) * 6.28 * 5
-        radius = 40 + (i / 69) * (min(world_width, world_height) * tile_size // 2 - 80)
-        pos = (int(center_x + radius * math.cos(angle)),
-               int(center_y + radius * math.sin(angle)))
-        
-        if prev_pos:
-            draw.line([prev_pos, pos], fill=(255, 200, 50), width=4)
-        
-        prev_pos = pos
+    print(f"🛤️ Drawing main {graph['chapter_count']}-chapter path...")
+    draw.segments(chapter_path_segments(graph), fill=(255, 200, 50), width=4)
     
     # Draw location markers
     print("📌 Adding all location markers...")
@@ -235,8 +277,8 @@ def create_comprehensive_world_map(locations, output_path, tilesets):
         'Mixed': (180, 180, 180)
     }
     
-    for loc in sorted_locs:
-        pos = location_positions[loc['name']]
+    markers = []
+    for loc, pos in zip(sorted_locs, location_positions):
         color = color_map.get(loc['terrain'], (255, 255, 255))
         
         # Size by importance
@@ -253,6 +295,7 @@ def create_comprehensive_world_map(locations, output_path, tilesets):
         draw.ellipse([pos[0] - marker_size, pos[1] - marker_size, 
                       pos[0] + marker_size, pos[1] + marker_size],
                      fill=color, outline=(255, 255, 255), width=2)
+        markers.append((loc['name'], pos[0], pos[1], marker_size))
     
     # Add title
     print("✍️ Adding title and info...")
@@ -269,11 +312,48 @@ def create_comprehensive_world_map(locations, output_path, tilesets):
         draw.ellipse([25, y, 25 + size*2, y + size*2], fill=(180, 180, 180), outline=(255, 255, 255))
         draw.text((40 + size*2, y), text, fill=(255, 255, 255), font=title_font)
     
-    # Save
-    world_map.save(output_path)
+    # Render terrain under the annotations and stream it to disk
+    print(f"🌍 Rendering world map base{f' in {band_rows}-row bands' if band_rows else ''}...")
+    report = render_world_map(output_path, WORLD_MAP_SIZE, WORLD_MAP_SEED, WORLD_MAP_DENSITY,
+                              tilesets.get('grass'), draw, tile_size=tile_size, band_rows=band_rows,
+                              tiles_dir=tiles_dir, formats=formats, report_savings=report_savings)
     print(f"\n✅ Comprehensive world map saved to: {output_path}")
+    print(f"  💾 {format_report(report)}")
+    
+    # Keep the marker boxes for hover/click hit-testing on the maps page
+    write_hit_index(hit_index_path(output_path), markers, (world_width * tile_size, world_height * tile_size))
+    print(f"✅ Marker hit index saved to: {hit_index_path(output_path)}")
+    if tiles_dir:
+        print(f"✅ World map tile pyramid saved to: {tiles_dir}/")
+    return report
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate all location maps and the comprehensive world map')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for location maps (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every map even if the build manifest says it is up to date')
+    parser.add_argument('--world-band-rows', type=int, default=DEFAULT_BAND_ROWS,
+                        help='tile rows of the world map held in memory at once (0 = render it whole)')
+    parser.add_argument('--world-layout', choices=['force', 'spiral'], default='force',
+                        help='world map placement: overlap-free force layout, or the original spiral')
+    parser.add_argument('--terrain', choices=TERRAIN_ENGINES, default=DEFAULT_TERRAIN_ENGINE,
+                        help="location map terrain: seeded random vertices, 'wfc' (Wave Function Collapse "
+                             "over the tileset's adjacency rules), 'noise' (coherent noise shaped per "
+                             "terrain) or 'layered' (several terrains per map)")
+    parser.add_argument('--location-terrain', type=parse_location_terrain, action='append', default=[],
+                        metavar='NAME=ENGINE', help='terrain engine for one location, overriding --terrain '
+                                                    '(repeatable)')
+    parser.add_argument('--world-tiles', action='store_true',
+                        help=f'also export the world map as a z/x/y tile pyramid in public/maps/{WORLD_TILES_DIR}/')
+    parser.add_argument('--formats', type=parse_formats, default=DEFAULT_FORMATS,
+                        help='comma-separated map formats: png (always written), webp, avif; the world map '
+                             'only gets them with --world-band-rows 0, streamed it is always a plain PNG')
+    parser.add_argument('--report-savings', action='store_true',
+                        help='also encode a plain PNG of every map to report the bytes saved')
+    args = parser.parse_args()
+    workers = resolve_workers(args.workers)
+    
     print("🗺️ COMPREHENSIVE LOCATION MAPPING - ALL 143 LOCATIONS")
     print("=" * 70)
     
@@ -283,14 +363,8 @@ if __name__ == '__main__':
     
     # Load all locations
     csv_path = os.path.join(project_root, 'data/all_locations_comprehensive.csv')
-    locations = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            row['first_chapter'] = int(row['first_chapter'])
-            row['appearances'] = int(row['appearances'])
-            locations.append(row)
+    store = load_location_store(csv_path)
+    locations = location_rows(store)
     
     print(f"\n📊 Loaded {len(locations)} locations from CSV")
     
@@ -315,27 +389,64 @@ if __name__ == '__main__':
             tilesets[key] = load_wang_tileset(json_path, png_path)
             print(f"✅ Loaded: {filename} tileset")
     
-    print(f"\n🎨 Generating individual location maps...")
-    print("=" * 70)
-    
-    output_dir = os.path.join(project_root, 'public/maps/locations')
+    maps_dir = os.path.join(project_root, 'public/maps')
+    output_dir = os.path.join(maps_dir, 'locations')
     os.makedirs(output_dir, exist_ok=True)
     
-    # Generate map for each location
+    # Compare every map's input hash with the build manifest
+    manifest = load_manifest(maps_dir)
+    planned = {}
+    stale_plans = []
     generated_maps = []
     terrain_stats = {}
     
-    for i, loc in enumerate(locations, 1):
-        result = generate_location_map(loc, tilesets, output_dir)
-        if result:
-            generated_maps.append(result)
-            terrain = loc['terrain']
-            terrain_stats[terrain] = terrain_stats.get(terrain, 0) + 1
-            
-            if i % 20 == 0:
-                print(f"  Generated {i}/{len(locations)} maps...")
-    
-    print(f"\n✅ Generated {len(generated_maps)} location maps!")
+    location_engines = dict(args.location_terrain)
+    unknown = sorted(set(location_engines) - {loc['name'] for loc in locations})
+    if unknown:
+        print(f"⚠️  --location-terrain names not in the CSV: {', '.join(unknown)}")
+    
+    for loc in locations:
+        plan = plan_location_map(loc, location_engines.get(loc['name'], args.terrain))
+        rel_path = f"locations/{plan['file']}"
+        if not all(key in tilesets for key in [plan['tileset']] + plan_tilesets(plan)):
+            # Keep the map from an earlier run rather than pruning it
+            if rel_path in manifest['maps']:
+                planned[rel_path] = manifest['maps'][rel_path]
+            continue
+
+        planned[rel_path] = location_map_hash(loc, plan, tilesets, args.formats)
+        files = [variant_path(rel_path, fmt) for fmt in args.formats]
+        
+        generated_maps.append({'name': plan['name'], 'file': plan['file'], 'size': plan['size']})
+        terrain = loc['terrain']
+        terrain_stats[terrain] = terrain_stats.get(terrain, 0) + 1
+        
+        if args.force or is_stale(manifest, maps_dir, rel_path, planned[rel_path], files):
+            stale_plans.append(plan)
+    
+    print(f"\n🎨 Generating individual location maps ({workers} worker{'s' if workers != 1 else ''})...")
+    print("=" * 70)
+    print(f"  ♻️  {len(generated_maps) - len(stale_plans)} maps up to date, {len(stale_plans)} to render")
+    
+    # Each worker loads the tilesets once; results arrive in plan order
+    results = run_batch(partial(render_location_map, output_dir=output_dir, formats=args.formats,
+                                report_savings=args.report_savings), stale_plans,
+                        load_tilesets, (tileset_files, base_dir), workers=workers)
+    reports = []
+    
+    for i, result in enumerate(results, 1):
+        rel_path = f"locations/{result['file']}"
+        record_map(manifest, maps_dir, rel_path, planned[rel_path],
+                   [os.path.relpath(path, maps_dir) for path in report_files(result['report'])])
+        reports.append(result['report'])
+        print(f"  💾 {format_report(result['report'])}")
+        
+        if i % 20 == 0:
+            print(f"  Generated {i}/{len(stale_plans)} maps...")
+    
+    print_summary(reports)
+    
+    print(f"\n✅ {len(generated_maps)} location maps ready ({len(stale_plans)} rendered)!")
     print(f"\n📊 Maps by terrain type:")
     for terrain, count in sorted(terrain_stats.items(), key=lambda x: x[1], reverse=True):
         print(f"  {terrain}: {count} maps")
@@ -344,12 +455,65 @@ if __name__ == '__main__':
     print(f"\n🌍 Creating comprehensive world map...")
     print("=" * 70)
     
-    world_output = os.path.join(project_root, 'public/maps/adventure-realm-complete-map.png')
-    create_comprehensive_world_map(locations, world_output, tilesets)
+    world_rel_path = 'adventure-realm-complete-map.png'
+    world_output = os.path.join(maps_dir, world_rel_path)
+    connections, unmatched = match_connections(
+        load_connections(os.path.join(project_root, 'data/adventure_realm_locations.csv')),
+        [loc['name'] for loc in locations])
+    print(f"🔗 {len(connections)} location connections for the layout")
+    if unmatched:
+        print(f"  ⚠️  {len(unmatched)} connected names are not in the location CSV: {', '.join(unmatched)}")
+    placement = world_placement(args.world_layout, connections)
+    planned[world_rel_path] = world_map_hash(locations, tilesets, placement)
+    hits_rel_path = os.path.relpath(hit_index_path(world_output), maps_dir)
+    planned[hits_rel_path] = planned[world_rel_path]
+    # A streamed world map is only ever a PNG (see realm.worldmap)
+    world_formats = DEFAULT_FORMATS if args.world_band_rows else args.formats
+    world_files = [variant_path(world_rel_path, fmt) for fmt in world_formats]
+    world_stale = (args.force or is_stale(manifest, maps_dir, world_rel_path, planned[world_rel_path], world_files)
+                   or is_stale(manifest, maps_dir, hits_rel_path, planned[hits_rel_path]))
+    
+    # Positions and journey edges are computed once, for the map and the maps page
+    sorted_locs, journey = world_journey(store, args.world_layout, connections)
+    journey_rel_path = WORLD_JOURNEY_FILE
+    planned[journey_rel_path] = journey_graph_hash(locations, placement)
+    if args.force or is_stale(manifest, maps_dir, journey_rel_path, planned[journey_rel_path]):
+        write_journey_json(os.path.join(maps_dir, journey_rel_path), journey, sorted_locs,
+                           (WORLD_MAP_SIZE[0] * WORLD_TILE_SIZE, WORLD_MAP_SIZE[1] * WORLD_TILE_SIZE))
+        manifest['maps'][journey_rel_path] = planned[journey_rel_path]
+        print(f"🧭 Journey graph saved: {len(sorted_locs)} locations, {len(journey['edges'])} edges")
+    
+    # The pyramid is tracked through its descriptor and only rebuilt on request
+    tiles_rel_path = f'{WORLD_TILES_DIR}/{DESCRIPTOR_NAME}'
+    tiles_dir = None
+    if args.world_tiles:
+        planned[tiles_rel_path] = planned[world_rel_path]
+        if world_stale or is_stale(manifest, maps_dir, tiles_rel_path, planned[tiles_rel_path]):
+            tiles_dir = os.path.join(maps_dir, WORLD_TILES_DIR)
+    elif tiles_rel_path in manifest['maps']:
+        planned[tiles_rel_path] = manifest['maps'][tiles_rel_path]
+    
+    if world_stale or tiles_dir:
+        world_report = create_comprehensive_world_map(sorted_locs, journey, world_output, tilesets,
+                                                      band_rows=args.world_band_rows, tiles_dir=tiles_dir,
+                                                      formats=world_formats, report_savings=args.report_savings)
+        record_map(manifest, maps_dir, world_rel_path, planned[world_rel_path],
+                   [os.path.relpath(path, maps_dir) for path in report_files(world_report)])
+        manifest['maps'][hits_rel_path] = planned[hits_rel_path]
+        if tiles_dir:
+            manifest['maps'][tiles_rel_path] = planned[tiles_rel_path]
+    else:
+        print("♻️  World map is up to date")
+    
+    # Drop maps for locations that left the CSV
+    removed = prune_orphans(manifest, maps_dir, planned)
+    for rel_path in removed:
+        print(f"🗑️  Pruned orphaned map: {rel_path}")
+    
+    save_manifest(maps_dir, manifest)
     
     print(f"\n🎉 COMPLETE!")
     print(f"   📁 Location maps: {output_dir}/")
     print(f"   🗺️  World map: {world_output}")
     print(f"\n   Total: {len(generated_maps)} location maps + 1 comprehensive world map")
     print(f"\n✅ All {len(locations)} locations mapped with journey markers!")
-
@@ -3,106 +3,31 @@
 Generate ALL 91 location maps + master world map with journey path
 """
 
-import json
 import os
-import csv
-import random
+import argparse
 from PIL import Image, ImageDraw, ImageFont
 
-def load_wang_tileset(metadata_path, image_path):
-    """Load Wang tileset."""
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    sprite_sheet = Image.open(image_path)
-    tiles = {}
-    
-    for tile in metadata['tileset_data']['tiles']:
-        corners = tile['corners']
-        bbox = tile['bounding_box']
-        
-        tile_img = sprite_sheet.crop((
-            bbox['x'], bbox['y'],
-            bbox['x'] + bbox['width'],
-            bbox['y'] + bbox['height']
-        ))
-        
-        nw = 1 if corners['NW'] == 'upper' else 0
-        ne = 1 if corners['NE'] == 'upper' else 0
-        sw = 1 if corners['SW'] == 'upper' else 0
-        se = 1 if corners['SE'] == 'upper' else 0
-        wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-        
-        tiles[wang_idx] = tile_img
-    
-    tile_size = metadata['tileset_image']['dimensions']['width'] // 4
-    
-    return {
-        'tiles': tiles,
-        'tile_size': tile_size
-    }
-
-def create_terrain_layout(width, height, seed, density=0.4):
-    """Create procedural terrain layout."""
-    random.seed(seed)
-    grid = [[0 for _ in range(width + 1)] for _ in range(height + 1)]
-    
-    for y in range(height + 1):
-        for x in range(width + 1):
-            center_x, center_y = width // 2, height // 2
-            dist = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-            max_dist = ((width / 2) ** 2 + (height / 2) ** 2) ** 0.5
-            
-            prob = density * (1 - (dist / max_dist) * 0.5)
-            
-            if random.random() < prob:
-                grid[y][x] = 1
-    
-    return grid
+from realm.batch import resolve_workers
+from realm.classify import tileset_for_terrain
+from realm.hitindex import hit_index_path, write_hit_index
+from realm.locstore import load_location_store, location_rows
+from realm.output import DEFAULT_FORMATS, MapEncoder, encode_map, format_report, parse_formats, print_summary
+from realm.seeding import location_seed
+from realm.terrain import create_terrain_layout
+from realm.tilesets import load_wang_tileset
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
 
 def render_map_from_tileset(tileset, terrain_grid):
     """Render map using Wang tiles."""
-    tiles = tileset['tiles']
-    tile_size = tileset['tile_size']
-    
-    height = len(terrain_grid) - 1
-    width = len(terrain_grid[0]) - 1
-    
-    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
-    
-    for y in range(height):
-        for x in range(width):
-            nw = terrain_grid[y][x]
-            ne = terrain_grid[y][x + 1]
-            sw = terrain_grid[y + 1][x]
-            se = terrain_grid[y + 1][x + 1]
-            
-            wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-            
-            if wang_idx in tiles:
-                map_img.paste(tiles[wang_idx], (x * tile_size, y * tile_size))
-    
-    return map_img
+    return composite_tiles(tileset_atlas(tileset), wang_index_grid(terrain_grid))
 
-def generate_location_map(location, tilesets, output_dir):
+def generate_location_map(location, tilesets, output_dir, encoder):
     """Generate map for a single location."""
     terrain = location['terrain']
     name = location['name']
     
-    # Select tileset based on terrain
-    tileset = None
-    if terrain == 'Desert':
-        tileset = tilesets.get('desert')
-    elif terrain == 'Water':
-        tileset = tilesets.get('ocean')
-    elif terrain == 'Dungeon':
-        tileset = tilesets.get('dungeon')
-    elif terrain == 'City':
-        tileset = tilesets.get('city')
-    elif terrain == 'Cosmic':
-        tileset = tilesets.get('cosmic')
-    else:  # Forest, Mixed, Village, Valley, Island
-        tileset = tilesets.get('grass')
+    # Select tileset based on terrain (see realm.classify)
+    tileset = tilesets.get(tileset_for_terrain(terrain))
     
     if not tileset:
         return None
@@ -119,8 +44,8 @@ def generate_location_map(location, tilesets, output_dir):
         size = (32, 32)
     
     # Generate terrain
-    seed = hash(name) % 100000
-    terrain_grid = create_terrain_layout(size[0], size[1], seed, density=0.45)
+    seed = location_seed(name)
+    terrain_grid = create_terrain_layout(size[0], size[1], seed, density=0.45, compat=True)
     
     # Render map
     map_img = render_map_from_tileset(tileset, terrain_grid)
@@ -128,7 +53,8 @@ def generate_location_map(location, tilesets, output_dir):
     # Save
     safe_name = name.lower().replace(' ', '-').replace("'", '').replace(',', '').replace('!', '')[:50]
     output_path = f"{output_dir}/{safe_name}.png"
-    map_img.save(output_path)
+    for report in encoder.submit(map_img, output_path):
+        print(f"  💾 {format_report(report)}")
     
     return {
         'name': name,
@@ -136,7 +62,7 @@ def generate_location_map(location, tilesets, output_dir):
         'size': size
     }
 
-def create_world_map(locations, output_path, tilesets):
+def create_world_map(locations, output_path, tilesets, formats=DEFAULT_FORMATS, report_savings=False):
     """Create master world map with all locations and journey path."""
     
     # World map size
@@ -146,7 +72,7 @@ def create_world_map(locations, output_path, tilesets):
     
     # Create base terrain using grass tileset
     print("🌍 Creating world map base terrain...")
-    terrain_grid = create_terrain_layout(world_width, world_height, seed=42, density=0.35)
+    terrain_grid = create_terrain_layout(world_width, world_height, seed=42, density=0.35, compat=True)
     
     if 'grass' in tilesets:
         world_map = render_map_from_tileset(tilesets['grass'], terrain_grid)
@@ -194,6 +120,7 @@ def create_world_map(locations, output_path, tilesets):
     
     # Draw location markers
     print("📌 Adding location markers...")
+    markers = []
     for i, loc in enumerate(sorted_locs):
         pos = location_positions[loc['name']]
         
@@ -220,6 +147,7 @@ def create_world_map(locations, output_path, tilesets):
         draw.ellipse([pos[0] - marker_size, pos[1] - marker_size, 
                       pos[0] + marker_size, pos[1] + marker_size],
                      fill=color, outline=(255, 255, 255), width=2)
+        markers.append((loc['name'], pos[0], pos[1], marker_size))
         
         # Label major locations (5+ appearances)
         if loc['appearances'] >= 5:
@@ -255,10 +183,24 @@ def create_world_map(locations, output_path, tilesets):
         draw.text((40, y), name, fill=(255, 255, 255), font=title_font)
     
     # Save
-    world_map.save(output_path)
+    report = encode_map(world_map, output_path, formats, report_savings)
     print(f"\n✅ World map saved to: {output_path}")
+    print(f"  💾 {format_report(report)}")
+    
+    # Keep the marker boxes for hover/click hit-testing on the maps page
+    write_hit_index(hit_index_path(output_path), markers, world_map.size)
+    print(f"✅ Marker hit index saved to: {hit_index_path(output_path)}")
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate all 91 location maps and the master world map')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for map encoding (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--formats', type=parse_formats, default=DEFAULT_FORMATS,
+                        help='comma-separated map formats: png (always written), webp, avif')
+    parser.add_argument('--report-savings', action='store_true',
+                        help='also encode a plain PNG of every map to report the bytes saved')
+    args = parser.parse_args()
+    
     print("🗺️ COMPLETE ADVENTURE REALM MAP GENERATION")
     print("=" * 60)
     
@@ -268,14 +210,7 @@ if __name__ == '__main__':
     
     # Load all locations
     csv_path = os.path.join(project_root, 'data/all_locations_complete.csv')
-    locations = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            row['first_chapter'] = int(row['first_chapter'])
-            row['appearances'] = int(row['appearances'])
-            locations.append(row)
+    locations = location_rows(load_location_store(csv_path))
     
     print(f"\n📊 Loaded {len(locations)} locations from CSV")
     
@@ -308,12 +243,13 @@ if __name__ == '__main__':
     output_dir = os.path.join(project_root, 'public/maps/locations')
     os.makedirs(output_dir, exist_ok=True)
     
-    # Generate map for each location
+    # Generate map for each location; PNG/WebP encoding runs in a worker pool
     generated_maps = []
     terrain_stats = {}
+    encoder = MapEncoder(args.formats, resolve_workers(args.workers), args.report_savings)
     
     for i, loc in enumerate(locations, 1):
-        result = generate_location_map(loc, tilesets, output_dir)
+        result = generate_location_map(loc, tilesets, output_dir, encoder)
         if result:
             generated_maps.append(result)
             terrain = loc['terrain']
@@ -322,7 +258,11 @@ if __name__ == '__main__':
             if i % 10 == 0:
                 print(f"  Generated {i}/{len(locations)} maps...")
     
+    for report in encoder.close():
+        print(f"  💾 {format_report(report)}")
+    
     print(f"\n✅ Generated {len(generated_maps)} location maps!")
+    print_summary(encoder.reports)
     print(f"\n📊 Maps by terrain type:")
     for terrain, count in sorted(terrain_stats.items(), key=lambda x: x[1], reverse=True):
         print(f"  {terrain}: {count} maps")
@@ -332,7 +272,7 @@ if __name__ == '__main__':
     print("=" * 60)
     
     world_output = os.path.join(project_root, 'public/maps/adventure-realm-world-map.png')
-    create_world_map(locations, world_output, tilesets)
+    create_world_map(locations, world_output, tilesets, args.formats, args.report_savings)
     
     print(f"\n🎉 COMPLETE!")
     print(f"   📁 Individual maps: {output_dir}/")
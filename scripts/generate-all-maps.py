@@ -3,53 +3,25 @@
 Generate ALL Adventure Realm location maps
 """
 
-import json
 import os
-import random
-from PIL import Image
 
-def load_wang_tileset(metadata_path, image_path):
-    """Load a Wang tileset from PixelLab split format."""
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    sprite_sheet = Image.open(image_path)
-    
-    tiles = {}
-    for tile in metadata['tileset_data']['tiles']:
-        corners = tile['corners']
-        bbox = tile['bounding_box']
-        
-        tile_img = sprite_sheet.crop((
-            bbox['x'], bbox['y'],
-            bbox['x'] + bbox['width'],
-            bbox['y'] + bbox['height']
-        ))
-        
-        nw = 1 if corners['NW'] == 'upper' else 0
-        ne = 1 if corners['NE'] == 'upper' else 0
-        sw = 1 if corners['SW'] == 'upper' else 0
-        se = 1 if corners['SE'] == 'upper' else 0
-        wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-        
-        tiles[wang_idx] = tile_img
-    
-    tile_size = metadata['tileset_data']['tile_size']['width']
-    
-    return {'tiles': tiles, 'tile_size': tile_size}
+from realm.output import encode_map, format_report
+from realm.seeding import location_seed, python_rng
+from realm.tilesets import load_wang_tileset
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
 
 def create_terrain_for_location(location_name, width, height):
     """Create terrain layout based on location characteristics."""
     grid = [[0 for _ in range(width + 1)] for _ in range(height + 1)]
     
-    random.seed(hash(location_name) % 100000)  # Consistent for each location
+    rng = python_rng(location_seed(location_name))  # Consistent for each location
     
     # Different patterns for different location types
     if 'hollow' in location_name.lower() or 'village' in location_name.lower():
         # Village with scattered buildings/trees
         for y in range(height + 1):
             for x in range(width + 1):
-                if random.random() < 0.3:
+                if rng.random() < 0.3:
                     grid[y][x] = 1
     
     elif 'meadow' in location_name.lower() or 'field' in location_name.lower():
@@ -66,7 +38,7 @@ def create_terrain_for_location(location_name, width, height):
         # Scattered rock formations
         for y in range(height + 1):
             for x in range(width + 1):
-                if random.random() < 0.2:
+                if rng.random() < 0.2:
                     # Create small clusters
                     if (x + y) % 5 == 0:
                         for dy in range(-1, 2):
@@ -79,14 +51,14 @@ def create_terrain_for_location(location_name, width, height):
         # Dense forest pattern
         for y in range(height + 1):
             for x in range(width + 1):
-                if random.random() < 0.6:
+                if rng.random() < 0.6:
                     grid[y][x] = 1
     
     elif 'labyrinth' in location_name.lower():
         # Maze-like pattern
         for y in range(height + 1):
             for x in range(width + 1):
-                if (x % 4 == 0 or y % 4 == 0) and random.random() < 0.7:
+                if (x % 4 == 0 or y % 4 == 0) and rng.random() < 0.7:
                     grid[y][x] = 1
     
     elif 'mountain' in location_name.lower() or 'peak' in location_name.lower():
@@ -102,35 +74,14 @@ def create_terrain_for_location(location_name, width, height):
         # Default scattered pattern
         for y in range(height + 1):
             for x in range(width + 1):
-                if random.random() < 0.4:
+                if rng.random() < 0.4:
                     grid[y][x] = 1
     
     return grid
 
 def render_map(tileset, terrain_grid):
     """Render a map image using Wang tiles."""
-    tiles = tileset['tiles']
-    tile_size = tileset['tile_size']
-    
-    height = len(terrain_grid) - 1
-    width = len(terrain_grid[0]) - 1
-    
-    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
-    
-    for y in range(height):
-        for x in range(width):
-            nw = terrain_grid[y][x]
-            ne = terrain_grid[y][x + 1]
-            sw = terrain_grid[y + 1][x]
-            se = terrain_grid[y + 1][x + 1]
-            
-            wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-            
-            tile = tiles.get(wang_idx)
-            if tile:
-                map_img.paste(tile, (x * tile_size, y * tile_size))
-    
-    return map_img
+    return composite_tiles(tileset_atlas(tileset), wang_index_grid(terrain_grid))
 
 # Location definitions
 locations = [
@@ -182,8 +133,9 @@ if __name__ == '__main__':
         map_img = render_map(tilesets[tileset_name], terrain_grid)
         
         output_path = f"{output_dir}/{loc['id']}.png"
-        map_img.save(output_path)
+        report = encode_map(map_img, output_path)
         print(f"   ✅ Saved to: {output_path}")
+        print(f"   💾 {format_report(report)}")
     
     print(f"\n🎉 Map generation complete!")
     print(f"📁 Maps saved to: {output_dir}/")
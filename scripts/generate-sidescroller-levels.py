@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Generate sidescroller levels for the locations data/tileset_database.csv
+assigns a sidescroller tileset to (The Labyrinth, Fimbul Peaks, ...)
+Each level is written as screen-width chunk PNGs plus a level.json
+"""
+
+import os
+import argparse
+from functools import partial
+
+from realm.batch import resolve_workers, run_batch
+from realm.manifest import content_hash, is_stale, load_manifest, prune_orphans, record_map, save_manifest
+from realm.output import DEFAULT_FORMATS, encode_map, parse_formats, print_summary, report_files, variant_path
+from realm.seeding import location_seed
+from realm.sidescroller import (LEVEL_ROWS, SCREEN_COLUMNS, SIDESCROLLER_DIR, render_chunk,
+                                sidescroller_assignments, write_level_json)
+from realm.tilesets import load_tilesets
+
+# Bump whenever a change here alters the pixels of levels built from the same inputs
+GENERATOR_VERSION = 2
+
+DEFAULT_SCREENS = 32
+LEVEL_FILE = 'level.json'
+
+def plan_level(name, tileset_key, screens):
+    """Work out the seed, folder and chunk files of a location's level."""
+    safe_name = name.lower().replace(' ', '-').replace("'", '').replace(',', '').replace('!', '')[:50]
+    return {
+        'name': name,
+        'tileset': tileset_key,
+        'seed': location_seed(name, 'sidescroller'),
+        'dir': safe_name,
+        'chunks': [f'chunk-{chunk:03d}.png' for chunk in range(screens)]
+    }
+
+def chunk_hash(level, chunk, tileset, formats=DEFAULT_FORMATS):
+    """Hash every input that affects one chunk's pixels and output files."""
+    return content_hash({
+        'generator': GENERATOR_VERSION,
+        'formats': formats,
+        'seed': level['seed'],
+        'chunk': chunk,
+        'columns': SCREEN_COLUMNS,
+        'rows': LEVEL_ROWS,
+        'tileset': tileset['source_hash']
+    })
+
+def render_level_chunk(job, tilesets, output_dir, formats=DEFAULT_FORMATS, report_savings=False):
+    """Render and save one (level, chunk) job."""
+    level, chunk = job
+    chunk_img = render_chunk(tilesets[level['tileset']], level['seed'], chunk)
+    
+    rel_path = f"{level['dir']}/{level['chunks'][chunk]}"
+    report = encode_map(chunk_img, os.path.join(output_dir, rel_path), formats, report_savings)
+    
+    return {'file': rel_path, 'report': report}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate chunked sidescroller levels')
+    parser.add_argument('--screens', type=int, default=DEFAULT_SCREENS,
+                        help=f'level length in screen-width chunks of {SCREEN_COLUMNS} tiles')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes for chunks (0 = one per CPU core, 1 = serial)')
+    parser.add_argument('--force', action='store_true',
+                        help='re-render every chunk even if the build manifest says it is up to date')
+    parser.add_argument('--formats', type=parse_formats, default=DEFAULT_FORMATS,
+                        help='comma-separated chunk formats: png (always written), webp, avif')
+    parser.add_argument('--report-savings', action='store_true',
+                        help='also encode a plain PNG of every chunk to report the bytes saved')
+    args = parser.parse_args()
+    workers = resolve_workers(args.workers)
+    
+    print("🎮 SIDESCROLLER LEVELS")
+    print("=" * 70)
+    
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.dirname(script_dir)
+    output_dir = os.path.join(project_root, 'public/maps/sidescroller')
+    
+    assignments = sidescroller_assignments()
+    tileset_files = {stem: stem for _, stem in assignments}
+    tilesets = load_tilesets(tileset_files, SIDESCROLLER_DIR)
+    for stem in tilesets:
+        print(f"✅ Loaded: {stem} tileset")
+    
+    # Chunks are planned and hashed one by one, so a longer level only
+    # renders its new screens
+    manifest = load_manifest(output_dir)
+    levels = []
+    planned = {}
+    stale_jobs = []
+    
+    for name, stem in assignments:
+        level = plan_level(name, stem, args.screens)
+        if stem not in tilesets:
+            # Keep the level from an earlier run rather than pruning it
+            planned.update({path: digest for path, digest in manifest['maps'].items()
+                            if path.startswith(f"{level['dir']}/")})
+            continue
+        levels.append(level)
+        os.makedirs(os.path.join(output_dir, level['dir']), exist_ok=True)
+        
+        for chunk, filename in enumerate(level['chunks']):
+            rel_path = f"{level['dir']}/{filename}"
+            planned[rel_path] = chunk_hash(level, chunk, tilesets[stem], args.formats)
+            files = [variant_path(rel_path, fmt) for fmt in args.formats]
+            if args.force or is_stale(manifest, output_dir, rel_path, planned[rel_path], files):
+                stale_jobs.append((level, chunk))
+        
+        print(f"  🗺️  {name}: {stem}, {args.screens} screens")
+    
+    total_chunks = sum(len(level['chunks']) for level in levels)
+    print(f"\n🎨 Rendering chunks ({workers} worker{'s' if workers != 1 else ''})...")
+    print(f"  ♻️  {total_chunks - len(stale_jobs)} chunks up to date, {len(stale_jobs)} to render")
+    
+    results = run_batch(partial(render_level_chunk, output_dir=output_dir, formats=args.formats,
+                                report_savings=args.report_savings), stale_jobs,
+                        load_tilesets, (tileset_files, SIDESCROLLER_DIR), workers=workers, chunksize=8)
+    reports = []
+    
+    for i, result in enumerate(results, 1):
+        record_map(manifest, output_dir, result['file'], planned[result['file']],
+                   [os.path.relpath(path, output_dir) for path in report_files(result['report'])])
+        reports.append(result['report'])
+        if i % 50 == 0:
+            print(f"  Rendered {i}/{len(stale_jobs)} chunks...")
+    
+    print_summary(reports)
+    
+    for level in levels:
+        rel_path = f"{level['dir']}/{LEVEL_FILE}"
+        planned[rel_path] = content_hash([planned[f"{level['dir']}/{filename}"] for filename in level['chunks']])
+        if args.force or is_stale(manifest, output_dir, rel_path, planned[rel_path]):
+            write_level_json(os.path.join(output_dir, rel_path), level, level['chunks'],
+                             tilesets[level['tileset']]['tile_size'])
+            manifest['maps'][rel_path] = planned[rel_path]
+    
+    # Drop chunks past the end of levels that got shorter
+    removed = prune_orphans(manifest, output_dir, planned)
+    if removed:
+        print(f"🗑️  Pruned {len(removed)} orphaned files")
+    
+    save_manifest(output_dir, manifest)
+    
+    print(f"\n🎉 {len(levels)} levels, {total_chunks} chunks in {output_dir}/")
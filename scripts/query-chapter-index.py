@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Look up phrases in the chapter text through the persistent inverted index
+Brings the index up to date first (only changed chapters are re-read), then
+answers phrase and proximity questions without rescanning the chapters:
+
+    python3 query-chapter-index.py "Cinder Woods"
+    python3 query-chapter-index.py "Cinder Woods" --near Everwood --window 30 --context
+"""
+
+import argparse
+import time
+
+from realm.chapters import CHAPTER_DIR
+from realm.textindex import INDEX_PATH, ChapterIndex
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Query the chapter text index')
+    parser.add_argument('phrase', nargs='?',
+                        help='phrase to look up (case-insensitive, whole words); omit to only update the index')
+    parser.add_argument('--near',
+                        help='only keep hits with this phrase close by')
+    parser.add_argument('--window', type=int, default=10,
+                        help='words allowed between the phrase and --near (default 10)')
+    parser.add_argument('--context', action='store_true',
+                        help='print the text around every hit')
+    parser.add_argument('--limit', type=int, default=20,
+                        help='hits to print (0 = all)')
+    parser.add_argument('--chapter-dir', default=CHAPTER_DIR,
+                        help='directory holding the ChapterN.md files')
+    parser.add_argument('--index', default=INDEX_PATH,
+                        help='index database to use')
+    args = parser.parse_args()
+
+    with ChapterIndex(args.index) as index:
+        start = time.perf_counter()
+        changes = index.update(args.chapter_dir)
+        print(f"📚 Index: {len(changes['indexed'])} chapter files indexed, {len(changes['removed'])} removed, "
+              f"{changes['unchanged']} unchanged ({time.perf_counter() - start:.2f}s)")
+
+        if not args.phrase:
+            raise SystemExit(0)
+
+        start = time.perf_counter()
+        if args.near:
+            hits = index.near(args.phrase, args.near, args.window)
+        else:
+            hits = index.phrase(args.phrase)
+        elapsed = time.perf_counter() - start
+
+        chapters = sorted({hit['chapter'] for hit in hits})
+        query = f'"{args.phrase}"' + (f' within {args.window} words of "{args.near}"' if args.near else '')
+        print(f"\n🔍 {query}: {len(hits)} hits in {len(chapters)} chapters ({elapsed * 1000:.2f} ms)")
+        if chapters:
+            print(f"  Chapters: {', '.join(map(str, chapters))}")
+
+        shown = hits if args.limit <= 0 else hits[:args.limit]
+        for hit in shown:
+            where = f"  Ch{hit['chapter']:2d} {hit['file']} @{hit['start']}"
+            if 'near' in hit:
+                where += f" ({hit['distance']} words from @{hit['near']['start']})"
+            print(where)
+            if args.context:
+                print(f"      {index.context(hit)}")
+        if len(shown) < len(hits):
+            print(f"  ... and {len(hits) - len(shown)} more")
@@ -0,0 +1,3 @@
+"""
+Shared helpers for the Adventure Realm map and location scripts
+"""
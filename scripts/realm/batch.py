@@ -0,0 +1,48 @@
+"""
+Process-pool batch runner for the map generators
+
+Each worker builds its shared context (usually the loaded tilesets) once
+in the pool initializer, so tasks only ship a CSV row in and a small
+result dict back. Results come back in input order, which keeps progress
+output and terrain stats identical to a serial run.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+_worker_context = {}
+
+
+def resolve_workers(workers):
+    """Turn a --workers value into a process count (0 = one per CPU core)."""
+    if workers is None or workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _init_worker(loader, loader_args):
+    _worker_context['value'] = loader(*loader_args)
+
+
+def _run_task(func, item):
+    return func(item, _worker_context['value'])
+
+
+def run_batch(func, items, loader, loader_args=(), workers=1, chunksize=1):
+    """Yield func(item, context) for every item, in input order.
+
+    context is loader(*loader_args), built once per worker process. With a
+    single worker everything runs in-process with no pool at all.
+    """
+    workers = resolve_workers(workers)
+
+    if workers == 1:
+        context = loader(*loader_args)
+        for item in items:
+            yield func(item, context)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(loader, loader_args)) as pool:
+        yield from pool.map(partial(_run_task, func), items, chunksize=chunksize)
@@ -0,0 +1,145 @@
+"""
+Chapter files of the Adventure Realm manuscript
+
+Chapters are Markdown files named like Chapter12.md; chapter 38 was
+split into several part files, which all count as chapter 38.
+
+ingest_chapters() runs an extractor's per-chapter parse in a process
+pool, one task per chapter file. Results come back in task order, so the
+extractor can merge them in the same order a serial loop would have seen
+the chapters and write identical output.
+
+With an extract cache, each chapter's result is also stored under the
+SHA-256 of the file and the chapter number; a rerun only parses the
+chapters whose key changed and reuses the rest. The cache is dropped as
+a whole when the extractor description (its version, patterns, ...)
+changes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from functools import partial
+
+from realm.batch import run_batch
+from realm.manifest import content_hash
+from realm.tilesets import PROJECT_ROOT
+
+EXTRACT_CACHE_VERSION = 1
+EXTRACT_CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache/extract')
+
+CHAPTER_DIR = "/home/dave/Documents/GitHub/turtlebook/COMPLETED CHAPTERS"
+
+_CHAPTER_NUMBER = re.compile(r'Chapter(\d+)')
+
+
+def chapter_number(filename):
+    """Return the chapter number for a chapter filename, or None."""
+    if 'Chapter 38' in filename or 'Chapter38' in filename:
+        return 38
+
+    match = _CHAPTER_NUMBER.search(filename)
+    return int(match.group(1)) if match else None
+
+
+def iter_chapter_files(chapter_dir=CHAPTER_DIR):
+    """Yield (chapter number, path) for every chapter file, sorted by filename."""
+    for filename in sorted(os.listdir(chapter_dir)):
+        if not filename.endswith('.md'):
+            continue
+
+        chapter_num = chapter_number(filename)
+        if chapter_num is not None:
+            yield chapter_num, os.path.join(chapter_dir, filename)
+
+
+def read_chapters(chapter_dir=CHAPTER_DIR):
+    """Yield (chapter number, path, text) for every chapter file."""
+    for chapter_num, path in iter_chapter_files(chapter_dir):
+        with open(path, 'r', encoding='utf-8') as f:
+            yield chapter_num, path, f.read()
+
+
+def _no_context():
+    return None
+
+
+def _ingest_task(parse, task, context):
+    chapter_num, path = task
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse(chapter_num, path, f.read(), context)
+
+
+def open_extract_cache(name, extractor, cache_dir=EXTRACT_CACHE_DIR, fresh=False):
+    """Load the per-chapter result cache of one extractor.
+
+    extractor is any JSON-serialisable description of what produces the
+    results; cached chapters written under a different one are ignored,
+    as are all of them when fresh is set.
+    """
+    digest = content_hash({'version': EXTRACT_CACHE_VERSION, 'extractor': extractor})
+    path = os.path.join(cache_dir, f'{name}.json')
+
+    chapters = {}
+    if not fresh:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('extractor') == digest:
+                chapters = cached['chapters']
+        except (OSError, KeyError, ValueError):
+            pass
+
+    return {'path': path, 'extractor': digest, 'chapters': chapters, 'reused': 0, 'parsed': 0}
+
+
+def save_extract_cache(cache):
+    """Write the cache atomically."""
+    os.makedirs(os.path.dirname(cache['path']), exist_ok=True)
+    tmp_path = f"{cache['path']}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'extractor': cache['extractor'], 'chapters': cache['chapters']}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache['path'])
+
+
+def _chapter_key(chapter_num, path):
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return content_hash({'chapter': chapter_num, 'sha256': digest})
+
+
+def ingest_chapters(parse, tasks, loader=_no_context, loader_args=(), workers=1, cache=None):
+    """Return [parse(chapter number, path, text, context)] for every task, in task order.
+
+    tasks are (chapter number, path) pairs such as iter_chapter_files()
+    yields. Each worker reads and parses its own chapters; context is
+    loader(*loader_args), built once per worker (compiled patterns, a
+    gazetteer, ...). parse must be a module-level function and return
+    picklable results, so plain data rather than match objects.
+
+    With a cache from open_extract_cache(), unchanged chapters are not
+    parsed at all (their results come back JSON round-tripped, so tuples
+    as lists), the cache is updated to exactly these tasks, and its
+    'reused' and 'parsed' counts are set. Save it with save_extract_cache().
+    """
+    task_func = partial(_ingest_task, parse)
+    if cache is None:
+        return list(run_batch(task_func, tasks, loader, loader_args, workers))
+
+    names = [os.path.basename(path) for _, path in tasks]
+    keys = [_chapter_key(chapter_num, path) for chapter_num, path in tasks]
+    cached = cache['chapters']
+    stale = [i for i, (name, key) in enumerate(zip(names, keys)) if cached.get(name, {}).get('key') != key]
+    stale_set = set(stale)
+
+    results = [None if i in stale_set else cached[name]['result'] for i, name in enumerate(names)]
+    if stale:
+        parsed = run_batch(task_func, [tasks[i] for i in stale], loader, loader_args, workers)
+        for i, result in zip(stale, parsed):
+            results[i] = result
+
+    cache['chapters'] = {name: {'key': key, 'result': result} for name, key, result in zip(names, keys, results)}
+    cache['reused'] = len(tasks) - len(stale)
+    cache['parsed'] = len(stale)
+    return results
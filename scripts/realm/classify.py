@@ -0,0 +1,160 @@
+"""
+Table-driven terrain classification shared by the extractors and generators
+
+Terrain used to be picked by if/elif chains of `any(x in name for x in
+[...])`, with slightly different keyword lists in every extractor. Here
+the rules are one ordered table: the first rule with a keyword anywhere
+in the (lower-cased) text wins. A rule table compiles to a single regex
+of lookaheads, one capture group per rule with the keywords of earlier
+rules first, so one pass over the text sees every keyword occurrence and
+the lowest matching group is the winning rule. Results are memoized per
+text, which makes classifying thousands of names mostly dict lookups.
+
+The location-name extractors share TERRAIN_RULES. extract-all-locations
+classifies whole chapter titles and descriptions into its own label set
+(Sacred, Festival, Grassland, ...), which the site filters on, so it
+keeps its own table, CHAPTER_TERRAIN_RULES.
+"""
+
+import re
+
+# First match wins, so more specific terrains come first
+TERRAIN_RULES = [
+    ('Desert', ['desert', 'sand', 'dune', 'oasis']),
+    ('Forest', ['forest', 'woods', 'grove', 'tree', 'jungle']),
+    ('Mountains', ['mountain', 'peak', 'cliff', 'summit', 'ridge', 'highland', 'heights']),
+    ('City', ['city', 'metropolis', 'town', 'palace', 'urban', 'skyscraper']),
+    ('Water', ['ocean', 'sea', 'lake', 'river', 'water', 'tide']),
+    ('Dungeon', ['cave', 'cavern', 'labyrinth', 'dungeon', 'crypt']),
+    ('Digital', ['digital', 'pixel', 'cyber', 'algorithmic', 'code']),
+    ('Cosmic', ['cosmic', 'space', 'star', 'void', 'nebula', 'galaxy', 'cosmos']),
+    ('Village', ['village', 'settlement', 'hollow', 'hamlet', 'haven']),
+    ('Valley', ['valley', 'canyon', 'gorge', 'glade', 'meadow']),
+    ('Island', ['isle', 'island']),
+    ('Temple', ['temple', 'sanctum', 'shrine', 'cathedral', 'sanctuary', 'monastery']),
+    ('Garden', ['garden', 'orchard']),
+    ('Structure', ['library', 'hall', 'chamber', 'tower'])
+]
+DEFAULT_TERRAIN = 'Mixed'
+
+# extract-all-locations' labels for a chapter's title plus description
+CHAPTER_TERRAIN_RULES = [
+    ('Desert', ['desert', 'sand', 'dune', 'oasis']),
+    ('Forest', ['forest', 'woods', 'grove', 'tree']),
+    ('City', ['city', 'metropolis', 'urban', 'concrete', 'skyscraper']),
+    ('Mountains', ['mountain', 'peak', 'cliff', 'summit', 'frozen', 'ice']),
+    ('Water', ['ocean', 'sea', 'water', 'lake', 'island']),
+    ('Dungeon', ['cave', 'cavern', 'labyrinth', 'dungeon']),
+    ('Digital', ['digital', 'pixel', 'cyber', 'algorithmic', 'code']),
+    ('Cosmic', ['cosmic', 'space', 'star', 'planet', 'void', 'cosmos']),
+    ('Sacred', ['library', 'sanctum', 'temple', 'monastery']),
+    ('Valley', ['valley', 'canyon', 'gorge']),
+    ('Village', ['village', 'town', 'settlement']),
+    ('Festival', ['carnival', 'festival', 'celebration']),
+    ('Grassland', ['orchard', 'garden', 'meadow'])
+]
+
+MAP_TYPE_RULES = [
+    ('Sidescroller', ['labyrinth', 'dungeon', 'cave', 'platform', 'climb', 'ascend',
+                      'digital', 'pixel', 'cyber', 'algorithmic'])
+]
+DEFAULT_MAP_TYPE = 'Top-down'
+
+# Terrain -> key of the top-down tileset its maps are drawn with
+TERRAIN_TILESETS = {
+    'Desert': 'desert',
+    'Water': 'ocean',
+    'Dungeon': 'dungeon',
+    'Temple': 'dungeon',
+    'Structure': 'dungeon',
+    'City': 'city',
+    'Cosmic': 'cosmic'
+}
+DEFAULT_TILESET = 'grass'
+
+# Terrain -> terrain classes (lowest level first) of its layered maps; see
+# realm.layers. Terrains not listed use their tileset's two classes
+TERRAIN_PALETTES = {
+    'Water': ('ocean', 'beach', 'grass', 'forest'),
+    'Island': ('ocean', 'beach', 'grass', 'forest'),
+    'Desert': ('rock', 'sand', 'ocean'),
+    'Mountains': ('grass', 'forest', 'rock'),
+    'Valley': ('ocean', 'grass', 'forest'),
+    'Village': ('grass', 'street', 'building'),
+    'City': ('grass', 'street', 'building')
+}
+
+
+def _keyword_group(keywords):
+    """One capture group matching any of keywords, grouped by first letter."""
+    by_first = {}
+    for keyword in keywords:
+        by_first.setdefault(keyword[0], []).append(re.escape(keyword[1:]))
+    return '(' + '|'.join(f"{re.escape(first)}(?:{'|'.join(rests)})" for first, rests in by_first.items()) + ')'
+
+
+def compile_classifier(rules, default):
+    """Compile (label, keywords) rules into a classifier dict with its own memo table."""
+    first_letters = ''.join(sorted({keyword[0] for _, keywords in rules for keyword in keywords}))
+    groups = '|'.join(_keyword_group(keywords) for _, keywords in rules)
+    return {
+        # The character class lets re skip positions no keyword can start at
+        'regex': re.compile(f'(?=[{re.escape(first_letters)}])(?=(?:{groups}))'),
+        'labels': [label for label, _ in rules],
+        'default': default,
+        'memo': {}
+    }
+
+
+def classify(classifier, text):
+    """Return the label of the first rule with a keyword in text, or the default."""
+    memo = classifier['memo']
+    label = memo.get(text)
+    if label is None:
+        # lastindex is the (1-based) rule that matched at each position
+        best = min((match.lastindex for match in classifier['regex'].finditer(text.lower())), default=None)
+        label = memo[text] = classifier['default'] if best is None else classifier['labels'][best - 1]
+    return label
+
+
+def classify_many(classifier, texts):
+    """Classify many texts at once, each distinct text only once."""
+    memo = classifier['memo']
+    for text in set(texts) - memo.keys():
+        classify(classifier, text)
+    return [memo[text] for text in texts]
+
+
+TERRAIN_CLASSIFIER = compile_classifier(TERRAIN_RULES, DEFAULT_TERRAIN)
+CHAPTER_TERRAIN_CLASSIFIER = compile_classifier(CHAPTER_TERRAIN_RULES, DEFAULT_TERRAIN)
+MAP_TYPE_CLASSIFIER = compile_classifier(MAP_TYPE_RULES, DEFAULT_MAP_TYPE)
+
+
+def classify_terrain(text, classifier=TERRAIN_CLASSIFIER):
+    """Return the terrain for a location name (or name plus description)."""
+    return classify(classifier, text)
+
+
+def classify_terrains(texts, classifier=TERRAIN_CLASSIFIER):
+    """Return the terrain of every text, in order."""
+    return classify_many(classifier, texts)
+
+
+def classify_map_type(text):
+    """Return 'Sidescroller' or 'Top-down' for a location's title and description."""
+    return classify(MAP_TYPE_CLASSIFIER, text)
+
+
+def classify_map_types(texts):
+    """Return the map type of every text, in order."""
+    return classify_many(MAP_TYPE_CLASSIFIER, texts)
+
+
+def tileset_for_terrain(terrain):
+    """Return the key of the tileset a terrain's maps are drawn with."""
+    return TERRAIN_TILESETS.get(terrain, DEFAULT_TILESET)
+
+
+def palette_for_terrain(terrain):
+    """Return the layered terrain classes of a terrain, or None if it has no palette."""
+    return TERRAIN_PALETTES.get(terrain)
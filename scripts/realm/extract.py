@@ -0,0 +1,181 @@
+"""
+Single-pass location scanner for the chapter extractors
+
+The extraction patterns used to be run one re.finditer() at a time over
+every chapter, and most of them rescanned the same big alternation of
+location suffixes (Forest|Woods?|Grove|...). Here every pattern declares
+an anchor instead:
+
+- 'suffix': the match contains a location suffix word that follows
+  whitespace, and consists only of ASCII letters and whitespace, so it
+  lies inside one letter/space run holding a suffix. Only those runs are
+  searched.
+- {'keywords': [...]}: the match starts with one of these literal
+  keywords, followed by whitespace ("called", "Chapter", ...).
+
+Both kinds of anchor sit next to a whitespace character, so one trigger
+regex that only stops at whitespace finds them all and each chapter is
+scanned once; the full patterns then only run locally at their anchors.
+Results are the same matches, in the same order, as running
+re.finditer() for each pattern in turn.
+"""
+
+import re
+
+LOCATION_SUFFIXES = [
+    'Forest', 'Woods?', 'Grove', 'Desert', 'Mountain', 'Peak', 'Valley', 'Canyon', 'Cave', 'Cavern',
+    'Labyrinth', 'City', 'Town', 'Village', 'Isle?', 'Sea', 'Ocean', 'Lake', 'River', 'Temple',
+    'Sanctum', 'Library', 'Realm', 'Kingdom', 'Palace', 'Tower', 'Castle', 'Hall', 'Chamber', 'Garden',
+    'Oasis', 'Dune', 'Cliff', 'Ridge', 'Summit', 'Highlands?', 'Lowlands?', 'Plains?', 'Meadow', 'Glade',
+    'Hollow', 'Haven', 'Sanctuary'
+]
+SUFFIX_ALTERNATION = '|'.join(LOCATION_SUFFIXES)
+
+# Pattern order matters: the extractors keep the context of the first match
+# they see for each name, pattern by pattern
+LOCATION_PATTERNS = [
+    # Explicit location indicators
+    {
+        'name': 'preposition',
+        'regex': (r'(?:in|at|to|from|near|through|across|beyond|within)\s+(?:the\s+)?'
+                  r'([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){0,4}(?:\s+(?:' + SUFFIX_ALTERNATION + r'))+)'),
+        'anchor': 'suffix'
+    },
+    # Chapter titles (these are definitely locations)
+    {
+        'name': 'chapter_title',
+        'regex': r'Chapter \d+:\s+(.+)$',
+        'anchor': {'keywords': ['Chapter']}
+    },
+    # Named places in quotes or emphasized
+    {
+        'name': 'quoted_name',
+        'regex': r'(?:called|named|known as)\s+"([A-Z][^"]+)"',
+        'anchor': {'keywords': ['called', 'named', 'known as']}
+    },
+    {
+        'name': 'called_name',
+        'regex': r'(?:called|named|known as)\s+([A-Z][A-Za-z\s]+)',
+        'anchor': {'keywords': ['called', 'named', 'known as']}
+    },
+    # Proper nouns that end with location words
+    {
+        'name': 'proper_noun',
+        'regex': r'\b([A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+){0,3}\s+(?:' + SUFFIX_ALTERNATION + r'))\b',
+        'anchor': 'suffix'
+    }
+]
+
+# Text from a run start back to the last character that cannot be in a run
+_RUN_HEAD = re.compile(r'.*[^A-Za-z\s]', re.DOTALL)
+_RUN_BREAK = re.compile(r'[^A-Za-z\s]')
+
+
+def _prefix_grouped(alternatives):
+    """Group regex alternatives by first character, e.g. G(?:rove|arden).
+
+    re tries alternatives one by one, so sharing the first character
+    keeps the suffix check cheap at every whitespace position.
+    """
+    groups = {}
+    for alternative in alternatives:
+        groups.setdefault(alternative[0], []).append(alternative[1:])
+    return '|'.join(f"{re.escape(first)}(?:{'|'.join(rests)})" for first, rests in groups.items())
+
+
+def compile_scanner(patterns=LOCATION_PATTERNS, suffixes=LOCATION_SUFFIXES, flags=re.MULTILINE):
+    """Compile patterns and their anchors into one reusable scanner dict."""
+    keywords = []
+    compiled = []
+
+    for spec in patterns:
+        anchor = spec['anchor']
+        pattern_keywords = [] if anchor == 'suffix' else anchor['keywords']
+        keywords.extend(keyword for keyword in pattern_keywords if keyword not in keywords)
+
+        compiled.append({
+            'name': spec['name'],
+            'regex': re.compile(spec['regex'], flags),
+            'keywords': pattern_keywords,
+            'in_runs': anchor == 'suffix'
+        })
+
+    suffix_regex = _prefix_grouped(suffixes)
+    trigger = rf'\s(?P<bare_suffix>{suffix_regex})'
+    if keywords:
+        after_keyword = '|'.join(rf'(?<={re.escape(keyword)}\s)' for keyword in keywords)
+        trigger = rf'\s(?:(?P<keyword>{after_keyword})(?P<suffix>{suffix_regex})?|(?P<bare_suffix>{suffix_regex}))'
+
+    return {
+        'trigger': re.compile(trigger, flags),
+        'keywords': keywords,
+        'patterns': compiled
+    }
+
+
+def _run_bounds(text, pos, floor):
+    """Return the letter/whitespace run around pos, not starting before floor.
+
+    The end includes the breaking character (if any) so trailing \\b
+    assertions still see it.
+    """
+    head = _RUN_HEAD.match(text, floor, pos)
+    start = head.end() if head else floor
+
+    stop = _RUN_BREAK.search(text, pos)
+    return start, stop.start() + 1 if stop else len(text)
+
+
+def _find_anchors(scanner, text):
+    """One pass over text: suffix positions and keyword start positions."""
+    suffix_hits = []
+    keyword_hits = {keyword: [] for keyword in scanner['keywords']}
+
+    for trigger in scanner['trigger'].finditer(text):
+        space = trigger.start()
+        groups = trigger.groupdict()
+
+        if groups.get('keyword') is not None:
+            for keyword in scanner['keywords']:
+                if text.startswith(keyword, space - len(keyword)):
+                    keyword_hits[keyword].append(space - len(keyword))
+
+        if groups.get('suffix') is not None or groups['bare_suffix'] is not None:
+            suffix_hits.append(space + 1)
+
+    return suffix_hits, keyword_hits
+
+
+def scan(scanner, text):
+    """Return [(pattern name, match)] for every pattern, in pattern order.
+
+    One trigger pass collects the anchors; each pattern is then matched
+    only at its anchors (or inside its suffix runs) with the same
+    non-overlapping semantics as re.finditer().
+    """
+    suffix_hits, keyword_hits = _find_anchors(scanner, text)
+
+    results = []
+    for pattern in scanner['patterns']:
+        regex = pattern['regex']
+        last_end = 0
+
+        if pattern['in_runs']:
+            for pos in suffix_hits:
+                if pos < last_end:
+                    continue
+                run_start, run_end = _run_bounds(text, pos, last_end)
+                for match in regex.finditer(text, run_start, run_end):
+                    results.append((pattern['name'], match))
+                last_end = run_end
+        else:
+            positions = sorted(pos for keyword in pattern['keywords'] for pos in keyword_hits[keyword])
+            for pos in positions:
+                if pos < last_end:
+                    continue
+                match = regex.match(text, pos)
+                if match:
+                    results.append((pattern['name'], match))
+                    last_end = max(match.end(), pos + 1)
+
+    return results
@@ -0,0 +1,217 @@
+"""
+Gazetteer matching of known location names
+
+Once the canonical locations are in the CSVs, they do not need to be
+rediscovered with heuristic regexes: the names and their aliases go into
+a word-level Aho-Corasick automaton, and one linear pass over a
+chapter's words reports every mention with its character offsets.
+Matching works on whole words (so "Sea" never fires inside "Seattle")
+and is case-sensitive, like the proper nouns it looks for. Overlapping
+hits resolve leftmost-longest, so "The Whispering Woods" wins over
+"Whispering Woods" at the same spot.
+"""
+
+import csv
+import re
+from collections import deque
+from itertools import compress
+
+# Words are runs of ASCII letters and digits; anything else splits them,
+# the same way in names and in text
+WORD = re.compile(r'[A-Za-z0-9]+')
+
+# CSV file name -> column holding the location name
+KNOWN_NAME_COLUMNS = {
+    'all_locations_comprehensive.csv': 'name',
+    'adventure_realm_locations.csv': 'Location Name'
+}
+
+CONTEXT_BEFORE = 100
+CONTEXT_AFTER = 200
+
+
+def name_aliases(name):
+    """Return the word sequences that count as a mention of name.
+
+    Besides the name itself, "The X" is also found as "the X" and "X".
+    """
+    words = tuple(WORD.findall(name))
+    aliases = [words]
+    if len(words) > 1 and words[0] == 'The':
+        aliases.append(('the',) + words[1:])
+        aliases.append(words[1:])
+    return aliases
+
+
+def load_known_names(csv_paths):
+    """Read the location names from the given CSVs, first-seen order, no duplicates."""
+    names = []
+    for path in csv_paths:
+        column = KNOWN_NAME_COLUMNS[path.replace('\\', '/').rsplit('/', 1)[-1]]
+        with open(path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                name = row[column].strip()
+                if name and name not in names:
+                    names.append(name)
+    return names
+
+
+def build_automaton(keys):
+    """Build a word-level Aho-Corasick automaton over word-tuple keys.
+
+    Returns a dict with the goto tables, failure links and per-state
+    outputs as (key index, key length) lists.
+    """
+    goto = [{}]
+    fail = [0]
+    out = [[]]
+
+    for key_id, key in enumerate(keys):
+        state = 0
+        for word in key:
+            if word not in goto[state]:
+                goto.append({})
+                fail.append(0)
+                out.append([])
+                goto[state][word] = len(goto) - 1
+            state = goto[state][word]
+        out[state].append((key_id, len(key)))
+
+    # Breadth-first so every failure link points at a finished, shallower
+    # state; depth-1 states fail back to the root
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for word, child in goto[state].items():
+            queue.append(child)
+            fallback = fail[state]
+            while fallback and word not in goto[fallback]:
+                fallback = fail[fallback]
+            fail[child] = goto[fallback].get(word, 0)
+            out[child] = out[child] + out[fail[child]]
+
+    return {
+        'goto': goto,
+        'fail': fail,
+        'out': out,
+        'vocabulary': frozenset(word for table in goto for word in table)
+    }
+
+
+def build_gazetteer(names):
+    """Compile known names (and their aliases) into a gazetteer dict.
+
+    A word sequence that is some location's exact name always maps to
+    that location; other aliases map to the first name that claims them.
+    """
+    key_names = {}
+    for name in names:
+        key_names[name_aliases(name)[0]] = name
+    for name in names:
+        for alias in name_aliases(name)[1:]:
+            key_names.setdefault(alias, name)
+
+    keys = list(key_names)
+    return {
+        'names': list(names),
+        'keys': keys,
+        'key_names': [key_names[key] for key in keys],
+        'automaton': build_automaton(keys)
+    }
+
+
+def find_mentions(gazetteer, text):
+    """Return every mention in text as {'name', 'alias', 'start', 'end'}.
+
+    One pass over the words; a word that occurs in no name resets the
+    automaton to its root without touching the tables.
+    """
+    automaton = gazetteer['automaton']
+    goto, fail, out = automaton['goto'], automaton['fail'], automaton['out']
+    vocabulary = automaton['vocabulary']
+
+    words = WORD.findall(text)
+    hits = []
+    state = 0
+    previous = -2
+
+    # Only words that occur in some name can move the automaton; finding
+    # them with compress/map keeps the per-word filter out of Python code
+    for index in compress(range(len(words)), map(vocabulary.__contains__, words)):
+        if index != previous + 1:
+            state = 0
+        previous = index
+        word = words[index]
+
+        while state and word not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(word, 0)
+
+        for key_id, length in out[state]:
+            hits.append((index - length + 1, -length, key_id))
+
+    if not hits:
+        return []
+
+    # Leftmost-longest, non-overlapping
+    chosen = []
+    next_free = 0
+    for first, negative_length, key_id in sorted(hits):
+        if first >= next_free:
+            next_free = first - negative_length
+            chosen.append((first, next_free - 1, key_id))
+
+    # Character offsets are only needed for the chosen words
+    wanted = [False] * len(words)
+    for first, last, _ in chosen:
+        wanted[first] = wanted[last] = True
+    spans = dict(zip(compress(range(len(words)), wanted),
+                     (match.span() for match in compress(WORD.finditer(text), wanted))))
+
+    mentions = []
+    for first, last, key_id in chosen:
+        start, end = spans[first][0], spans[last][1]
+        mentions.append({
+            'name': gazetteer['key_names'][key_id],
+            'alias': text[start:end],
+            'start': start,
+            'end': end
+        })
+
+    return mentions
+
+
+def mention_context(text, start):
+    """The ~300 characters around a mention, on one line."""
+    context = text[max(0, start - CONTEXT_BEFORE):start + CONTEXT_AFTER]
+    return context.replace('\n', ' ').strip()
+
+
+def chapter_mentions(chapter_num, path, text, gazetteer):
+    """Find every mention in one chapter, with 'chapter', 'file' and 'context' added.
+
+    The argument order matches realm.chapters.ingest_chapters(), so
+    chapters can be matched in a process pool.
+    """
+    mentions = find_mentions(gazetteer, text)
+    for mention in mentions:
+        mention['chapter'] = chapter_num
+        mention['file'] = path.replace('\\', '/').rsplit('/', 1)[-1]
+        mention['context'] = mention_context(text, mention['start'])
+    return mentions
+
+
+def locate_mentions(gazetteer, chapters):
+    """Find every mention in (chapter number, path, text) chapters, in chapter-file order."""
+    mentions = []
+    for chapter_num, path, text in chapters:
+        mentions.extend(chapter_mentions(chapter_num, path, text, gazetteer))
+    return mentions
+
+
+def chapters_by_name(mentions):
+    """Return {name: sorted chapter numbers} from located mentions."""
+    chapters = {}
+    for mention in mentions:
+        chapters.setdefault(mention['name'], set()).add(mention['chapter'])
+    return {name: sorted(found) for name, found in chapters.items()}
@@ -0,0 +1,110 @@
+"""
+Hit-testing index for world map markers
+
+The world map generators know where every marker goes; this keeps that
+around for the site. Marker bounding boxes are bucketed into a uniform
+grid of cell_size pixel cells (a box goes into every cell it overlaps)
+and stored CSR-style: cell c holds items[offsets[c]:offsets[c + 1]].
+Finding what is under the pointer is one cell lookup plus a box check
+for the few markers in that cell, instead of a scan over every location.
+
+The index is written next to the map as <map name>.hits.json, with the
+marker names and boxes as flat integer arrays.
+"""
+
+import json
+import os
+
+import numpy as np
+
+HIT_INDEX_VERSION = 1
+DEFAULT_CELL_SIZE = 64
+
+
+def hit_index_path(map_path):
+    """Return the sidecar path for a map, e.g. world-map.png -> world-map.hits.json."""
+    return os.path.splitext(map_path)[0] + '.hits.json'
+
+
+def marker_boxes(markers):
+    """Split (name, x, y, radius) markers into names and an (n, 4) x0, y0, x1, y1 box array."""
+    names = [name for name, _, _, _ in markers]
+    centers = np.array([(x, y) for _, x, y, _ in markers], dtype=np.int64).reshape(-1, 2)
+    radii = np.array([radius for _, _, _, radius in markers], dtype=np.int64)[:, None]
+    return names, np.concatenate([centers - radii, centers + radii], axis=1)
+
+
+def build_hit_grid(boxes, size, cell_size=DEFAULT_CELL_SIZE):
+    """Bucket boxes (inclusive pixel bounds) into a grid covering size.
+
+    Items keep box order inside every cell, so the last one is the marker
+    drawn on top.
+    """
+    columns = -(-size[0] // cell_size)
+    rows = -(-size[1] // cell_size)
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+
+    x0 = np.clip(boxes[:, 0] // cell_size, 0, columns - 1)
+    y0 = np.clip(boxes[:, 1] // cell_size, 0, rows - 1)
+    x1 = np.clip(boxes[:, 2] // cell_size, 0, columns - 1)
+    y1 = np.clip(boxes[:, 3] // cell_size, 0, rows - 1)
+    spans = x1 - x0 + 1
+    counts = spans * (y1 - y0 + 1)
+
+    # One (cell, box) entry per overlapped cell, walked row by row per box
+    item = np.repeat(np.arange(len(boxes)), counts)
+    step = np.arange(len(item)) - np.repeat(np.cumsum(counts) - counts, counts)
+    cell = (y0[item] + step // spans[item]) * columns + x0[item] + step % spans[item]
+
+    order = np.argsort(cell, kind='stable')
+    offsets = np.zeros(columns * rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(cell, minlength=columns * rows), out=offsets[1:])
+
+    return {
+        'cell_size': cell_size,
+        'columns': columns,
+        'rows': rows,
+        'offsets': offsets,
+        'items': item[order]
+    }
+
+
+def hit_test(grid, boxes, x, y):
+    """Return the indices of the boxes containing pixel (x, y), topmost first."""
+    column = x // grid['cell_size']
+    row = y // grid['cell_size']
+    if not (0 <= column < grid['columns'] and 0 <= row < grid['rows']):
+        return []
+
+    cell = row * grid['columns'] + column
+    hits = []
+    for index in grid['items'][grid['offsets'][cell]:grid['offsets'][cell + 1]].tolist():
+        x0, y0, x1, y1 = boxes[index]
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            hits.append(index)
+    return hits[::-1]
+
+
+def write_hit_index(path, markers, size, cell_size=DEFAULT_CELL_SIZE):
+    """Build the grid for (name, x, y, radius) markers and write it to path, atomically."""
+    names, boxes = marker_boxes(markers)
+    grid = build_hit_grid(boxes, size, cell_size)
+
+    data = {
+        'version': HIT_INDEX_VERSION,
+        'size': list(size),
+        'cellSize': grid['cell_size'],
+        'columns': grid['columns'],
+        'rows': grid['rows'],
+        'names': names,
+        'boxes': boxes.ravel().tolist(),
+        'offsets': grid['offsets'].tolist(),
+        'items': grid['items'].tolist()
+    }
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp_path, path)
+    return grid
@@ -0,0 +1,135 @@
+"""
+Journey graph for the world maps
+
+Locations sit on a spiral in first-chapter order and every chapter of the
+book has its own point on a second spiral; a location seen in several
+chapters is joined to each of those chapter points. Rather than working
+out a cos/sin position for every chapter of every location while
+drawing, all positions are computed once into arrays, the
+(chapter, location) edges come straight from the chapter lists with
+duplicates dropped, and the drawing side gets them back as one array of
+segments. The same graph is written as JSON for the interactive maps
+page.
+"""
+
+import json
+import os
+
+import numpy as np
+
+from realm.layout import layout_graph
+
+BOOK_CHAPTERS = 69
+
+
+def spiral_positions(steps, total, center, rotations, inner, extent):
+    """Pixel positions of steps along a spiral of total steps, as an (n, 2) int array.
+
+    Step i sits at angle (i / total) * 6.28 * rotations and radius
+    inner + (i / total) * extent around center; coordinates are
+    truncated like int().
+    """
+    t = np.asarray(steps, dtype=np.float64) / total
+    angle = t * 6.28 * rotations
+    radius = inner + t * extent
+    x = center[0] + radius * np.cos(angle)
+    y = center[1] + radius * np.sin(angle)
+    return np.stack([x, y], axis=1).astype(np.int64)
+
+
+def build_journey_graph(chapter_lists, appearances, spiral, chapter_count=BOOK_CHAPTERS):
+    """Lay out locations and chapters and collect the journey edges.
+
+    chapter_lists and appearances are per location, in placement order;
+    spiral holds the center, rotations, inner and extent arguments of
+    spiral_positions(). Only locations with more than one appearance get
+    edges, and only to chapters whose spiral step is also a location
+    slot. Returns a dict of position arrays, the (chapter index,
+    location index) edges in first-seen order and the chapter count.
+    """
+    count = len(chapter_lists)
+    lengths = np.fromiter(map(len, chapter_lists), dtype=np.int64, count=count)
+    location_idx = np.repeat(np.arange(count), lengths)
+    chapter_idx = np.fromiter((c for chapters in chapter_lists for c in chapters),
+                              dtype=np.int64, count=int(lengths.sum())) - 1
+
+    recurring = np.asarray(appearances, dtype=np.int64) > 1
+    keep = recurring[location_idx] & (chapter_idx >= 0) & (chapter_idx < count)
+    location_idx, chapter_idx = location_idx[keep], chapter_idx[keep]
+
+    # One edge per (chapter, location) pair, in the order they were listed
+    _, first = np.unique(chapter_idx * count + location_idx, return_index=True)
+    first.sort()
+    edges = np.stack([chapter_idx[first], location_idx[first]], axis=1)
+
+    # Chapters past the book's last one keep stepping along the same spiral
+    chapter_steps = max(chapter_count, int(chapter_idx.max()) + 1 if len(chapter_idx) else 0)
+    return {
+        'locations': spiral_positions(np.arange(count), count, **spiral),
+        'chapters': spiral_positions(np.arange(chapter_steps), chapter_count, **spiral),
+        'edges': edges,
+        'chapter_count': chapter_count
+    }
+
+
+def layout_journey_graph(graph, chapter_lists, names, connections, size, min_distance, cache_path=None):
+    """Replace the spiral positions in graph with an overlap-free layout.
+
+    Chapters and locations are laid out together: consecutive chapters,
+    every chapter a location appears in and the (name, name)
+    connections are the edges, and the spiral positions are the start.
+    The edges drawn on the map stay those of the graph.
+    """
+    count = len(names)
+    chapter_steps = len(graph['chapters'])
+    node_ids = list(names) + [f'chapter:{number}' for number in range(1, chapter_steps + 1)]
+    index = {name: i for i, name in enumerate(names)}
+
+    edges = [(count + step, count + step + 1) for step in range(chapter_steps - 1)]
+    edges += [(count + chapter - 1, i) for i, chapters in enumerate(chapter_lists)
+              for chapter in chapters if 0 < chapter <= chapter_steps]
+    edges += [(index[a], index[b]) for a, b in connections if a in index and b in index]
+
+    positions = layout_graph(node_ids, edges, np.concatenate([graph['locations'], graph['chapters']]),
+                             size, min_distance, cache_path)
+    return dict(graph, locations=positions[:count], chapters=positions[count:])
+
+
+def journey_segments(graph):
+    """Chapter-to-location lines as an (m, 2, 2) array of pixel endpoints."""
+    edges = graph['edges']
+    return np.stack([graph['chapters'][edges[:, 0]], graph['locations'][edges[:, 1]]], axis=1)
+
+
+def chapter_path_segments(graph):
+    """The chapter-to-chapter path through the whole book as an (n, 2, 2) array."""
+    path = graph['chapters'][:graph['chapter_count']]
+    return np.stack([path[:-1], path[1:]], axis=1)
+
+
+def write_journey_json(path, graph, locations, size):
+    """Write the graph for the maps page, atomically.
+
+    locations are the row dicts in placement order; chapter numbers in
+    the edges are 1-based, locations are indices into 'locations'.
+    """
+    positions = graph['locations'].tolist()
+    data = {
+        'size': list(size),
+        'chapters': graph['chapters'][:graph['chapter_count']].tolist(),
+        'locations': [{
+            'name': loc['name'],
+            'x': x,
+            'y': y,
+            'first_chapter': loc['first_chapter'],
+            'appearances': loc['appearances'],
+            'terrain': loc['terrain']
+        } for loc, (x, y) in zip(locations, positions)],
+        'edges': (graph['edges'] + [1, 0]).tolist()
+    }
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp_path, path)
@@ -0,0 +1,170 @@
+"""
+Layered multi-terrain maps across several Wang tilesets
+
+A single tileset only knows two terrains, so a one-tileset map can show
+grass and forest but never the sea next to them. Here a map is a vertex
+grid of terrain levels 0..N-1 over a palette of N terrain classes (e.g.
+ocean, beach, grass, forest), and every neighbouring pair of classes in
+the palette is one transition:
+
+- a tileset that has the pair as its lower and upper terrain is used
+  as is (or with its corners flipped when the palette runs the other way)
+- a pair no tileset covers is synthesised by alpha blending the two
+  classes' solid tiles through a smoothed corner mask
+
+The transitions are stacked into one (16 * (N - 1)) tile atlas. Levels
+are first evened out so no cell spans more than two neighbouring levels
+(a higher level gets a ring of the level below it), which makes every
+cell exactly one tile of one transition: cell index = 16 * lower level +
+Wang index of its upper corners. The map is then a single gather from
+the stacked atlas, as in realm.wang, instead of one full-image paste per
+layer; memory and time grow with the number of transitions, not with
+their combinations.
+"""
+
+import numpy as np
+
+from realm.classify import palette_for_terrain, tileset_for_terrain
+from realm.seeding import mt19937_rng, numpy_rng
+from realm.terrain import center_falloff
+from realm.wang import composite_tiles, tileset_atlas
+
+# Tileset key -> its (lower, upper) terrain classes
+TILESET_CLASSES = {
+    'grass': ('grass', 'forest'),
+    'desert': ('sand', 'rock'),
+    'ocean': ('ocean', 'beach'),
+    'dungeon': ('floor', 'wall'),
+    'city': ('street', 'building'),
+    'cosmic': ('void', 'nebula')
+}
+
+# Terrain class -> (tileset key, Wang index of its solid tile)
+TERRAIN_CLASSES = {
+    terrain: (key, 15 * side)
+    for key, pair in TILESET_CLASSES.items()
+    for side, terrain in enumerate(pair)
+}
+
+
+def terrain_palette(terrain):
+    """Return the terrain classes, lowest level first, a terrain's layered maps use.
+
+    Terrains without their own palette get the two classes of the
+    tileset their single-tileset maps are drawn with.
+    """
+    return palette_for_terrain(terrain) or TILESET_CLASSES[tileset_for_terrain(terrain)]
+
+
+def palette_tilesets(palette):
+    """Return the tileset keys a palette's atlas is built from, in palette order."""
+    keys = []
+    for terrain in palette:
+        key = TERRAIN_CLASSES[terrain][0]
+        if key not in keys:
+            keys.append(key)
+    return keys
+
+
+def corner_alpha(tile_size):
+    """(16, tile, tile) upper-terrain coverage of every Wang index.
+
+    Corners are interpolated bilinearly across the tile and smoothstepped,
+    so blended transitions fade in over the middle of the tile.
+    """
+    u = (np.arange(tile_size) + 0.5) / tile_size
+    wang = np.arange(16)
+    nw, ne, sw, se = [((wang >> bit) & 1).astype(np.float64)[:, None] for bit in (3, 2, 1, 0)]
+
+    top = nw * (1 - u) + ne * u
+    bottom = sw * (1 - u) + se * u
+    alpha = top[:, None, :] * (1 - u)[None, :, None] + bottom[:, None, :] * u[None, :, None]
+    return alpha * alpha * (3 - 2 * alpha)
+
+
+def blend_transition(lower_tile, upper_tile):
+    """Synthesise a 16-tile transition atlas by alpha blending two solid tiles."""
+    alpha = corner_alpha(lower_tile.shape[0])[..., None]
+    blended = lower_tile * (1 - alpha) + upper_tile * alpha
+    return np.round(blended).astype(np.uint8)
+
+
+def transition_atlas(lower, upper, tilesets):
+    """Return the (16, tile, tile, 4) atlas for the lower -> upper class transition."""
+    for key, pair in TILESET_CLASSES.items():
+        if key not in tilesets:
+            continue
+        if pair == (lower, upper):
+            return tileset_atlas(tilesets[key])
+        if pair == (upper, lower):
+            # Flipping every corner swaps which terrain counts as upper
+            return tileset_atlas(tilesets[key])[15 - np.arange(16)]
+
+    lower_key, lower_idx = TERRAIN_CLASSES[lower]
+    upper_key, upper_idx = TERRAIN_CLASSES[upper]
+    return blend_transition(tileset_atlas(tilesets[lower_key])[lower_idx],
+                            tileset_atlas(tilesets[upper_key])[upper_idx])
+
+
+def layered_atlas(palette, tilesets):
+    """Stack the transitions of a palette into one (16 * (N - 1), tile, tile, 4) atlas."""
+    if len(palette) < 2:
+        raise ValueError(f'a layered palette needs at least two terrain classes, got {list(palette)}')
+    return np.concatenate([transition_atlas(lower, upper, tilesets)
+                           for lower, upper in zip(palette[:-1], palette[1:])])
+
+
+def even_levels(levels):
+    """Raise vertices until no two 8-neighbours are more than one level apart.
+
+    Every pass lifts each vertex to one below its highest neighbour, so a
+    high level grows rings of the levels beneath it; it takes at most
+    N - 2 passes that change anything.
+    """
+    levels = np.asarray(levels, dtype=np.int16)
+    while True:
+        padded = np.pad(levels, 1, mode='edge')
+        height, width = levels.shape
+        rows = np.maximum.reduce([padded[dy:dy + height, :] for dy in range(3)])
+        highest = np.maximum.reduce([rows[:, dx:dx + width] for dx in range(3)])
+        raised = np.maximum(levels, highest - 1)
+        if np.array_equal(raised, levels):
+            return levels
+        levels = raised
+
+
+def layered_index_grid(levels, count):
+    """Return the (height, width) index into a count-class layered atlas for every cell."""
+    levels = even_levels(levels)
+    nw = levels[:-1, :-1]
+    ne = levels[:-1, 1:]
+    sw = levels[1:, :-1]
+    se = levels[1:, 1:]
+
+    # A cell shows the transition from its lowest corner's level upwards;
+    # cells entirely on the top level use the last transition's full tile
+    lower = np.minimum(np.minimum(nw, ne), np.minimum(sw, se)).clip(0, count - 2)
+    wang = ((nw > lower) << 3) | ((ne > lower) << 2) | ((sw > lower) << 1) | (se > lower)
+    return (lower * 16 + wang).astype(np.intp)
+
+
+def create_layered_layout(width, height, seed, count, density=0.4, compat=False):
+    """Create a (height+1) x (width+1) grid of levels 0..count-1.
+
+    Vertex v reaches level k when its draw is below p ** k, p being the
+    centre falloff of create_terrain_layout(), so level 1 is exactly that
+    function's upper terrain for the same seed and the higher levels
+    gather towards the middle.
+    """
+    rng = mt19937_rng(seed) if compat else numpy_rng(seed)
+    prob = center_falloff(width, height, density)
+
+    draws = rng.random(prob.shape)
+    powers = prob[None] ** np.arange(1, count)[:, None, None]
+    return (draws[None] < powers).sum(axis=0).astype(np.uint8)
+
+
+def render_layered_map(palette, tilesets, levels):
+    """Render a level grid over palette's terrain classes as one RGBA image."""
+    atlas = layered_atlas(palette, tilesets)
+    return composite_tiles(atlas, layered_index_grid(levels, len(palette)))
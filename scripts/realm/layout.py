@@ -0,0 +1,320 @@
+"""
+Overlap-free placement of world map locations
+
+The world maps used to put locations on a fixed spiral, which packs the
+first locations into the middle until their markers pile up. Here the
+locations (and the chapters they hang off) are a graph: chapter order,
+chapter-to-location appearances and the "Connected To" column of
+adventure_realm_locations.csv (whose names are matched to the location
+store's by match_connections()). A force-directed pass relaxes that graph,
+with edges as springs and nearby nodes pushing each other apart; close
+pairs are found through a uniform grid (spatial hash) of cells one
+repulsion radius wide, so each step costs about O(nodes + edges) instead
+of O(nodes²). A final pass snaps every node to its own cell of a
+min_distance lattice, nearest free cell first, which guarantees no two
+nodes end up closer than min_distance.
+
+Everything is seeded and order-stable, so the same graph always gives
+the same layout. Positions are cached by node id; when nodes are added
+the cached ones stay where they were and only the new ones are placed.
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from realm.manifest import content_hash
+from realm.tilesets import PROJECT_ROOT
+
+LAYOUT_VERSION = 1
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache/layout')
+
+LAYOUT_ITERATIONS = 300
+INCREMENTAL_ITERATIONS = 100
+
+# Force strengths. Repulsion reaches one spacing and springs rest at one
+# spacing, where spacing is SPREAD * sqrt(area / nodes) (at least twice
+# min_distance), so the graph spreads over the map whatever its size
+REPULSION = 0.5
+SPRING = 0.05
+GRAVITY = 0.0005
+SPREAD = 0.8
+
+# "Connected To" names the location store spells differently (beyond
+# letter case and a leading "The"), and short forms of the CSV's own
+# names that would otherwise match the wrong location
+CONNECTION_ALIASES = {
+    'Groove Glades': 'Groove Glade',
+    'Lushwood': 'The Verdant Sanctum of Lushwood',
+    'Valley': 'Barren Valley'
+}
+
+
+def load_connections(csv_path):
+    """Return the (name, name) pairs of the "Connected To" column, each pair once."""
+    pairs = []
+    seen = set()
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            name = row['Location Name'].strip()
+            for other in row['Connected To'].split(';'):
+                other = other.strip()
+                key = tuple(sorted((name, other)))
+                if other and other != name and key not in seen:
+                    seen.add(key)
+                    pairs.append((name, other))
+    return pairs
+
+
+def _name_key(name):
+    key = ' '.join(name.casefold().split())
+    return key[4:] if key.startswith('the ') else key
+
+
+def match_connections(connections, names):
+    """Map (name, name) connections onto location names.
+
+    Returns (pairs of names, sorted connection names with no location).
+    A name matches exactly, else after CONNECTION_ALIASES, ignoring
+    letter case and a leading "The".
+    """
+    exact = set(names)
+    by_key = {}
+    for name in names:
+        by_key.setdefault(_name_key(name), name)
+
+    def resolve(name):
+        if name in exact:
+            return name
+        return by_key.get(_name_key(CONNECTION_ALIASES.get(name, name)))
+
+    pairs = []
+    seen = set()
+    unmatched = set()
+    for a, b in connections:
+        first, second = resolve(a), resolve(b)
+        unmatched.update(name for name, match in ((a, first), (b, second)) if match is None)
+        key = tuple(sorted((first or '', second or '')))
+        if first and second and first != second and key not in seen:
+            seen.add(key)
+            pairs.append((first, second))
+    return pairs, sorted(unmatched)
+
+
+def neighbour_pairs(points, radius):
+    """Return index arrays (i, j), i < j, of every pair closer than radius.
+
+    Points are bucketed into radius-sized grid cells; only the 3x3 cells
+    around each point are compared.
+    """
+    count = len(points)
+    if count < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    cells = np.floor(points / radius).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # One spare column and row on every side keeps neighbour keys unique
+    width = int(cells[:, 0].max()) + 3
+    keys = (cells[:, 1] + 1) * width + cells[:, 0] + 1
+    order = np.argsort(keys, kind='stable')
+
+    # Points of cell k are order[cell_start[k]:cell_start[k] + cell_count[k]]
+    cell_count = np.bincount(keys, minlength=(int(cells[:, 1].max()) + 3) * width)
+    cell_start = np.cumsum(cell_count) - cell_count
+
+    firsts = []
+    seconds = []
+    for dy in (-1, 0, 1):
+        for dx in (-1, 0, 1):
+            target = keys + dy * width + dx
+            low = cell_start[target]
+            counts = cell_count[target]
+            first = np.repeat(np.arange(count), counts)
+            # Position of each candidate within its run of sorted_keys
+            run_start = np.repeat(low - np.cumsum(counts) + counts, counts)
+            second = order[run_start + np.arange(len(first))]
+            keep = first < second
+            firsts.append(first[keep])
+            seconds.append(second[keep])
+
+    first = np.concatenate(firsts)
+    second = np.concatenate(seconds)
+    delta = points[second] - points[first]
+    close = (delta ** 2).sum(axis=1) < radius * radius
+    return first[close], second[close]
+
+
+def _scatter(indices, vectors, count):
+    """Sum (k, 2) vectors into count rows by index."""
+    return np.stack([np.bincount(indices, vectors[:, 0], count),
+                     np.bincount(indices, vectors[:, 1], count)], axis=1)
+
+
+def force_layout(initial, edges, size, min_distance, mobile=None,
+                 iterations=LAYOUT_ITERATIONS, seed=0):
+    """Relax node positions under spring and repulsion forces.
+
+    initial is an (n, 2) float array, edges an (m, 2) index array and
+    size the (width, height) box nodes stay in. Nodes with mobile False
+    keep their initial position. Returns the new (n, 2) float positions.
+    """
+    rng = np.random.default_rng(seed)
+    points = np.array(initial, dtype=np.float64)
+    count = len(points)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    mobility = np.ones(count) if mobile is None else np.asarray(mobile, dtype=np.float64)
+
+    # Coincident nodes would have no direction to separate in
+    points += rng.uniform(-0.5, 0.5, points.shape) * mobility[:, None]
+
+    spacing = max(2.0 * min_distance, SPREAD * np.sqrt(size[0] * size[1] / max(count, 1)))
+    center = np.array(size, dtype=np.float64) / 2
+    low = np.full(2, min_distance / 2)
+    high = np.array(size, dtype=np.float64) - min_distance / 2
+
+    for step in range(iterations):
+        force = np.zeros_like(points)
+
+        # Repulsion between close pairs, strongest when they touch
+        first, second = neighbour_pairs(points, spacing)
+        delta = points[second] - points[first]
+        distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-6)
+        push = (REPULSION * (spacing - distance) / distance)[:, None] * delta
+        force += _scatter(second, push, count) - _scatter(first, push, count)
+
+        # Springs along the edges
+        if len(edges):
+            delta = points[edges[:, 1]] - points[edges[:, 0]]
+            distance = np.maximum(np.sqrt((delta ** 2).sum(axis=1)), 1e-6)
+            pull = (SPRING * (distance - spacing) / distance)[:, None] * delta
+            force += _scatter(edges[:, 0], pull, count) - _scatter(edges[:, 1], pull, count)
+
+        # A little gravity keeps disconnected nodes from drifting to the border
+        force += GRAVITY * (center - points)
+
+        # Cool down linearly: moves are capped at a shrinking step length
+        limit = spacing * (1.0 - step / iterations) + 0.5
+        length = np.sqrt((force ** 2).sum(axis=1))
+        scale = np.minimum(1.0, limit / np.maximum(length, 1e-9)) * mobility
+        points = np.clip(points + force * scale[:, None], low, high)
+
+    return points
+
+
+def snap_to_grid(points, size, min_distance, order=None):
+    """Move every point to its own cell of a min_distance lattice.
+
+    Points are placed in order (default: index order); each takes the
+    free lattice cell nearest to it, so earlier points win contested
+    cells. Returns an (n, 2) int array of cell centres.
+    """
+    columns = max(1, int(size[0] // min_distance))
+    rows = max(1, int(size[1] // min_distance))
+    if len(points) > columns * rows:
+        raise ValueError(f'{len(points)} nodes do not fit a {columns}x{rows} lattice; '
+                         f'lower min_distance or enlarge the map')
+
+    occupied = np.zeros((rows, columns), dtype=bool)
+    snapped = np.zeros((len(points), 2), dtype=np.int64)
+    order = range(len(points)) if order is None else order
+
+    for index in order:
+        fx = points[index][0] / min_distance - 0.5
+        fy = points[index][1] / min_distance - 0.5
+        cx = min(max(int(round(fx)), 0), columns - 1)
+        cy = min(max(int(round(fy)), 0), rows - 1)
+
+        # Grow the search square until it holds a free cell, then take the
+        # nearest one (ties by row, then column)
+        ring = 0
+        while True:
+            y0, y1 = max(cy - ring, 0), min(cy + ring, rows - 1)
+            x0, x1 = max(cx - ring, 0), min(cx + ring, columns - 1)
+            free_y, free_x = np.nonzero(~occupied[y0:y1 + 1, x0:x1 + 1])
+            if len(free_y):
+                break
+            ring += 1
+
+        distance = (free_x + x0 - fx) ** 2 + (free_y + y0 - fy) ** 2
+        best = int(np.argmin(distance))
+        x, y = int(free_x[best]) + x0, int(free_y[best]) + y0
+        occupied[y, x] = True
+        snapped[index] = (int((x + 0.5) * min_distance), int((y + 0.5) * min_distance))
+
+    return snapped
+
+
+def _read_layout_cache(cache_path, params):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get('version') != LAYOUT_VERSION or cached.get('params') != params:
+        return None
+    return cached
+
+
+def _write_layout_cache(cache_path, cached):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(cached, f, sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def layout_graph(node_ids, edges, initial, size, min_distance, cache_path=None, seed=0):
+    """Place a graph's nodes without overlaps; returns an (n, 2) int array.
+
+    node_ids are unique strings, edges (i, j) index pairs and initial the
+    (n, 2) starting positions. With cache_path, a layout of the same
+    nodes and edges is reused as is; if nodes were added, the cached
+    ones stay put and only the new ones are relaxed and snapped in.
+    """
+    count = len(node_ids)
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    params = content_hash({'size': list(size), 'min_distance': min_distance, 'seed': seed,
+                           'iterations': LAYOUT_ITERATIONS})
+    graph = content_hash({'nodes': list(node_ids), 'edges': edges.tolist()})
+
+    cached = _read_layout_cache(cache_path, params) if cache_path else None
+    if cached and cached['graph'] == graph:
+        return np.array([cached['positions'][node] for node in node_ids], dtype=np.int64)
+
+    known = cached['positions'] if cached else {}
+    pinned = np.array([node in known for node in node_ids], dtype=bool)
+    points = np.array(initial, dtype=np.float64).reshape(-1, 2)
+
+    if pinned.all():
+        # Same nodes, new edges: keep everyone where they were
+        positions = np.array([known[node] for node in node_ids], dtype=np.int64)
+    else:
+        if pinned.any():
+            points[pinned] = [known[node] for node in np.asarray(node_ids, dtype=object)[pinned]]
+            # New nodes start next to the placed nodes they are linked to
+            for index in np.flatnonzero(~pinned).tolist():
+                linked = np.concatenate([edges[edges[:, 0] == index, 1], edges[edges[:, 1] == index, 0]])
+                linked = linked[pinned[linked]]
+                if len(linked):
+                    points[index] = points[linked].mean(axis=0)
+            iterations = INCREMENTAL_ITERATIONS
+        else:
+            iterations = LAYOUT_ITERATIONS
+
+        points = force_layout(points, edges, size, min_distance, mobile=~pinned,
+                              iterations=iterations, seed=seed)
+        # Cached nodes already own their cells, so they are placed first
+        order = np.flatnonzero(pinned).tolist() + np.flatnonzero(~pinned).tolist()
+        positions = snap_to_grid(points, size, min_distance, order)
+
+    if cache_path:
+        _write_layout_cache(cache_path, {
+            'version': LAYOUT_VERSION,
+            'params': params,
+            'graph': graph,
+            'positions': {node: [int(x), int(y)] for node, (x, y) in zip(node_ids, positions.tolist())}
+        })
+    return positions
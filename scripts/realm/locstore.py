@@ -0,0 +1,261 @@
+"""
+Columnar location store built once from the location CSVs
+
+The generators used to re-read a location CSV with csv.DictReader, turn
+first_chapter/appearances into ints row by row and split the chapters
+string again wherever they needed it, and the site parsed the same CSVs
+at request time. Instead each CSV is compiled into:
+
+- a binary .locs file under .cache/locations/ for Python: one JSON
+  header line (store version, the CSV's mtime/size/SHA-256, terrain
+  names and the column layout) followed by 8-byte aligned columns.
+  Numbers are typed arrays, terrain is a code into the header's names,
+  strings are UTF-8 blobs with offsets, chapter lists are CSR
+  (offsets + values), and the first-chapter, name and appearance orders
+  are precomputed. Loading memory-maps the file and slices the columns
+  out of it; nothing is parsed per row.
+- a columnar JSON next to the CSV for the site (data/<csv name>.json),
+  with chapter lists as int arrays, the map file each generator writes
+  for a location and the same sort orders. It records the CSV's SHA-256,
+  so the site build (scripts/check-location-store.ts) can refuse a JSON
+  that no longer matches its CSV.
+
+load_location_store() recompiles the binary whenever the CSV changed,
+the same way the tileset cache is kept fresh.
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from realm.tilesets import PROJECT_ROOT, file_sha256
+
+STORE_VERSION = 1
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache/locations')
+DATA_DIR = os.path.join(PROJECT_ROOT, 'data')
+
+STRING_COLUMNS = ['name', 'description']
+ORDERS = ['first_chapter', 'name', 'appearances']
+
+# How each CSV's generator names its map files, e.g. "Karnov's Carnival!"
+# -> karnovs-carnival.png; chapter maps are prefixed with chapterNN-
+MAP_FILE_RULES = {
+    'all_locations_comprehensive.csv': {'strip': "'!,()", 'limit': 50, 'chapter_prefix': False},
+    'all_locations_complete.csv': {'strip': "'!,", 'limit': 50, 'chapter_prefix': False},
+    'all_chapters_locations.csv': {'strip': "'!,", 'limit': 40, 'chapter_prefix': True}
+}
+
+_ALIGN = 8
+
+
+def map_file_name(name, first_chapter, rule):
+    """Return the map file name a generator writes for a location."""
+    safe_name = name.lower().replace(' ', '-')
+    for char in rule['strip']:
+        safe_name = safe_name.replace(char, '')
+    safe_name = safe_name[:rule['limit']]
+    if rule['chapter_prefix']:
+        safe_name = f'chapter{first_chapter:02d}-{safe_name}'
+    return f'{safe_name}.png'
+
+
+def _string_column(values):
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def compile_location_csv(csv_path):
+    """Read a location CSV into the store's column arrays."""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    count = len(rows)
+    chapter_lists = [[int(c) for c in row['chapters'].split(',') if c.strip()] for row in rows]
+    terrains = sorted({row['terrain'] for row in rows})
+    terrain_codes = {terrain: code for code, terrain in enumerate(terrains)}
+
+    chapter_offsets = np.zeros(count + 1, dtype=np.int32)
+    np.cumsum([len(chapters) for chapters in chapter_lists], out=chapter_offsets[1:])
+
+    columns = {
+        'first_chapter': np.array([int(row['first_chapter']) for row in rows], dtype=np.int16),
+        'appearances': np.array([int(row['appearances']) for row in rows], dtype=np.int16),
+        'terrain': np.array([terrain_codes[row['terrain']] for row in rows], dtype=np.uint8),
+        'chapter_offsets': chapter_offsets,
+        'chapter_values': np.array([c for chapters in chapter_lists for c in chapters], dtype=np.int16)
+    }
+    for column in STRING_COLUMNS:
+        columns[f'{column}_offsets'], columns[f'{column}_bytes'] = _string_column([row[column] for row in rows])
+
+    # Stable sorts, so ties keep CSV order like sorted() did in the generators
+    names = [row['name'] for row in rows]
+    columns['order_first_chapter'] = np.argsort(columns['first_chapter'], kind='stable').astype(np.int32)
+    columns['order_name'] = np.array(sorted(range(count), key=names.__getitem__), dtype=np.int32)
+    columns['order_appearances'] = np.argsort(-columns['appearances'].astype(np.int32), kind='stable').astype(np.int32)
+
+    return {'count': count, 'terrains': terrains, 'columns': columns}
+
+
+def write_store(store_path, compiled, source):
+    """Write compiled columns as a .locs file, atomically."""
+    layout = {}
+    offset = 0
+    for name, array in compiled['columns'].items():
+        offset = -(-offset // _ALIGN) * _ALIGN
+        layout[name] = {'dtype': array.dtype.str, 'offset': offset, 'length': len(array)}
+        offset += array.nbytes
+
+    header = json.dumps({
+        'version': STORE_VERSION,
+        'count': compiled['count'],
+        'terrains': compiled['terrains'],
+        'source': source,
+        'columns': layout
+    }, sort_keys=True).encode('utf-8') + b'\n'
+    # Pad the header so the column data starts aligned
+    header_size = -(-len(header) // _ALIGN) * _ALIGN
+
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp_path = f'{store_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header[:-1] + b' ' * (header_size - len(header)) + b'\n')
+        for name, array in compiled['columns'].items():
+            f.seek(header_size + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(header_size + offset)
+    os.replace(tmp_path, store_path)
+
+
+def open_store(store_path):
+    """Memory-map a .locs file; returns the store dict, or None if unusable."""
+    try:
+        with open(store_path, 'rb') as f:
+            header_line = f.readline()
+        header = json.loads(header_line)
+        if header.get('version') != STORE_VERSION:
+            return None
+        data = np.memmap(store_path, dtype=np.uint8, mode='r')
+    except (OSError, ValueError):
+        return None
+
+    base = len(header_line)
+    columns = {}
+    for name, spec in header['columns'].items():
+        dtype = np.dtype(spec['dtype'])
+        start = base + spec['offset']
+        columns[name] = data[start:start + spec['length'] * dtype.itemsize].view(dtype)
+
+    return {
+        'path': store_path,
+        'count': header['count'],
+        'terrains': header['terrains'],
+        'source': header['source'],
+        'columns': columns,
+        'strings': {}
+    }
+
+
+def store_path_for(csv_path, cache_dir=CACHE_DIR):
+    """Return the .locs path for a CSV, e.g. all_locations_comprehensive.locs."""
+    return os.path.join(cache_dir, os.path.splitext(os.path.basename(csv_path))[0] + '.locs')
+
+
+def load_location_store(csv_path, cache_dir=CACHE_DIR):
+    """Return the store for a location CSV, recompiling it if the CSV changed."""
+    store_path = store_path_for(csv_path, cache_dir)
+    store = open_store(store_path)
+    stat = os.stat(csv_path)
+
+    if store is not None:
+        source = store['source']
+        if source['mtime_ns'] == stat.st_mtime_ns and source['size'] == stat.st_size:
+            return store
+        digest = file_sha256(csv_path)
+        if source['sha256'] == digest:
+            return store
+
+    source = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': file_sha256(csv_path)}
+    write_store(store_path, compile_location_csv(csv_path), source)
+    return open_store(store_path)
+
+
+def store_strings(store, column):
+    """Return a string column ('name' or 'description') as a list, decoded once."""
+    strings = store['strings'].get(column)
+    if strings is None:
+        offsets = store['columns'][f'{column}_offsets'].tolist()
+        blob = store['columns'][f'{column}_bytes'].tobytes()
+        strings = store['strings'][column] = [blob[a:b].decode('utf-8') for a, b in zip(offsets[:-1], offsets[1:])]
+    return strings
+
+
+def chapter_lists(store):
+    """Return every location's chapters as lists of ints."""
+    offsets = store['columns']['chapter_offsets'].tolist()
+    values = store['columns']['chapter_values'].tolist()
+    return [values[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def location_rows(store, order=None):
+    """Return the locations as CSV-style row dicts with int first_chapter/appearances.
+
+    order is one of ORDERS ('first_chapter', 'name', 'appearances') or
+    None for CSV order.
+    """
+    columns = store['columns']
+    names = store_strings(store, 'name')
+    descriptions = store_strings(store, 'description')
+    terrains = [store['terrains'][code] for code in columns['terrain'].tolist()]
+    first_chapters = columns['first_chapter'].tolist()
+    appearances = columns['appearances'].tolist()
+    chapters = chapter_lists(store)
+
+    indices = range(store['count']) if order is None else columns[f'order_{order}'].tolist()
+    return [{
+        'name': names[i],
+        'chapters': ','.join(map(str, chapters[i])),
+        'first_chapter': first_chapters[i],
+        'appearances': appearances[i],
+        'terrain': terrains[i],
+        'description': descriptions[i]
+    } for i in indices]
+
+
+def write_site_json(store, json_path, map_file_rule):
+    """Write the columnar JSON the site loads instead of parsing the CSV."""
+    columns = store['columns']
+    names = store_strings(store, 'name')
+    first_chapters = columns['first_chapter'].tolist()
+
+    site_data = {
+        'version': STORE_VERSION,
+        'count': store['count'],
+        'name': names,
+        'chapters': chapter_lists(store),
+        'first_chapter': first_chapters,
+        'appearances': columns['appearances'].tolist(),
+        'terrain': [store['terrains'][code] for code in columns['terrain'].tolist()],
+        'description': store_strings(store, 'description'),
+        'mapFile': [map_file_name(name, first, map_file_rule) for name, first in zip(names, first_chapters)],
+        'order': {order: columns[f'order_{order}'].tolist() for order in ORDERS},
+        'source': {'csv': os.path.splitext(os.path.basename(json_path))[0] + '.csv', 'sha256': store['source']['sha256']}
+    }
+
+    tmp_path = f'{json_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(site_data, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp_path, json_path)
+
+
+def publish_location_store(csv_path, cache_dir=CACHE_DIR):
+    """Refresh the binary store and the site JSON for a location CSV; returns the store."""
+    store = load_location_store(csv_path, cache_dir)
+    rule = MAP_FILE_RULES.get(os.path.basename(csv_path))
+    if rule is not None:
+        write_site_json(store, os.path.splitext(csv_path)[0] + '.json', rule)
+    return store
@@ -0,0 +1,103 @@
+"""
+Content-hash build manifest for generated maps
+
+The manifest is a small JSON file stored next to the outputs that maps
+each generated file (relative to the manifest's folder) to the hash of
+everything that went into it: the CSV row, seed, map size, tileset
+source hashes and the generator version. A map written in several
+formats also records every file written for it (e.g. its .png, .webp and
+.avif variants). A map is re-rendered only when that hash changes or any
+of its files is missing, and files the manifest knows about that are no
+longer produced get pruned.
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = '.build-manifest.json'
+
+
+def content_hash(payload):
+    """Return a stable SHA-256 for a JSON-serialisable payload."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def load_manifest(manifest_dir, name=MANIFEST_NAME):
+    """Load the manifest in manifest_dir, or an empty one."""
+    path = os.path.join(manifest_dir, name)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        manifest = None
+
+    if not manifest or manifest.get('version') != MANIFEST_VERSION:
+        manifest = {'version': MANIFEST_VERSION, 'maps': {}}
+    manifest.setdefault('files', {})
+
+    return manifest
+
+
+def save_manifest(manifest_dir, manifest, name=MANIFEST_NAME):
+    """Write the manifest atomically, sorted so diffs stay readable."""
+    path = os.path.join(manifest_dir, name)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+
+
+def map_files(manifest, rel_path):
+    """Every file recorded for rel_path: its variants, or just rel_path itself."""
+    return manifest['files'].get(rel_path, [rel_path])
+
+
+def is_stale(manifest, manifest_dir, rel_path, digest, files=None):
+    """True when rel_path was built from different inputs or any of its files is missing.
+
+    files lists every file the map should have (rel_path alone by
+    default); a map recorded with a different set is stale too.
+    """
+    files = sorted(files or [rel_path])
+    if manifest['maps'].get(rel_path) != digest or sorted(map_files(manifest, rel_path)) != files:
+        return True
+    return not all(os.path.exists(os.path.join(manifest_dir, path)) for path in files)
+
+
+def record_map(manifest, manifest_dir, rel_path, digest, files=None):
+    """Record a freshly built map and its files.
+
+    Files recorded for it before that it no longer produces (a format
+    dropped from --formats) are deleted.
+    """
+    files = sorted(files or [rel_path])
+    for path in sorted(set(map_files(manifest, rel_path)) - set(files)):
+        if os.path.exists(os.path.join(manifest_dir, path)):
+            os.remove(os.path.join(manifest_dir, path))
+
+    manifest['maps'][rel_path] = digest
+    if files == [rel_path]:
+        manifest['files'].pop(rel_path, None)
+    else:
+        manifest['files'][rel_path] = files
+
+
+def prune_orphans(manifest, manifest_dir, keep):
+    """Delete the maps the manifest tracks that are not in keep, with all their files.
+
+    Only files recorded in the manifest are touched, so hand-made or
+    other generators' images in the same folder are left alone.
+    """
+    removed = []
+    for rel_path in sorted(set(manifest['maps']) - set(keep)):
+        for path in map_files(manifest, rel_path):
+            if os.path.exists(os.path.join(manifest_dir, path)):
+                os.remove(os.path.join(manifest_dir, path))
+        del manifest['maps'][rel_path]
+        manifest['files'].pop(rel_path, None)
+        removed.append(rel_path)
+    return removed
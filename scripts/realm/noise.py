@@ -0,0 +1,215 @@
+"""
+Coherent-noise terrain layouts
+
+create_terrain_layout() draws every vertex independently, so its maps
+are speckle around a centre falloff. Here terrain comes from fractal
+Brownian motion (fBm): several octaves of value noise, each a periodic
+lattice of seeded random values smoothly (quintic) interpolated, at
+doubling frequency and halving amplitude. Optional domain warping
+displaces the sample points by a second, low-frequency fBm before
+sampling, which bends the blobs into coastlines and ridges.
+
+Everything is computed for the whole vertex grid at once. The lattice
+lookups are separable (interpolate along x for every lattice row, then
+along y). A warp displaces every octave by the same offset, so rather
+than gathering each octave at scattered points it resamples the summed
+field once, bilinearly. Octaves finer than MIN_CELL_VERTICES vertices
+per lattice cell are dropped: sampled once per vertex they are only
+aliased speckle, and they cost the most. A 1024x1024 grid takes about
+13-21 ms unwarped and 70-76 ms (median) for the warped presets, against
+a 100 ms budget that benchmark-map-pipeline.py checks for every preset.
+
+Every octave's period divides the map, so layouts tile seamlessly: the
+last vertex row and column are copied from the first. Lattices come
+from one seeded generator, so a seed always gives the same layout.
+
+The field is thresholded at its own quantiles, so density is the share
+of upper-terrain vertices whatever the noise parameters, and more than
+two levels can be drawn for realm.layers.
+"""
+
+import numpy as np
+
+from realm.seeding import numpy_rng
+
+# Bump whenever a change here alters the layouts for the same arguments
+NOISE_VERSION = 3
+
+# Feature size in vertices and noise shape per location terrain; the
+# warp is in units of the coarsest octave's lattice cells. Octaves stop
+# at MIN_CELL_VERTICES, e.g. scale 8 has room for 8, 4 and 2
+NOISE_PRESETS = {
+    'Water': {'scale': 24, 'octaves': 3, 'warp': 0.5},
+    'Island': {'scale': 24, 'octaves': 4, 'warp': 0.4},
+    'Forest': {'scale': 8, 'octaves': 3, 'warp': 0.3},
+    'Mountains': {'scale': 12, 'octaves': 3, 'gain': 0.55, 'warp': 0.8},
+    'Desert': {'scale': 16, 'octaves': 3, 'warp': 1.0},
+    'Dungeon': {'scale': 6, 'octaves': 2},
+    'Temple': {'scale': 6, 'octaves': 2},
+    'Structure': {'scale': 6, 'octaves': 2},
+    'City': {'scale': 4, 'octaves': 2}
+}
+DEFAULT_NOISE = {'scale': 12, 'octaves': 4, 'warp': 0.5}
+
+# The warp offsets are a single smooth octave: finer warp octaves cost a
+# full-grid pass each and only roughen edges the fBm octaves already roughen
+WARP_OCTAVES = 1
+
+# Smallest lattice cell, in vertices, an octave may have
+MIN_CELL_VERTICES = 2
+
+# Grids over QUANTILE_SAMPLES vertices estimate their quantiles from every
+# QUANTILE_STRIDE-th vertex in row-major order. Lattice cells are the
+# preset scales (multiples of 2 and 3) halved per octave, so a prime
+# stride never lines up with the lattice and samples every phase
+QUANTILE_SAMPLES = 1 << 16
+QUANTILE_STRIDE = 7
+
+
+def noise_preset(terrain):
+    """Return the noise_terrain_layout() keyword arguments for a terrain."""
+    return dict(NOISE_PRESETS.get(terrain, DEFAULT_NOISE))
+
+
+def _fade(t):
+    """Quintic smoothstep 6t^5 - 15t^4 + 10t^3."""
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _axis(coords, period):
+    """Lattice indices (wrapped) and fade weights along one axis."""
+    floor = np.floor(coords)
+    weight = _fade(coords - floor)
+    first = floor.astype(np.intp) % period
+    return first, (first + 1) % period, weight
+
+
+def add_separable(total, lattice, ys, xs, amplitude=1.0):
+    """Add amplitude * value noise of a periodic lattice at every (ys[i], xs[j]) to total.
+
+    Coordinates are in lattice units. Both interpolations run on the
+    small lattice-row arrays, so the full grid only sees two row gathers
+    and three in-place operations.
+    """
+    y0, _, wy = _axis(ys, lattice.shape[0])
+    x0, x1, wx = _axis(xs, lattice.shape[1])
+    rows = lattice[:, x0] + (lattice[:, x1] - lattice[:, x0]) * wx
+    rows *= np.float32(amplitude)
+    steps = np.roll(rows, -1, axis=0) - rows
+
+    total += rows.take(y0, axis=0)
+    step = steps.take(y0, axis=0)
+    step *= wy[:, None]
+    total += step
+
+
+def warp_field(field, offset_y, offset_x):
+    """Resample a tileable vertex field at every vertex plus an offset, bilinearly.
+
+    field's last row and column repeat its first, so lookups wrap around
+    the (height, width) period.
+    """
+    height, width = field.shape[0] - 1, field.shape[1] - 1
+    # Wrap a margin as wide as the largest offset around the period, so
+    # the lookups need no modulo
+    margin = int(np.ceil(max(np.abs(offset_y).max(), np.abs(offset_x).max()))) + 1
+    padded = np.pad(field[:-1, :-1], margin, mode='wrap')
+    stride = padded.shape[1]
+
+    ys = np.arange(height + 1, dtype=np.float32)[:, None] + (offset_y + np.float32(margin))
+    xs = np.arange(width + 1, dtype=np.float32)[None, :] + (offset_x + np.float32(margin))
+    y_floor = np.floor(ys)
+    x_floor = np.floor(xs)
+    ys -= y_floor
+    xs -= x_floor
+    index = y_floor.astype(np.intp)
+    index *= stride
+    index += x_floor.astype(np.intp)
+    flat = padded.ravel()
+    # The right-hand neighbours, gathered with the same index array
+    flat_right = flat[1:]
+
+    top = flat.take(index)
+    right = flat_right.take(index)
+    right -= top
+    right *= xs
+    top += right
+    index += stride
+    bottom = flat.take(index)
+    flat_right.take(index, out=right)
+    right -= bottom
+    right *= xs
+    bottom += right
+    bottom -= top
+    bottom *= ys
+    top += bottom
+    return top
+
+
+def fbm(width, height, rng, scale, octaves, gain=0.5, warp=0.0):
+    """fBm over a (height+1) x (width+1) vertex grid, normalised to [0, 1].
+
+    The coarsest octave has one lattice cell per scale vertices (rounded
+    so whole periods fit the map); each further octave halves the cells,
+    down to MIN_CELL_VERTICES.
+    """
+    periods = (max(1, round(height / scale)), max(1, round(width / scale)))
+    cell = min(max(height, 1) / periods[0], max(width, 1) / periods[1])
+    octaves = max(1, min(octaves, int(np.floor(np.log2(cell / MIN_CELL_VERTICES))) + 1))
+    # Vertex coordinates in coarsest-lattice units; the last vertex lands
+    # on the period and wraps to the first
+    ys = np.arange(height + 1, dtype=np.float32) * np.float32(periods[0] / max(height, 1))
+    xs = np.arange(width + 1, dtype=np.float32) * np.float32(periods[1] / max(width, 1))
+
+    total = np.zeros((height + 1, width + 1), dtype=np.float32)
+    amplitude = 1.0
+    norm = 0.0
+    for octave in range(octaves):
+        frequency = 1 << octave
+        lattice = rng.random((periods[0] * frequency, periods[1] * frequency), dtype=np.float32)
+        add_separable(total, lattice, ys * frequency, xs * frequency, amplitude)
+        norm += amplitude
+        amplitude *= gain
+    total /= np.float32(norm)
+
+    if warp:
+        # Offsets of up to warp coarse lattice cells, in vertices
+        strength = np.float32(2 * warp * scale)
+        offset_y = (fbm(width, height, rng, scale, WARP_OCTAVES) - np.float32(0.5)) * strength
+        offset_x = (fbm(width, height, rng, scale, WARP_OCTAVES) - np.float32(0.5)) * strength
+        total = warp_field(total, offset_y, offset_x)
+
+    # The float32 sums only match across the seam to rounding; make the
+    # edges exact so thresholding cannot split them
+    total[-1] = total[0]
+    total[:, -1] = total[:, 0]
+    return total
+
+
+def threshold_levels(field, count=2, density=0.4):
+    """Cut a field into levels 0..count-1 at its own quantiles.
+
+    Level k covers about density ** k of the vertices, like
+    realm.layers.create_layered_layout(); with count 2 that is the
+    usual 0/1 vertex grid with density upper terrain.
+    """
+    sample = field.ravel()
+    if sample.size > QUANTILE_SAMPLES:
+        sample = sample[::QUANTILE_STRIDE]
+    shares = 1 - np.float64(density) ** np.arange(1, count)
+    levels = np.zeros(field.shape, dtype=np.uint8)
+    for threshold in np.quantile(sample, shares).astype(field.dtype):
+        levels += field > threshold
+    return levels
+
+
+def noise_terrain_layout(width, height, seed, density=0.4, scale=12, octaves=4, gain=0.5,
+                         warp=0.0, count=2):
+    """Create a tileable coherent-noise layout, like create_terrain_layout().
+
+    Returns a (height+1) x (width+1) uint8 grid of levels 0..count-1
+    (0/1 vertices by default).
+    """
+    rng = numpy_rng(seed)
+    field = fbm(width, height, rng, scale, octaves, gain, warp)
+    return threshold_levels(field, count, density)
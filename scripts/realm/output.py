@@ -0,0 +1,225 @@
+"""
+Size-optimised map output shared by the generators
+
+The tile maps only use a few dozen colours, so instead of a plain
+truecolor save each map is written as:
+
+- png:  an exact palette PNG (falls back to truecolor above 256 colours)
+- webp: lossless WebP, written next to the PNG
+- avif: optional lossy AVIF at high quality with full-resolution chroma
+
+Every encode returns a report with the size of each variant written;
+with report_savings it also has the bytes a plain ``img.save()`` PNG
+would have taken, which costs one more full encode per map. MapEncoder
+runs the encodes in a process pool for the generators that render
+serially.
+
+The streamed world map (realm.worldmap) is the one exception: it never
+holds the whole image, so it is written as a truecolor PNG a band at a
+time instead of going through encode_map().
+"""
+
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image, features
+
+FORMATS = ('png', 'webp', 'avif')
+DEFAULT_FORMATS = ('png',)
+
+# Tuned on the location maps: higher WebP methods and lower AVIF speeds
+# cost seconds per map for under 1% smaller files. For the palette PNGs,
+# zlib level 9 took 289 ms against 41 ms at level 6 on a 1280px location
+# map for 14% smaller files, and 4.9 s against 0.66 s on the 5120px world
+# map for 5%, so level 6 it is
+SAVE_OPTIONS = {
+    'png': {'format': 'PNG', 'compress_level': 6},
+    'webp': {'format': 'WEBP', 'lossless': True, 'quality': 100, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 90, 'subsampling': '4:4:4', 'speed': 6}
+}
+
+
+def parse_formats(value):
+    """Parse a --formats value such as 'png,webp' into a tuple.
+
+    PNG is always written, since it is the file the site and the build
+    manifest refer to.
+    """
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+
+    unknown = sorted(set(formats) - set(FORMATS))
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+
+    missing = [fmt for fmt in formats if fmt != 'png' and not features.check(fmt)]
+    if missing:
+        raise ValueError(f"This Pillow build cannot write: {', '.join(missing)}")
+
+    return ('png',) + tuple(fmt for fmt in FORMATS[1:] if fmt in formats)
+
+
+def variant_path(output_path, fmt):
+    """Return the path of the fmt variant of a .png output path."""
+    return output_path if fmt == 'png' else f'{os.path.splitext(output_path)[0]}.{fmt}'
+
+
+def to_palette(img):
+    """Return an exact 'P' mode copy of img, or None above 256 colours.
+
+    PIL counts the colours (and gives up past 256) in one pass; pixels are
+    then looked up in the sorted colour list, which is several times
+    faster than sorting every pixel with np.unique.
+    """
+    rgba_img = img.convert('RGBA')
+    counted = rgba_img.getcolors(256)
+    if counted is None:
+        return None
+
+    colors = np.sort(np.array([color for _, color in counted], dtype=np.uint8).view(np.uint32).ravel())
+    rgba = np.ascontiguousarray(np.asarray(rgba_img))
+    indices = np.searchsorted(colors, rgba.view(np.uint32)[..., 0]).astype(np.uint8)
+
+    palette_img = Image.fromarray(indices, 'P')
+    if img.mode == 'RGBA':
+        palette_img.putpalette(colors.view(np.uint8).tobytes(), rawmode='RGBA')
+    else:
+        palette_img.putpalette(colors.view(np.uint8).reshape(-1, 4)[:, :3].tobytes(), rawmode='RGB')
+
+    return palette_img
+
+
+def encode_map(img, output_path, formats=DEFAULT_FORMATS, report_savings=False):
+    """Write every requested variant of img and return its size report."""
+    report = {
+        'path': output_path,
+        'reference_bytes': None,
+        'bytes': {}
+    }
+
+    if report_savings:
+        reference = io.BytesIO()
+        img.save(reference, 'PNG')
+        report['reference_bytes'] = len(reference.getvalue())
+
+    for fmt in formats:
+        path = variant_path(output_path, fmt)
+        source = img
+        if fmt == 'png':
+            source = to_palette(img) or img
+
+        options = dict(SAVE_OPTIONS[fmt])
+        source.save(path, options.pop('format'), **options)
+        report['bytes'][fmt] = os.path.getsize(path)
+
+    return report
+
+
+def _kb(n):
+    return f'{n / 1024:.1f} KB'
+
+
+def report_files(report):
+    """Paths of every variant a report says was written."""
+    return [variant_path(report['path'], fmt) for fmt in report['bytes']]
+
+
+def format_report(report):
+    """One line per map: plain PNG size when measured, then each variant and its saving."""
+    reference = report['reference_bytes']
+    if not reference:
+        variants = ', '.join(f"{fmt} {_kb(size)}" for fmt, size in report['bytes'].items())
+        return f"{os.path.basename(report['path'])}: {variants}"
+
+    variants = ', '.join(f"{fmt} {_kb(size)} ({(size - reference) / reference:+.0%})"
+                         for fmt, size in report['bytes'].items())
+    return f"{os.path.basename(report['path'])}: {_kb(reference)} → {variants}"
+
+
+def summarize_reports(reports):
+    """Return (reference bytes, {format: bytes}) totals over many reports.
+
+    The reference total is 0 unless every report measured it.
+    """
+    totals = {}
+    for report in reports:
+        for fmt, size in report['bytes'].items():
+            totals[fmt] = totals.get(fmt, 0) + size
+
+    measured = [report['reference_bytes'] for report in reports]
+    reference = sum(measured) if all(measured) else 0
+    return reference, totals
+
+
+def print_summary(reports):
+    """Print the total bytes written per format, and saved when measured."""
+    reference, totals = summarize_reports(reports)
+    if not totals:
+        return
+
+    if not reference:
+        print(f"\n💾 Output size over {len(reports)} maps:")
+        for fmt, size in totals.items():
+            print(f"  {fmt}: {_kb(size)}")
+        return
+
+    print(f"\n💾 Output size over {len(reports)} maps (plain PNG: {_kb(reference)}):")
+    for fmt, size in totals.items():
+        print(f"  {fmt}: {_kb(size)}, saved {_kb(reference - size)} ({(size - reference) / reference:+.0%})")
+
+
+class MapEncoder:
+    """Encode maps in a process pool while the caller keeps rendering.
+
+    submit() queues an image and returns the reports that finished so
+    far, in submission order; at most a few encodes per worker are in
+    flight, so images do not pile up in memory. With one worker
+    everything is encoded in-process.
+    """
+
+    def __init__(self, formats=DEFAULT_FORMATS, workers=1, report_savings=False):
+        self.formats = formats
+        self.workers = workers
+        self.report_savings = report_savings
+        self.reports = []
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        self._pending = deque()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._pool:
+            self._pool.shutdown(cancel_futures=True)
+
+    def submit(self, img, output_path):
+        """Queue img for output_path; return the reports completed so far."""
+        if not self._pool:
+            report = encode_map(img, output_path, self.formats, self.report_savings)
+            self.reports.append(report)
+            return [report]
+
+        self._pending.append(self._pool.submit(encode_map, img, output_path, self.formats,
+                                              self.report_savings))
+
+        done = []
+        while self._pending and (len(self._pending) > 2 * self.workers or self._pending[0].done()):
+            done.append(self._pending.popleft().result())
+        self.reports.extend(done)
+        return done
+
+    def close(self):
+        """Wait for the remaining encodes, shut the pool down and return their reports."""
+        done = [future.result() for future in self._pending]
+        self._pending.clear()
+        self.reports.extend(done)
+
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+        return done
@@ -0,0 +1,111 @@
+"""
+Streaming PNG writer
+
+Writes a PNG a band of rows at a time: each band is filtered, fed to a
+zlib compressor and flushed to disk as IDAT chunks, so memory use depends
+on the band size, not the image size.
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+COLOR_TYPES = {'L': (0, 1), 'RGB': (2, 3), 'RGBA': (6, 4)}
+IDAT_CHUNK_SIZE = 1 << 18
+
+# PNG per-row filter types (only the cheap, vectorizable ones)
+FILTER_NONE = 0
+FILTER_SUB = 1
+FILTER_UP = 2
+
+
+class PngStreamWriter:
+    """Write an 8-bit PNG incrementally.
+
+    Use as a context manager, call write_rows() with (rows, width,
+    channels) uint8 arrays from top to bottom, and the file is finished
+    when the block exits.
+    """
+
+    def __init__(self, path, width, height, mode='RGB', compress_level=6, row_filter=FILTER_SUB):
+        if mode not in COLOR_TYPES:
+            raise ValueError(f"Unsupported PNG mode: {mode}")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.channels = COLOR_TYPES[mode][1]
+        self.row_filter = row_filter
+        self.rows_written = 0
+
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._previous_row = np.zeros((width * self.channels,), dtype=np.uint8)
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        color_type = COLOR_TYPES[self.mode][0]
+        self._write_chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, color_type, 0, 0, 0))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.close()
+        finally:
+            self._file.close()
+
+    def _write_chunk(self, chunk_type, data):
+        self._file.write(struct.pack('>I', len(data)))
+        self._file.write(chunk_type)
+        self._file.write(data)
+        self._file.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
+
+    def _flush_idat(self, final=False):
+        while len(self._pending) >= IDAT_CHUNK_SIZE or (final and self._pending):
+            chunk = bytes(self._pending[:IDAT_CHUNK_SIZE])
+            del self._pending[:IDAT_CHUNK_SIZE]
+            self._write_chunk(b'IDAT', chunk)
+
+    def _filter(self, rows):
+        if self.row_filter == FILTER_SUB:
+            filtered = rows.copy()
+            filtered[:, self.channels:] -= rows[:, :-self.channels]
+            return filtered
+        if self.row_filter == FILTER_UP:
+            above = np.vstack([self._previous_row[None, :], rows[:-1]])
+            return rows - above
+        return rows
+
+    def write_rows(self, pixels):
+        """Append a band of rows, shaped (rows, width, channels) or (rows, width) for L."""
+        rows = np.ascontiguousarray(pixels, dtype=np.uint8).reshape(len(pixels), -1)
+        if rows.shape[1] != self.width * self.channels:
+            raise ValueError(f"Row width {rows.shape[1]} does not match {self.width}x{self.channels}")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("More rows written than the PNG height")
+
+        filtered = self._filter(rows)
+        self._previous_row = rows[-1].copy()
+
+        framed = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+        framed[:, 0] = self.row_filter
+        framed[:, 1:] = filtered
+
+        self._pending += self._compressor.compress(framed.tobytes())
+        self._flush_idat()
+        self.rows_written += len(rows)
+
+    def close(self):
+        """Finish the zlib stream and write IEND."""
+        if self.rows_written != self.height:
+            raise ValueError(f"PNG expects {self.height} rows, got {self.rows_written}")
+
+        self._pending += self._compressor.flush()
+        self._flush_idat(final=True)
+        self._write_chunk(b'IEND', b'')
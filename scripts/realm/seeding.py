@@ -0,0 +1,64 @@
+"""
+Stable seed derivation for procedural maps
+
+Python salts str hashes per process, so hash(name) gives every run a
+different seed and every map different pixels. These helpers hash a
+canonical key with BLAKE2b instead, and hand out per-map RNG objects so
+nothing touches the global random state (which also keeps generators
+safe to run in parallel).
+"""
+
+import hashlib
+import random
+import unicodedata
+
+import numpy as np
+
+SEED_BITS = 32
+
+
+def location_key(name):
+    """Canonical form of a location name: NFKC, casefolded, single spaces."""
+    text = unicodedata.normalize('NFKC', name).casefold()
+    return ' '.join(text.split())
+
+
+def stable_seed(*parts, bits=SEED_BITS):
+    """Derive a seed from parts with a truncated BLAKE2b digest.
+
+    Same parts, same seed, in every process and on every machine.
+    """
+    key = '\x1f'.join(str(part) for part in parts)
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8, person=b'realm-seed').digest()
+    return int.from_bytes(digest, 'big') >> (64 - bits)
+
+
+def location_seed(name, namespace='location'):
+    """Seed for a location's terrain, keyed by its canonical name."""
+    return stable_seed(namespace, location_key(name))
+
+
+def python_rng(seed):
+    """A private random.Random stream for one map."""
+    return random.Random(seed)
+
+
+def numpy_rng(seed):
+    """A private numpy.random.Generator stream for one map."""
+    return np.random.default_rng(seed)
+
+
+def mt19937_rng(seed):
+    """A numpy Generator that replays random.Random(seed) draw for draw.
+
+    Both use MT19937 and the same 53-bit double conversion, so copying
+    the state Python derives from the seed makes Generator.random()
+    return exactly the values random.Random(seed).random() would.
+    """
+    state = random.Random(seed).getstate()[1]
+    bit_generator = np.random.MT19937(0)
+    bit_generator.state = {
+        'bit_generator': 'MT19937',
+        'state': {'key': np.array(state[:624], dtype=np.uint32), 'pos': state[624]}
+    }
+    return np.random.Generator(bit_generator)
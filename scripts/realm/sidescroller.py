@@ -0,0 +1,215 @@
+"""
+Sidescroller platform levels from the PixelLab sidescroller tilesets
+
+The sidescroller sets use the same 16 corner-coded tiles as the top-down
+ones, with 'lower' as solid platform and 'upper' as open air: the all-
+lower tile is platform interior, the all-upper tile is empty, and the
+mixed ones are the grass or snow tops, undersides and ledge ends. So a
+level is a vertex grid of solid and air, and the correct edge tile of
+every cell is its Wang index, rendered with realm.wang like any map.
+
+Levels are long and are rendered a screen-width chunk at a time. Every
+column's ground height and every platform come from a counter-based hash
+of (seed, what, index) rather than a sequential random stream, so any
+chunk can be built on its own, in any order or in parallel, and
+neighbouring chunks still meet seamlessly on their shared vertex column.
+
+- ground: a column heightmap from smoothly interpolated hashed heights
+  every GROUND_SPACING columns, cut by the occasional pit
+- platforms: one chance per PLATFORM_SPACING columns of a floating
+  one-tile-thick ledge a few tiles above the highest ground under it
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from realm.seeding import stable_seed
+from realm.tilesets import PROJECT_ROOT
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
+
+SIDESCROLLER_DIR = os.path.join(PROJECT_ROOT, 'public/tilesets/sidescroller')
+TILESET_DATABASE = os.path.join(PROJECT_ROOT, 'data/tileset_database.csv')
+
+# One screen is SCREEN_COLUMNS x LEVEL_ROWS tiles (320x240 at 16px)
+SCREEN_COLUMNS = 20
+LEVEL_ROWS = 15
+
+GROUND_SPACING = 8
+GROUND_MIN = 2
+GROUND_MAX = 7
+
+PIT_SPACING = 24
+PIT_CHANCE = 0.35
+PIT_WIDTHS = (2, 4)
+
+PLATFORM_SPACING = 7
+PLATFORM_CHANCE = 0.6
+PLATFORM_LENGTHS = (3, 7)
+PLATFORM_LIFTS = (4, 6)
+
+# The first screen always has solid ground to start on
+SAFE_COLUMNS = SCREEN_COLUMNS
+
+
+def hash_uniform(seed, stream, index):
+    """Uniform [0, 1) floats for integer indices, the same for the same (seed, stream, index).
+
+    SplitMix64 finaliser over the index offset by a per-stream key, all
+    in wrapping uint64 arithmetic.
+    """
+    key = np.uint64(stable_seed(seed, stream, bits=64))
+    x = np.asarray(index, dtype=np.int64).astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + key
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    return (x >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+def _hash_range(seed, stream, index, bounds):
+    """Hashed integers in the inclusive range bounds."""
+    low, high = bounds
+    return low + (hash_uniform(seed, stream, index) * (high - low + 1)).astype(np.int64)
+
+
+def ground_heights(seed, columns):
+    """Solid vertex rows from the bottom for each global vertex column (0 = pit)."""
+    columns = np.asarray(columns, dtype=np.int64)
+    knot = columns // GROUND_SPACING
+    t = (columns % GROUND_SPACING) / GROUND_SPACING
+    t = t * t * (3 - 2 * t)
+
+    first = hash_uniform(seed, 'ground', knot)
+    second = hash_uniform(seed, 'ground', knot + 1)
+    heights = GROUND_MIN + np.rint((first + (second - first) * t) * (GROUND_MAX - GROUND_MIN)).astype(np.int64)
+
+    # A pit may start anywhere in its slot, and never in the first screen
+    slot = columns // PIT_SPACING
+    for back in (0, 1):
+        pit_slot = slot - back
+        start = pit_slot * PIT_SPACING + _hash_range(seed, 'pit-offset', pit_slot, (0, PIT_SPACING - 1))
+        width = _hash_range(seed, 'pit-width', pit_slot, PIT_WIDTHS)
+        in_pit = ((hash_uniform(seed, 'pit', pit_slot) < PIT_CHANCE) & (start >= SAFE_COLUMNS) &
+                  (columns >= start) & (columns < start + width))
+        heights[in_pit] = 0
+    return heights
+
+
+def platforms_between(seed, first_column, last_column):
+    """Return (x0, x1, y) vertex spans of the platforms overlapping columns first..last.
+
+    A platform covers vertex columns x0..x1 and vertex rows y and y + 1
+    (counted from the top), i.e. one row of tiles.
+    """
+    reach = PLATFORM_LENGTHS[1] + PLATFORM_SPACING
+    slots = np.arange((first_column - reach) // PLATFORM_SPACING, last_column // PLATFORM_SPACING + 1)
+
+    x0 = slots * PLATFORM_SPACING + _hash_range(seed, 'platform-offset', slots, (0, PLATFORM_SPACING - 1))
+    length = _hash_range(seed, 'platform-length', slots, PLATFORM_LENGTHS)
+    x1 = x0 + length
+    # Lifted clear of the highest ground anywhere under the platform
+    span = np.arange(PLATFORM_LENGTHS[1] + 1)
+    under = ground_heights(seed, x0[:, None] + span)
+    ground = np.where(span <= length[:, None], under, 0).max(axis=1)
+    lift = _hash_range(seed, 'platform-lift', slots, PLATFORM_LIFTS)
+    y = LEVEL_ROWS - np.maximum(ground, GROUND_MIN) - lift - 1
+
+    keep = ((hash_uniform(seed, 'platform', slots) < PLATFORM_CHANCE) & (x1 >= first_column) &
+            (x0 <= last_column) & (y >= 1))
+    return np.stack([x0[keep], x1[keep], y[keep]], axis=1)
+
+
+def level_vertices(seed, first_column, columns):
+    """Vertex grid (0 = solid, 1 = air) for cell columns first_column..first_column + columns - 1.
+
+    Returns (LEVEL_ROWS + 1, columns + 1) uint8; the last vertex column
+    is the next chunk's first.
+    """
+    xs = np.arange(first_column, first_column + columns + 1)
+    heights = ground_heights(seed, xs)
+    rows = np.arange(LEVEL_ROWS + 1)[:, None]
+    solid = rows > LEVEL_ROWS - heights[None, :]
+
+    for x0, x1, y in platforms_between(seed, xs[0], xs[-1]).tolist():
+        solid[y:y + 2, max(x0, xs[0]) - xs[0]:min(x1, xs[-1]) - xs[0] + 1] = True
+
+    return (~solid).view(np.uint8)
+
+
+def render_chunk(tileset, seed, chunk, chunk_columns=SCREEN_COLUMNS):
+    """Render chunk number chunk of a level as an RGBA image."""
+    vertices = level_vertices(seed, chunk * chunk_columns, chunk_columns)
+    return composite_tiles(tileset_atlas(tileset), wang_index_grid(vertices))
+
+
+def level_heightmap(seed, chunks, chunk_columns=SCREEN_COLUMNS):
+    """ground_heights() of every vertex column of a level, for collision on the site."""
+    return ground_heights(seed, np.arange(chunks * chunk_columns + 1))
+
+
+def level_platforms(seed, chunks, chunk_columns=SCREEN_COLUMNS):
+    """platforms_between() over a whole level, clipped to its columns, for collision on the site."""
+    last_column = chunks * chunk_columns
+    platforms = platforms_between(seed, 0, last_column)
+    platforms[:, 0] = np.maximum(platforms[:, 0], 0)
+    platforms[:, 1] = np.minimum(platforms[:, 1], last_column)
+    return platforms
+
+
+def sidescroller_files(base_dir=SIDESCROLLER_DIR):
+    """Return {PixelLab tileset id: file stem} for the downloaded sidescroller tilesets."""
+    files = {}
+    for filename in sorted(os.listdir(base_dir)):
+        stem, ext = os.path.splitext(filename)
+        if ext == '.json' and os.path.exists(os.path.join(base_dir, f'{stem}.png')):
+            with open(os.path.join(base_dir, filename), 'r', encoding='utf-8') as f:
+                files[json.load(f)['id']] = stem
+    return files
+
+
+def sidescroller_assignments(csv_path=TILESET_DATABASE, base_dir=SIDESCROLLER_DIR):
+    """Return [(location name, file stem)] for the completed sidescroller tilesets.
+
+    Locations come from the "Used In Locations" column of the tileset
+    database; tilesets are matched to their downloaded files by id.
+    """
+    files = sidescroller_files(base_dir)
+    assignments = []
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            stem = files.get(row['Tileset ID'])
+            if row['Type'] != 'Sidescroller' or row['Status'] != 'Completed' or not stem:
+                continue
+            for name in row['Used In Locations'].split(','):
+                if name.strip():
+                    assignments.append((name.strip(), stem))
+    return assignments
+
+
+def write_level_json(path, level, chunk_files, tile_size, chunk_columns=SCREEN_COLUMNS):
+    """Describe a level's chunks, ground and platforms for the site, atomically.
+
+    'ground' is the solid vertex rows from the bottom per vertex column;
+    'platforms' are [x0, x1, y] vertex spans, each solid over columns
+    x0..x1 and rows y and y + 1 from the top.
+    """
+    data = {
+        'name': level['name'],
+        'tileset': level['tileset'],
+        'tileSize': tile_size,
+        'rows': LEVEL_ROWS,
+        'chunkColumns': chunk_columns,
+        'chunks': chunk_files,
+        'ground': level_heightmap(level['seed'], len(chunk_files), chunk_columns).tolist(),
+        'platforms': level_platforms(level['seed'], len(chunk_files), chunk_columns).tolist()
+    }
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        f.write('\n')
+    os.replace(tmp_path, path)
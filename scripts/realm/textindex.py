@@ -0,0 +1,308 @@
+"""
+Persistent inverted index over the chapter text
+
+Questions like "which chapters mention Cinder Woods near Everwood?" used
+to mean rescanning every chapter. The index keeps, for every lower-cased
+word, its postings per chapter file (word positions and character
+offsets) in an SQLite database, along with each file's text for context
+windows. update() only re-tokenizes chapter files whose content changed,
+so keeping it current costs a few stat() calls.
+
+Queries load a word's postings once into a single sorted array of
+(file rank << 32 | word position) keys, so a phrase is one array
+intersection per extra word and a proximity query is one searchsorted;
+repeated lookups stay well under a millisecond.
+"""
+
+import os
+import sqlite3
+
+import numpy as np
+
+from realm.chapters import CHAPTER_DIR, iter_chapter_files
+from realm.gazetteer import CONTEXT_AFTER, CONTEXT_BEFORE, WORD
+from realm.tilesets import PROJECT_ROOT, file_sha256
+
+INDEX_VERSION = 1
+INDEX_PATH = os.path.join(PROJECT_ROOT, '.cache/chapter-index.sqlite3')
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    chapter INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tokens (id INTEGER PRIMARY KEY, token TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS postings (
+    token_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    words BLOB NOT NULL,
+    starts BLOB NOT NULL,
+    PRIMARY KEY (token_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_by_file ON postings (file_id);
+'''
+
+_FILE_SHIFT = np.uint64(32)
+_WORD_MASK = np.uint64(0xFFFFFFFF)
+
+
+def tokenize(text):
+    """Return (lower-cased words, their character offsets as uint32)."""
+    words = WORD.findall(text)
+    starts = np.fromiter((match.start() for match in WORD.finditer(text)), dtype=np.uint32, count=len(words))
+    return [word.lower() for word in words], starts
+
+
+def group_postings(words, starts):
+    """Yield (token, word positions, character offsets) per distinct word."""
+    if not words:
+        return
+
+    vocabulary, inverse = np.unique(np.array(words), return_inverse=True)
+    order = np.argsort(inverse, kind='stable').astype(np.uint32)
+    bounds = np.searchsorted(inverse[order], np.arange(len(vocabulary) + 1))
+
+    for token, lo, hi in zip(vocabulary.tolist(), bounds[:-1], bounds[1:]):
+        positions = order[lo:hi]
+        yield token, positions, starts[positions]
+
+
+class ChapterIndex:
+    """On-disk inverted index over the chapter files.
+
+    Use as a context manager; call update() to bring it in line with the
+    chapter folder, then query with phrase(), near(), chapters() and
+    context(). Hits are dicts with 'chapter', 'file', 'word' (position of
+    the first word), 'words' (phrase length), 'start' and 'end'.
+    """
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.executescript(_SCHEMA)
+
+        version = self._db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if version is None or int(version[0]) != INDEX_VERSION:
+            self._db.executescript('DELETE FROM postings; DELETE FROM tokens; DELETE FROM files;')
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(INDEX_VERSION),))
+            self._db.commit()
+
+        self._load_files()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self._db.close()
+
+    def _load_files(self):
+        rows = self._db.execute('SELECT id, name, chapter FROM files ORDER BY name').fetchall()
+        # Files are ranked by name, the order the extractors read them in
+        self._files = [{'id': file_id, 'name': name, 'chapter': chapter} for file_id, name, chapter in rows]
+        self._rank = {entry['id']: rank for rank, entry in enumerate(self._files)}
+        self._postings = {}
+        self._texts = {}
+
+    def _index_file(self, file_id, text, token_ids):
+        words, starts = tokenize(text)
+        self._db.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+
+        rows = []
+        for token, positions, offsets in group_postings(words, starts):
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = self._db.execute('INSERT INTO tokens (token) VALUES (?)', (token,)).lastrowid
+            rows.append((token_id, file_id, positions.tobytes(), offsets.tobytes()))
+        self._db.executemany('INSERT INTO postings VALUES (?, ?, ?, ?)', rows)
+
+    def update(self, chapter_dir=CHAPTER_DIR):
+        """Re-index changed chapter files and drop removed ones.
+
+        Files whose size and mtime match are skipped without reading;
+        touched files with an unchanged hash are only re-stamped.
+        Returns {'indexed': [...], 'removed': [...], 'unchanged': n}.
+        """
+        known = {name: (file_id, sha256, mtime_ns, size) for file_id, name, sha256, mtime_ns, size in
+                 self._db.execute('SELECT id, name, sha256, mtime_ns, size FROM files')}
+        token_ids = None
+        indexed = []
+        seen = set()
+        unchanged = 0
+
+        with self._db:
+            for chapter_num, path in iter_chapter_files(chapter_dir):
+                name = os.path.basename(path)
+                seen.add(name)
+                stat = os.stat(path)
+                entry = known.get(name)
+
+                if entry and entry[2:] == (stat.st_mtime_ns, stat.st_size):
+                    unchanged += 1
+                    continue
+
+                digest = file_sha256(path)
+                if entry and entry[1] == digest:
+                    self._db.execute('UPDATE files SET mtime_ns = ?, size = ?, chapter = ? WHERE id = ?',
+                                     (stat.st_mtime_ns, stat.st_size, chapter_num, entry[0]))
+                    unchanged += 1
+                    continue
+
+                with open(path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+
+                if entry:
+                    file_id = entry[0]
+                    self._db.execute('UPDATE files SET chapter = ?, sha256 = ?, mtime_ns = ?, size = ?, text = ? '
+                                     'WHERE id = ?', (chapter_num, digest, stat.st_mtime_ns, stat.st_size, text, file_id))
+                else:
+                    file_id = self._db.execute('INSERT INTO files (name, chapter, sha256, mtime_ns, size, text) '
+                                               'VALUES (?, ?, ?, ?, ?, ?)',
+                                               (name, chapter_num, digest, stat.st_mtime_ns, stat.st_size, text)).lastrowid
+                if token_ids is None:
+                    token_ids = dict(self._db.execute('SELECT token, id FROM tokens'))
+                self._index_file(file_id, text, token_ids)
+                indexed.append(name)
+
+            removed = sorted(set(known) - seen)
+            for name in removed:
+                file_id = known[name][0]
+                self._db.execute('DELETE FROM postings WHERE file_id = ?', (file_id,))
+                self._db.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+        if indexed or removed:
+            self._load_files()
+
+        return {'indexed': indexed, 'removed': removed, 'unchanged': unchanged}
+
+    def _token_postings(self, token):
+        """Return (sorted rank << 32 | position keys, character offsets) for a token."""
+        cached = self._postings.get(token)
+        if cached is not None:
+            return cached
+
+        keys = []
+        offsets = []
+        rows = self._db.execute('SELECT p.file_id, p.words, p.starts FROM postings p '
+                                'JOIN tokens t ON t.id = p.token_id WHERE t.token = ?', (token,))
+        for file_id, words, starts in rows:
+            rank = np.uint64(self._rank[file_id])
+            keys.append((rank << _FILE_SHIFT) | np.frombuffer(words, dtype=np.uint32).astype(np.uint64))
+            offsets.append(np.frombuffer(starts, dtype=np.uint32))
+
+        if keys:
+            keys = np.concatenate(keys)
+            offsets = np.concatenate(offsets)
+            order = np.argsort(keys, kind='stable')
+            cached = (keys[order], offsets[order])
+        else:
+            cached = (np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint32))
+
+        self._postings[token] = cached
+        return cached
+
+    def _phrase_keys(self, phrase):
+        """Return (tokens, keys of the phrase's first word, start offsets, end offsets)."""
+        tokens = [word.lower() for word in WORD.findall(phrase)]
+        if not tokens:
+            raise ValueError(f'Nothing to search for in {phrase!r}')
+
+        keys, starts = self._token_postings(tokens[0])
+        for i, token in enumerate(tokens[1:], 1):
+            next_keys = self._token_postings(token)[0]
+            keys = np.intersect1d(keys, next_keys - np.uint64(i), assume_unique=True)
+
+        first_keys, first_starts = self._token_postings(tokens[0])
+        last_keys, last_starts = self._token_postings(tokens[-1])
+        starts = first_starts[np.searchsorted(first_keys, keys)]
+        ends = last_starts[np.searchsorted(last_keys, keys + np.uint64(len(tokens) - 1))] + len(tokens[-1])
+        return tokens, keys, starts, ends
+
+    def _hits(self, keys, starts, ends, length):
+        ranks = (keys >> _FILE_SHIFT).tolist()
+        positions = (keys & _WORD_MASK).tolist()
+        hits = []
+        for rank, word, start, end in zip(ranks, positions, starts.tolist(), ends.tolist()):
+            entry = self._files[rank]
+            hits.append({
+                'chapter': entry['chapter'],
+                'file': entry['name'],
+                'word': word,
+                'words': length,
+                'start': start,
+                'end': end
+            })
+        return hits
+
+    def phrase(self, phrase):
+        """Return every occurrence of phrase (case-insensitive, whole words), in file order."""
+        tokens, keys, starts, ends = self._phrase_keys(phrase)
+        return self._hits(keys, starts, ends, len(tokens))
+
+    def chapters(self, phrase):
+        """Return the sorted chapter numbers that mention phrase."""
+        ranks = np.unique(self._phrase_keys(phrase)[1] >> _FILE_SHIFT).tolist()
+        return sorted({self._files[rank]['chapter'] for rank in ranks})
+
+    def near(self, first, second, window=10):
+        """Return the hits of first with second at most window words away.
+
+        Each hit gets 'near' (the closest hit of second, either side) and
+        'distance' (words strictly between the two).
+        """
+        first_tokens, a_keys, a_starts, a_ends = self._phrase_keys(first)
+        second_tokens, b_keys, b_starts, b_ends = self._phrase_keys(second)
+        a_len, b_len = len(first_tokens), len(second_tokens)
+        if not len(a_keys) or not len(b_keys):
+            return []
+
+        a = a_keys.astype(np.int64)
+        b = b_keys.astype(np.int64)
+        file_a = a >> 32
+        unset = np.iinfo(np.int64).max
+
+        # Closest second phrase starting after the first ends, and closest
+        # one ending before it starts, within the same file
+        after = np.minimum(np.searchsorted(b, a + a_len), len(b) - 1)
+        before = np.maximum(np.searchsorted(b, a - b_len, side='right') - 1, 0)
+        gap_after = b[after] - (a + a_len)
+        gap_before = a - (b[before] + b_len)
+        gap_after = np.where((gap_after >= 0) & (b[after] >> 32 == file_a), gap_after, unset)
+        gap_before = np.where((gap_before >= 0) & (b[before] >> 32 == file_a), gap_before, unset)
+
+        use_after = gap_after <= gap_before
+        nearest = np.where(use_after, after, before)
+        distance = np.minimum(gap_after, gap_before)
+        keep = np.flatnonzero(distance <= window)
+
+        hits = self._hits(a_keys[keep], a_starts[keep], a_ends[keep], a_len)
+        others = self._hits(b_keys[nearest[keep]], b_starts[nearest[keep]], b_ends[nearest[keep]], b_len)
+        for hit, other, gap in zip(hits, others, distance[keep].tolist()):
+            hit['near'] = other
+            hit['distance'] = gap
+        return hits
+
+    def text(self, file_name):
+        """Return the indexed text of a chapter file."""
+        text = self._texts.get(file_name)
+        if text is None:
+            row = self._db.execute('SELECT text FROM files WHERE name = ?', (file_name,)).fetchone()
+            if row is None:
+                raise KeyError(file_name)
+            text = self._texts[file_name] = row[0]
+        return text
+
+    def context(self, hit, before=CONTEXT_BEFORE, after=CONTEXT_AFTER):
+        """The text around a hit on one line, like the extractors' contexts."""
+        text = self.text(hit['file'])
+        context = text[max(0, hit['start'] - before):hit['end'] + after]
+        return context.replace('\n', ' ').strip()
@@ -0,0 +1,190 @@
+"""
+Slippy-map tile pyramid writer
+
+Cuts a streamed image into z/x/y.png tiles at every zoom level, from the
+native resolution (the highest zoom) down to the first level that fits in
+a single tile. Rows arrive top to bottom like PngStreamWriter's; each
+level cuts its tiles once it has a full strip, then 2x2-averages that
+strip and hands it to the level below, so lower zooms are built from the
+level above and only a strip per level is ever buffered.
+"""
+
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+from realm.output import SAVE_OPTIONS, to_palette
+
+TILE_SIZE = 256
+DESCRIPTOR_NAME = 'tiles.json'
+
+
+def pyramid_sizes(width, height, tile_size=TILE_SIZE):
+    """Return level sizes from native resolution down to one that fits a tile."""
+    sizes = [(width, height)]
+    while max(sizes[-1]) > tile_size:
+        w, h = sizes[-1]
+        sizes.append(((w + 1) // 2, (h + 1) // 2))
+    return sizes
+
+
+def prune_tiles(output_dir, levels):
+    """Delete z/x/y.png tiles outside the grids of a descriptor's levels.
+
+    Only numeric z, x and y names are touched; returns the removed paths
+    relative to output_dir.
+    """
+    grids = {entry['zoom']: (entry['columns'], entry['rows']) for entry in levels}
+    removed = []
+    for zoom in sorted(os.listdir(output_dir)):
+        zoom_dir = os.path.join(output_dir, zoom)
+        if not zoom.isdigit() or not os.path.isdir(zoom_dir):
+            continue
+        columns, rows = grids.get(int(zoom), (0, 0))
+
+        for tile_x in sorted(os.listdir(zoom_dir)):
+            column_dir = os.path.join(zoom_dir, tile_x)
+            if not tile_x.isdigit() or not os.path.isdir(column_dir):
+                continue
+            for filename in sorted(os.listdir(column_dir)):
+                tile_y, ext = os.path.splitext(filename)
+                if ext == '.png' and tile_y.isdigit() and (int(tile_x) >= columns or int(tile_y) >= rows):
+                    os.remove(os.path.join(column_dir, filename))
+                    removed.append(f'{zoom}/{tile_x}/{filename}')
+            if not os.listdir(column_dir):
+                os.rmdir(column_dir)
+
+        if not os.listdir(zoom_dir):
+            os.rmdir(zoom_dir)
+    return removed
+
+
+def downsample(rows):
+    """Halve a (rows, width, channels) strip with a rounded 2x2 box filter.
+
+    Odd edges repeat their last row or column, matching the ceil sizes
+    from pyramid_sizes().
+    """
+    if len(rows) % 2:
+        rows = np.concatenate([rows, rows[-1:]])
+    if rows.shape[1] % 2:
+        rows = np.concatenate([rows, rows[:, -1:]], axis=1)
+
+    wide = rows.astype(np.uint16)
+    total = wide[0::2, 0::2] + wide[0::2, 1::2] + wide[1::2, 0::2] + wide[1::2, 1::2]
+    return ((total + 2) // 4).astype(np.uint8)
+
+
+class TilePyramidWriter:
+    """Write a tile pyramid plus its tiles.json descriptor.
+
+    Use as a context manager and feed it (rows, width, channels) uint8
+    bands from top to bottom; the partial last strips are flushed, the
+    descriptor is written and tiles left over from an earlier, larger
+    pyramid are removed when the block exits. Tiles are RGBA, edge tiles
+    padded to the full tile size with transparent pixels, and tiles with
+    few enough colours are stored as palette PNGs.
+    """
+
+    def __init__(self, output_dir, width, height, tile_size=TILE_SIZE, source=None):
+        self.output_dir = output_dir
+        self.tile_size = tile_size
+        self.source = source
+        self.sizes = pyramid_sizes(width, height, tile_size)
+        self.max_zoom = len(self.sizes) - 1
+
+        self._buffers = [[] for _ in self.sizes]
+        self._buffered = [0] * len(self.sizes)
+        self._next_tile_row = [0] * len(self.sizes)
+
+    def __enter__(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+    def _write_strip(self, level, strip):
+        zoom = self.max_zoom - level
+        tile_y = self._next_tile_row[level]
+        self._next_tile_row[level] += 1
+        tile = self.tile_size
+
+        for tile_x, x0 in enumerate(range(0, strip.shape[1], tile)):
+            # Every tile is RGBA, padded with transparent pixels at the edges
+            source = strip[:, x0:x0 + tile]
+            rows, columns = source.shape[:2]
+            pixels = np.zeros((tile, tile, 4), dtype=np.uint8)
+            pixels[:rows, :columns, :3] = source[..., :3]
+            pixels[:rows, :columns, 3] = source[..., 3] if source.shape[2] == 4 else 255
+
+            tile_dir = os.path.join(self.output_dir, str(zoom), str(tile_x))
+            os.makedirs(tile_dir, exist_ok=True)
+            tile_img = Image.fromarray(np.ascontiguousarray(pixels))
+            tile_img = to_palette(tile_img) or tile_img
+
+            options = dict(SAVE_OPTIONS['png'])
+            tile_img.save(os.path.join(tile_dir, f'{tile_y}.png'), options.pop('format'), **options)
+
+        if level + 1 < len(self.sizes):
+            self._push(level + 1, downsample(strip))
+
+    def _push(self, level, rows):
+        self._buffers[level].append(rows)
+        self._buffered[level] += len(rows)
+
+        if self._buffered[level] < self.tile_size:
+            return
+
+        pending = np.concatenate(self._buffers[level])
+        full = len(pending) - len(pending) % self.tile_size
+        remainder = pending[full:]
+        self._buffers[level] = [remainder] if len(remainder) else []
+        self._buffered[level] = len(remainder)
+
+        for y0 in range(0, full, self.tile_size):
+            self._write_strip(level, pending[y0:y0 + self.tile_size])
+
+    def write_rows(self, pixels):
+        """Append a band of full-resolution rows."""
+        self._push(0, np.asarray(pixels, dtype=np.uint8))
+
+    def close(self):
+        """Flush the partial bottom strips, write the descriptor and prune stale tiles."""
+        for level in range(len(self.sizes)):
+            if self._buffered[level]:
+                strip = np.concatenate(self._buffers[level])
+                self._buffers[level] = []
+                self._buffered[level] = 0
+                self._write_strip(level, strip)
+
+        levels = []
+        for level, (width, height) in enumerate(self.sizes):
+            levels.append({
+                'zoom': self.max_zoom - level,
+                'width': width,
+                'height': height,
+                'columns': -(-width // self.tile_size),
+                'rows': -(-height // self.tile_size)
+            })
+
+        descriptor = {
+            'format': 'png',
+            'tile_size': self.tile_size,
+            'min_zoom': 0,
+            'max_zoom': self.max_zoom,
+            'width': self.sizes[0][0],
+            'height': self.sizes[0][1],
+            'url': '{z}/{x}/{y}.png',
+            'source': self.source,
+            'levels': sorted(levels, key=lambda entry: entry['zoom'])
+        }
+
+        with open(os.path.join(self.output_dir, DESCRIPTOR_NAME), 'w', encoding='utf-8') as f:
+            json.dump(descriptor, f, indent=2)
+            f.write('\n')
+
+        prune_tiles(self.output_dir, levels)
@@ -0,0 +1,231 @@
+"""
+PixelLab Wang tileset loading with a compiled on-disk cache
+
+Each tileset is a .json metadata file plus a .png sprite sheet. The first
+load parses the JSON, crops the 16 tiles into a (16, tile, tile, 4) atlas
+and writes a compiled .atlas file: one JSON header line (cache version,
+tile size, Wang lookup table, the tiles' adjacency rules, and the source
+files' mtimes, sizes and SHA-256 hashes) followed by the raw atlas
+bytes. Later loads read that file in one go without touching the JSON
+or cropping anything; when the mtimes changed but the hashes did not
+(fresh checkout, touch) the cache is re-stamped instead of recompiled.
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+from PIL import Image
+
+CACHE_VERSION = 2
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TOPDOWN_DIR = os.path.join(PROJECT_ROOT, 'public/tilesets/topdown')
+CACHE_DIR = os.path.join(PROJECT_ROOT, '.cache/tilesets')
+
+# Tileset key -> file stem in public/tilesets/topdown, as used by the generators
+TILESET_FILES = {
+    'grass': 'grass-to-forest',
+    'desert': 'sand-to-rock',
+    'ocean': 'ocean-water',
+    'dungeon': 'dungeon-cave',
+    'city': 'city-cobblestone',
+    'cosmic': 'cosmic-space'
+}
+
+
+# Order of the rows of a compiled tileset's 'connections' masks
+DIRECTIONS = ('north', 'east', 'south', 'west')
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def corner_wang_index(corners):
+    """Return NW*8 + NE*4 + SW*2 + SE for a PixelLab corner dict."""
+    nw = 1 if corners['NW'] == 'upper' else 0
+    ne = 1 if corners['NE'] == 'upper' else 0
+    sw = 1 if corners['SW'] == 'upper' else 0
+    se = 1 if corners['SE'] == 'upper' else 0
+    return nw * 8 + ne * 4 + sw * 2 + se
+
+
+def compile_tileset(metadata_path, image_path):
+    """Parse a tileset pair into its atlas arrays.
+
+    The tile size comes from tileset_data.tile_size; every tile's bounding
+    box has to agree with it.
+    """
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    sheet = np.asarray(Image.open(image_path).convert('RGBA'))
+    tileset_data = metadata['tileset_data']
+    tile_size = tileset_data['tile_size']['width']
+
+    atlas = np.zeros((16, tile_size, tile_size, 4), dtype=np.uint8)
+    present = np.zeros(16, dtype=bool)
+    tile_ids = np.array([''] * 16, dtype='<U64')
+    wang_by_id = {tile['id']: corner_wang_index(tile['corners']) for tile in tileset_data['tiles']}
+    # connections[d][a] has bit b set when tile b may sit on side DIRECTIONS[d] of tile a
+    connections = np.zeros((len(DIRECTIONS), 16), dtype=np.uint16)
+
+    for tile in tileset_data['tiles']:
+        bbox = tile['bounding_box']
+        if bbox['width'] != tile_size or bbox['height'] != tile_size:
+            raise ValueError(f"{metadata_path}: tile {tile['id']} is {bbox['width']}x{bbox['height']}, "
+                             f"expected {tile_size}x{tile_size}")
+
+        wang_idx = corner_wang_index(tile['corners'])
+        atlas[wang_idx] = sheet[bbox['y']:bbox['y'] + tile_size, bbox['x']:bbox['x'] + tile_size]
+        present[wang_idx] = True
+        tile_ids[wang_idx] = tile['id']
+
+        for d, direction in enumerate(DIRECTIONS):
+            for neighbour_id in tile.get('connections', {}).get(direction, []):
+                if neighbour_id in wang_by_id:
+                    connections[d, wang_idx] |= 1 << wang_by_id[neighbour_id]
+
+    return {
+        'atlas': atlas,
+        'present': present,
+        'tile_ids': tile_ids,
+        'tile_size': tile_size,
+        'connections': connections
+    }
+
+
+def cache_path_for(metadata_path, cache_dir=CACHE_DIR):
+    """Return the cache path for a tileset, e.g. topdown-grass-to-forest.atlas."""
+    folder = os.path.basename(os.path.dirname(os.path.abspath(metadata_path)))
+    stem = os.path.splitext(os.path.basename(metadata_path))[0]
+    return os.path.join(cache_dir, f'{folder}-{stem}.atlas')
+
+
+def _source_stamp(path, with_hash):
+    stat = os.stat(path)
+    stamp = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+    if with_hash:
+        stamp['sha256'] = file_sha256(path)
+    return stamp
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, 'rb') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != CACHE_VERSION:
+                return None
+            tile_size = header['tile_size']
+            atlas = np.frombuffer(f.read(), dtype=np.uint8).reshape(16, tile_size, tile_size, 4)
+    except (OSError, KeyError, ValueError):
+        return None
+
+    return {
+        'atlas': atlas,
+        'present': np.array(header['present'], dtype=bool),
+        'tile_ids': np.array(header['tile_ids']),
+        'tile_size': tile_size,
+        'connections': np.array(header['connections'], dtype=np.uint16),
+        'sources': header['sources']
+    }
+
+
+def _write_cache(cache_path, arrays, sources):
+    header = {
+        'version': CACHE_VERSION,
+        'tile_size': int(arrays['tile_size']),
+        'present': arrays['present'].tolist(),
+        'tile_ids': [str(tile_id) for tile_id in arrays['tile_ids']],
+        'connections': arrays['connections'].tolist(),
+        'sources': sources
+    }
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(json.dumps(header, sort_keys=True).encode('utf-8') + b'\n')
+        f.write(np.ascontiguousarray(arrays['atlas'], dtype=np.uint8).tobytes())
+    # Atomic so parallel workers never see a half-written cache
+    os.replace(tmp_path, cache_path)
+
+
+def load_compiled_tileset(metadata_path, image_path, cache_dir=CACHE_DIR):
+    """Return the compiled arrays for a tileset, using the cache when it is fresh."""
+    paths = {'json': metadata_path, 'png': image_path}
+    cache_path = cache_path_for(metadata_path, cache_dir)
+    cached = _read_cache(cache_path)
+
+    if cached is not None:
+        sources = cached['sources']
+        stamps = {key: _source_stamp(path, with_hash=False) for key, path in paths.items()}
+
+        if all(sources[key]['mtime_ns'] == stamps[key]['mtime_ns'] and
+               sources[key]['size'] == stamps[key]['size'] for key in paths):
+            return cached, sources
+
+        # Touched but maybe unchanged: compare content before recompiling
+        stamps = {key: _source_stamp(path, with_hash=True) for key, path in paths.items()}
+        if all(sources[key]['sha256'] == stamps[key]['sha256'] for key in paths):
+            _write_cache(cache_path, cached, stamps)
+            return cached, stamps
+
+    stamps = {key: _source_stamp(path, with_hash=True) for key, path in paths.items()}
+    arrays = compile_tileset(metadata_path, image_path)
+    _write_cache(cache_path, arrays, stamps)
+    return arrays, stamps
+
+
+def load_wang_tileset(metadata_path, image_path, cache_dir=CACHE_DIR):
+    """Load a Wang tileset.
+
+    Returns the dict the renderers expect: 'tiles' (wang_idx -> tile
+    image), 'tile_size' and the prebuilt 'atlas', plus 'present',
+    'tile_ids', the 'connections' adjacency masks (see DIRECTIONS) and a
+    'source_hash' covering both source files.
+    """
+    arrays, sources = load_compiled_tileset(metadata_path, image_path, cache_dir)
+
+    atlas = arrays['atlas']
+    present = arrays['present'].astype(bool)
+    tiles = {wang_idx: Image.fromarray(atlas[wang_idx]) for wang_idx in np.flatnonzero(present).tolist()}
+
+    source_hash = hashlib.sha256(
+        (sources['json']['sha256'] + sources['png']['sha256']).encode('ascii')
+    ).hexdigest()
+
+    return {
+        'tiles': tiles,
+        'tile_size': int(arrays['tile_size']),
+        'atlas': atlas,
+        'present': present,
+        'tile_ids': [str(tile_id) for tile_id in arrays['tile_ids']],
+        'connections': arrays['connections'],
+        'source_hash': source_hash
+    }
+
+
+def load_tilesets(tileset_files=None, base_dir=TOPDOWN_DIR, cache_dir=CACHE_DIR):
+    """Load every available tileset in tileset_files (key -> file stem).
+
+    Missing tilesets are skipped, so callers can check membership the way
+    the generators always have.
+    """
+    tileset_files = TILESET_FILES if tileset_files is None else tileset_files
+    tilesets = {}
+
+    for key, filename in tileset_files.items():
+        json_path = f'{base_dir}/{filename}.json'
+        png_path = f'{base_dir}/{filename}.png'
+
+        if os.path.exists(json_path) and os.path.exists(png_path):
+            tilesets[key] = load_wang_tileset(json_path, png_path, cache_dir)
+
+    return tilesets
@@ -0,0 +1,68 @@
+"""
+Wang tile helpers shared by the map renderers
+
+Terrain grids are (height+1) x (width+1) vertex grids where
+0 = lower terrain and 1 = upper terrain. Each map cell takes the tile
+whose corner pattern matches its four surrounding vertices.
+"""
+
+import numpy as np
+from PIL import Image
+
+
+def wang_index_grid(terrain_grid):
+    """Return the (height, width) array of Wang indices for a vertex grid.
+
+    Accepts nested lists or a NumPy array and computes
+    NW*8 + NE*4 + SW*2 + SE for every cell in one sliced operation.
+    """
+    vertices = np.asarray(terrain_grid, dtype=np.uint8)
+
+    nw = vertices[:-1, :-1]
+    ne = vertices[:-1, 1:]
+    sw = vertices[1:, :-1]
+    se = vertices[1:, 1:]
+
+    return (nw << 3) | (ne << 2) | (sw << 1) | se
+
+
+def build_tile_atlas(tiles, tile_size, fallback=None):
+    """Pack a {wang_idx: tile image} dict into a (16, tile, tile, 4) uint8 atlas.
+
+    Missing corner patterns stay fully transparent, like the blank cells
+    the paste renderers leave behind, unless a fallback index is given.
+    """
+    atlas = np.zeros((16, tile_size, tile_size, 4), dtype=np.uint8)
+
+    for wang_idx, tile in tiles.items():
+        atlas[wang_idx] = np.asarray(tile.convert('RGBA'))
+
+    if fallback is not None:
+        for wang_idx in range(16):
+            if wang_idx not in tiles:
+                atlas[wang_idx] = atlas[fallback]
+
+    return atlas
+
+
+def tileset_atlas(tileset):
+    """Return the tileset's atlas, building it on first use."""
+    if 'atlas' not in tileset:
+        tileset['atlas'] = build_tile_atlas(tileset['tiles'], tileset['tile_size'])
+    return tileset['atlas']
+
+
+def composite_tiles(atlas, wang_grid):
+    """Build the RGBA map image for a Wang-index grid from a tile atlas.
+
+    One fancy-indexing gather picks every cell's tile, then a transpose
+    interleaves tile rows with map rows so the buffer is already laid out
+    as the final image.
+    """
+    height, width = wang_grid.shape
+    tile_size = atlas.shape[1]
+
+    cells = atlas[wang_grid]  # (height, width, tile, tile, 4)
+    pixels = cells.transpose(0, 2, 1, 3, 4).reshape(height * tile_size, width * tile_size, 4)
+
+    return Image.fromarray(pixels)
@@ -0,0 +1,248 @@
+"""
+Wave Function Collapse terrain from the tilesets' adjacency rules
+
+Every PixelLab tile lists, per side, the tiles allowed next to it
+(realm.tilesets compiles these into 16-bit masks). Here each map cell
+holds the set of tiles it could still become as a uint16 bitset, and
+solving alternates two steps:
+
+- observe: cells of lowest weighted entropy are collapsed to one tile,
+  picked by weight. Every cell that is the entropy minimum of its 5x5
+  neighbourhood goes in the same round (seeded noise breaks ties), so
+  a round collapses many cells at once instead of one.
+- propagate: each side's allowed-neighbour union for a whole domain is
+  precomputed for all 65536 bitsets, so arc consistency over the grid
+  is a few table lookups on shifted views, repeated until nothing
+  changes.
+
+If a round empties some cell's domain, it is undone and replayed one
+cell at a time, lowest entropy first, with backtracking: a failed
+choice is removed from its cell's domain and the solver retries from
+the snapshot before it. Everything draws from one seeded generator, so
+a seed always gives the same map.
+
+The tiles' lists leave out the tile itself; a tile whose opposite edges
+match may always sit next to itself, so plain stretches of one terrain
+stay possible.
+"""
+
+import numpy as np
+
+from realm.seeding import numpy_rng
+from realm.tilesets import DIRECTIONS
+
+OPPOSITE = {'north': 'south', 'east': 'west', 'south': 'north', 'west': 'east'}
+
+# Corner bits of a Wang index (NW*8 + NE*4 + SW*2 + SE) on each side
+SIDE_CORNERS = {'north': (3, 2), 'east': (2, 0), 'south': (1, 0), 'west': (3, 1)}
+
+BACKTRACK_DEPTH = 256
+MAX_RESTARTS = 8
+
+_SOLVERS = {}
+
+_MASKS = np.arange(1 << 16, dtype=np.uint32)
+_BITS = ((_MASKS[:, None] >> np.arange(16)) & 1).astype(bool)
+POPCOUNT = _BITS.sum(axis=1).astype(np.uint8)
+# Tile index of every single-bit mask (others are meaningless)
+BIT_INDEX = np.argmax(_BITS, axis=1).astype(np.uint8)
+
+
+def _side(wang_idx, direction):
+    first, second = SIDE_CORNERS[direction]
+    return (wang_idx >> first) & 1, (wang_idx >> second) & 1
+
+
+def adjacency_rules(connections, present):
+    """Return {direction: (16,) uint16 masks} of the tiles allowed next to each tile.
+
+    connections are a compiled tileset's per-direction masks. Rules are
+    made symmetric (b east of a iff a west of b), limited to present
+    tiles, and every tile may neighbour itself where its opposite sides
+    match.
+    """
+    present_mask = sum(1 << int(i) for i in np.flatnonzero(present))
+    rules = {}
+    for d, direction in enumerate(DIRECTIONS):
+        opposite = DIRECTIONS.index(OPPOSITE[direction])
+        masks = np.zeros(16, dtype=np.uint16)
+        for a in range(16):
+            allowed = int(connections[d][a])
+            for b in range(16):
+                if (int(connections[opposite][b]) >> a) & 1:
+                    allowed |= 1 << b
+            if _side(a, direction) == _side(a, OPPOSITE[direction]):
+                allowed |= 1 << a
+            masks[a] = allowed & present_mask if (present_mask >> a) & 1 else 0
+        rules[direction] = masks
+    return rules
+
+
+def support_tables(rules):
+    """For every direction, the (65536,) union of allowed neighbours of each domain."""
+    tables = {}
+    for direction, masks in rules.items():
+        table = np.zeros(1 << 16, dtype=np.uint16)
+        for tile in range(16):
+            table[_BITS[:, tile]] |= masks[tile]
+        tables[direction] = table
+    return tables
+
+
+def tile_weights(density, present):
+    """Weight per Wang index: density per upper corner, 1 - density per lower one."""
+    upper = POPCOUNT[:16].astype(np.float64)
+    weights = density ** upper * (1 - density) ** (4 - upper)
+    return np.where(present, weights, 0.0)
+
+
+def entropy_table(weights):
+    """Weighted Shannon entropy of every domain bitset (0 for single tiles)."""
+    safe = np.where(weights > 0, weights, 1.0)
+    total = _BITS @ weights
+    weighted_log = _BITS @ (weights * np.log(safe))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = np.log(total) - weighted_log / total
+    entropy[POPCOUNT <= 1] = 0.0
+    return np.nan_to_num(entropy)
+
+
+def compile_solver(connections, present, density=0.45):
+    """Precompute the lookup tables for one tileset and density."""
+    present = np.asarray(present, dtype=bool)
+    weights = tile_weights(density, present)
+    return {
+        'support': support_tables(adjacency_rules(connections, present)),
+        'weights': weights,
+        'entropy': entropy_table(weights),
+        'full': np.uint16(sum(1 << int(i) for i in np.flatnonzero(present)))
+    }
+
+
+def propagate(domains, support):
+    """Shrink domains in place until every cell is arc consistent.
+
+    Returns False if some domain became empty.
+    """
+    while True:
+        before = domains.copy()
+        domains[:, 1:] &= support['east'][domains[:, :-1]]
+        domains[:, :-1] &= support['west'][domains[:, 1:]]
+        domains[1:, :] &= support['south'][domains[:-1, :]]
+        domains[:-1, :] &= support['north'][domains[1:, :]]
+        if not domains.all():
+            return False
+        if np.array_equal(before, domains):
+            return True
+
+
+def _choose(masks, weights, rng):
+    """Pick one tile per domain mask, with probability proportional to weight."""
+    masks = masks.astype(np.uint32)
+    has = ((masks[:, None] >> np.arange(16)) & 1).astype(bool)
+    cumulative = np.cumsum(has * weights, axis=1)
+    draw = rng.random(len(masks)) * cumulative[:, -1]
+    # First tile whose cumulative weight passes the draw, among the allowed ones
+    chosen = np.argmax(has & (cumulative > draw[:, None]), axis=1)
+    return (np.uint32(1) << chosen.astype(np.uint32)).astype(np.uint16)
+
+
+def _local_minima(entropy, open_cells):
+    """Cells whose entropy is the minimum of their 5x5 neighbourhood, ties included.
+
+    The window includes the cell itself, hence <=; the seeded noise added
+    to the entropy makes ties between neighbours vanishingly rare.
+    """
+    padded = np.pad(np.where(open_cells, entropy, np.inf), 2, constant_values=np.inf)
+    height, width = entropy.shape
+    rows = np.minimum.reduce([padded[dy:dy + height, :] for dy in range(5)])
+    window = np.minimum.reduce([rows[:, dx:dx + width] for dx in range(5)])
+    return open_cells & (entropy <= window)
+
+
+def _single_step(domains, solver, rng, stack):
+    """Collapse the lowest-entropy cell, backtracking on contradictions.
+
+    Returns False once there is nothing left to backtrack to.
+    """
+    entropy = solver['entropy'][domains] + rng.random(domains.shape) * 1e-6
+    entropy[POPCOUNT[domains] <= 1] = np.inf
+    y, x = np.unravel_index(np.argmin(entropy), domains.shape)
+
+    mask = domains[y, x]
+    chosen = _choose(np.array([mask]), solver['weights'], rng)[0]
+    stack.append((domains.copy(), y, x, np.uint16(mask & ~chosen)))
+    if len(stack) > BACKTRACK_DEPTH:
+        del stack[0]
+    domains[y, x] = chosen
+
+    while not propagate(domains, solver['support']):
+        # Undo the latest choice and forbid it; go further back when a
+        # cell has run out of tiles to try
+        while stack:
+            snapshot, y, x, remaining = stack.pop()
+            if remaining:
+                break
+        else:
+            return False
+        domains[...] = snapshot
+        domains[y, x] = remaining
+    return True
+
+
+def solve_tiles(width, height, solver, seed):
+    """Solve a width x height grid; returns the (height, width) Wang index grid."""
+    for attempt in range(MAX_RESTARTS):
+        rng = numpy_rng([seed, attempt])
+        domains = np.full((height, width), solver['full'], dtype=np.uint16)
+        stack = []
+        solved = True
+
+        while True:
+            open_cells = POPCOUNT[domains] > 1
+            if not open_cells.any():
+                break
+
+            # Observe a whole batch of well-separated minimum-entropy cells
+            snapshot = domains.copy()
+            entropy = solver['entropy'][domains] + rng.random(domains.shape) * 1e-6
+            batch = _local_minima(entropy, open_cells)
+            domains[batch] = _choose(domains[batch], solver['weights'], rng)
+            if propagate(domains, solver['support']):
+                continue
+
+            # The batch clashed: replay from before it, one cell at a time
+            domains[...] = snapshot
+            if not _single_step(domains, solver, rng, stack):
+                solved = False
+                break
+
+        if solved:
+            return BIT_INDEX[domains]
+
+    raise ValueError(f'no {width}x{height} tiling found after {MAX_RESTARTS} attempts')
+
+
+def tiles_to_vertices(tiles):
+    """Vertex grid (0 = lower, 1 = upper) of a corner-consistent Wang index grid."""
+    tiles = np.asarray(tiles, dtype=np.uint8)
+    height, width = tiles.shape
+    vertices = np.zeros((height + 1, width + 1), dtype=np.uint8)
+    vertices[:-1, :-1] = (tiles >> 3) & 1
+    vertices[:-1, -1] = (tiles[:, -1] >> 2) & 1
+    vertices[-1, :-1] = (tiles[-1, :] >> 1) & 1
+    vertices[-1, -1] = tiles[-1, -1] & 1
+    return vertices
+
+
+def tileset_solver(tileset, density=0.45):
+    """Return the solver tables for a loaded tileset, compiled once per process."""
+    key = (tileset['source_hash'], float(density))
+    if key not in _SOLVERS:
+        _SOLVERS[key] = compile_solver(tileset['connections'], tileset['present'], density)
+    return _SOLVERS[key]
+
+
+def wfc_terrain_layout(width, height, seed, tileset, density=0.45):
+    """A create_terrain_layout()-style vertex grid solved from tileset's adjacency rules."""
+    return tiles_to_vertices(solve_tiles(width, height, tileset_solver(tileset, density), seed))
@@ -0,0 +1,155 @@
+"""
+Banded world map rendering
+
+The world map is rendered as horizontal bands of tile rows instead of one
+full image. Annotations (journey lines, markers, labels) are recorded up
+front into a DrawList with their bounding boxes; each band then builds
+its terrain slice, replays only the annotations that touch it, shifted
+into band coordinates, and streams its pixels straight into the PNG.
+Peak memory is set by the band height, not the map size, and the pixels
+match a whole-image render exactly. The same bands can also feed a
+slippy-map tile pyramid.
+
+A streamed map is written as a truecolor PNG only. The palette PNG of
+realm.output needs every colour before the first row is written, and the
+WebP and AVIF encoders need the whole image, so only a whole-image render
+(band_rows=0) goes through encode_map() and its formats.
+"""
+
+import os
+from contextlib import ExitStack
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from realm.output import DEFAULT_FORMATS, encode_map
+from realm.pngstream import PngStreamWriter
+from realm.terrain import create_terrain_layout, iter_terrain_bands
+from realm.tilepyramid import TilePyramidWriter
+from realm.wang import composite_tiles, tileset_atlas, wang_index_grid
+
+DEFAULT_BAND_ROWS = 64
+BACKGROUND = (100, 150, 100)
+
+# Slack around recorded boxes so antialiased edges and line joints are never culled
+CULL_MARGIN = 4
+
+
+class DrawList:
+    """Record ImageDraw.line/ellipse/text calls (and batches of lines) for later replay.
+
+    Calls take the same arguments as ImageDraw.Draw; each op remembers
+    its vertical extent so a band only replays the ops it intersects.
+    """
+
+    def __init__(self):
+        self.ops = []
+        self._measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+    def _record(self, kind, xy, kwargs, top, bottom):
+        self.ops.append((kind, xy, kwargs, top - CULL_MARGIN, bottom + CULL_MARGIN))
+
+    def line(self, xy, **kwargs):
+        points = [tuple(point) for point in xy]
+        half_width = (kwargs.get('width', 0) + 1) // 2
+        ys = [y for _, y in points]
+        self._record('line', points, kwargs, min(ys) - half_width, max(ys) + half_width)
+
+    def segments(self, segments, **kwargs):
+        """Record many separate lines at once from an (n, 2, 2) array of endpoints.
+
+        Drawn like one line() call per segment, in order, but a band only
+        replays the segments it intersects.
+        """
+        segments = np.asarray(segments).reshape(-1, 2, 2)
+        if not len(segments):
+            return
+        half_width = (kwargs.get('width', 0) + 1) // 2
+        ys = segments[:, :, 1]
+        tops = ys.min(axis=1) - half_width - CULL_MARGIN
+        bottoms = ys.max(axis=1) + half_width + CULL_MARGIN
+        self.ops.append(('segments', (segments.tolist(), tops, bottoms), kwargs,
+                         int(tops.min()), int(bottoms.max())))
+
+    def ellipse(self, xy, **kwargs):
+        box = list(xy)
+        self._record('ellipse', box, kwargs, box[1], box[3])
+
+    def text(self, xy, text, **kwargs):
+        measure = {key: kwargs[key] for key in ('font', 'stroke_width') if key in kwargs}
+        _, top, _, bottom = self._measure.textbbox(xy, text, **measure)
+        self._record('text', (tuple(xy), text), kwargs, top, bottom)
+
+    def replay(self, draw, y0=0, y1=None):
+        """Draw every op touching rows y0..y1-1 onto draw, shifted up by y0."""
+        for kind, xy, kwargs, top, bottom in self.ops:
+            if bottom < y0 or (y1 is not None and top >= y1):
+                continue
+
+            if kind == 'line':
+                draw.line([(x, y - y0) for x, y in xy], **kwargs)
+            elif kind == 'segments':
+                segments, tops, bottoms = xy
+                visible = bottoms >= y0 if y1 is None else (bottoms >= y0) & (tops < y1)
+                for index in np.flatnonzero(visible).tolist():
+                    (xa, ya), (xb, yb) = segments[index]
+                    draw.line([(xa, ya - y0), (xb, yb - y0)], **kwargs)
+            elif kind == 'ellipse':
+                draw.ellipse([xy[0], xy[1] - y0, xy[2], xy[3] - y0], **kwargs)
+            else:
+                (x, y), text = xy
+                draw.text((x, y - y0), text, **kwargs)
+
+
+def _terrain_pixels(tileset, vertices, width, tile_size):
+    """RGB pixels for a vertex band, or the flat background without a tileset."""
+    if tileset is None:
+        rows = (len(vertices) - 1) * tile_size
+        pixels = np.empty((rows, width * tile_size, 3), dtype=np.uint8)
+        pixels[:] = BACKGROUND
+        return pixels
+
+    atlas = tileset_atlas(tileset)
+    return np.asarray(composite_tiles(atlas, wang_index_grid(vertices)))[..., :3]
+
+
+def render_world_map(output_path, size, seed, density, tileset, annotations,
+                     tile_size=16, band_rows=DEFAULT_BAND_ROWS, tiles_dir=None,
+                     formats=DEFAULT_FORMATS, report_savings=False):
+    """Render terrain plus annotations to output_path and return its size report.
+
+    band_rows tile rows are held in memory at a time; band_rows=0 renders
+    the whole map as one image and saves it through encode_map() in
+    formats instead. With tiles_dir set, the same pixels are also cut
+    into a z/x/y tile pyramid.
+    """
+    width, height = size
+    pixel_size = (width * tile_size, height * tile_size)
+
+    with ExitStack() as stack:
+        pyramid = None
+        if tiles_dir:
+            pyramid = stack.enter_context(TilePyramidWriter(tiles_dir, *pixel_size,
+                                                            source=os.path.basename(output_path)))
+
+        if not band_rows:
+            vertices = create_terrain_layout(width, height, seed, density=density, compat=True)
+            world_map = Image.fromarray(np.ascontiguousarray(_terrain_pixels(tileset, vertices, width, tile_size)))
+            annotations.replay(ImageDraw.Draw(world_map))
+            report = encode_map(world_map, output_path, formats, report_savings)
+            if pyramid:
+                pyramid.write_rows(np.asarray(world_map))
+            return report
+
+        png = stack.enter_context(PngStreamWriter(output_path, *pixel_size))
+        for row0, vertices in iter_terrain_bands(width, height, seed, density, band_rows, compat=True):
+            band = Image.fromarray(np.ascontiguousarray(_terrain_pixels(tileset, vertices, width, tile_size)))
+            y0 = row0 * tile_size
+            annotations.replay(ImageDraw.Draw(band), y0, y0 + band.height)
+
+            pixels = np.asarray(band)
+            png.write_rows(pixels)
+            if pyramid:
+                pyramid.write_rows(pixels)
+
+    return {'path': output_path, 'reference_bytes': None, 'bytes': {'png': os.path.getsize(output_path)}}
@@ -4,47 +4,12 @@ Render actual map images from PixelLab tilesets
 Creates visual maps of Adventure Realm locations for website display
 """
 
-import json
 import os
-from PIL import Image
 
-def load_wang_tileset(metadata_path, image_path):
-    """Load a Wang tileset from PixelLab split format."""
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    sprite_sheet = Image.open(image_path)
-    
-    # Index tiles by Wang number (corner pattern)
-    tiles = {}
-    
-    for tile in metadata['tileset_data']['tiles']:
-        corners = tile['corners']
-        bbox = tile['bounding_box']
-        
-        # Extract tile image
-        tile_img = sprite_sheet.crop((
-            bbox['x'], bbox['y'],
-            bbox['x'] + bbox['width'],
-            bbox['y'] + bbox['height']
-        ))
-        
-        # Calculate Wang index (NW*8 + NE*4 + SW*2 + SE*1)
-        nw = 1 if corners['NW'] == 'upper' else 0
-        ne = 1 if corners['NE'] == 'upper' else 0
-        sw = 1 if corners['SW'] == 'upper' else 0
-        se = 1 if corners['SE'] == 'upper' else 0
-        wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-        
-        tiles[wang_idx] = tile_img
-    
-    tile_size = metadata['tileset_data']['tile_size']
-    
-    return {
-        'tiles': tiles,
-        'tile_size': tile_size['width'],
-        'metadata': metadata
-    }
+from realm.output import encode_map, format_report
+from realm.seeding import python_rng
+from realm.tilesets import load_wang_tileset
+from realm.wang import build_tile_atlas, composite_tiles, wang_index_grid
 
 def create_terrain_layout(width, height, pattern='island'):
     """Create a terrain layout grid.
@@ -83,14 +48,13 @@ def create_terrain_layout(width, height, pattern='island'):
     
     elif pattern == 'scattered':
         # Scattered patches
-        import random
-        random.seed(42)
+        rng = python_rng(42)
         for y in range(height + 1):
             for x in range(width + 1):
                 center_x = width // 2
                 center_y = height // 2
                 dist = ((x - center_x) ** 2 + (y - center_y) ** 2) ** 0.5
-                if random.random() < (1 - dist / (width / 2)):
+                if rng.random() < (1 - dist / (width / 2)):
                     grid[y][x] = 1
     
     return grid
@@ -98,33 +62,13 @@ def create_terrain_layout(width, height, pattern='island'):
 def render_map(tileset, terrain_grid):
     """Render a map image using Wang tiles based on terrain grid."""
     tiles = tileset['tiles']
-    tile_size = tileset['tile_size']
-    
-    height = len(terrain_grid) - 1
-    width = len(terrain_grid[0]) - 1
-    
-    # Create output image
-    map_img = Image.new('RGBA', (width * tile_size, height * tile_size))
-    
-    # Place tiles
-    for y in range(height):
-        for x in range(width):
-            # Sample 4 corners (vertices) around this cell
-            nw = terrain_grid[y][x]
-            ne = terrain_grid[y][x + 1]
-            sw = terrain_grid[y + 1][x]
-            se = terrain_grid[y + 1][x + 1]
-            
-            # Calculate Wang index
-            wang_idx = nw * 8 + ne * 4 + sw * 2 + se
-            
-            # Get tile (or use fallback if missing)
-            tile = tiles.get(wang_idx, tiles.get(0, tiles[list(tiles.keys())[0]]))
-            
-            # Paste tile
-            map_img.paste(tile, (x * tile_size, y * tile_size))
     
-    return map_img
+    # Missing corner patterns fall back to the all-lower tile (or the first tile)
+    fallback = 0 if 0 in tiles else list(tiles.keys())[0]
+    atlas = build_tile_atlas(tiles, tileset['tile_size'], fallback=fallback)
+    
+    # Wang index (NW*8 + NE*4 + SW*2 + SE*1) for every cell at once
+    return composite_tiles(atlas, wang_index_grid(terrain_grid))
 
 def create_location_map(location_name, tileset_name, pattern='island', size=(32, 32)):
     """Create a map for a specific location."""
@@ -198,8 +142,9 @@ if __name__ == '__main__':
         
         if map_img:
             output_path = f"{output_dir}/{loc['name'].lower().replace(' ', '-')}.png"
-            map_img.save(output_path)
+            report = encode_map(map_img, output_path)
             print(f"  ✅ Saved: {output_path}")
+            print(f"  💾 {format_report(report)}")
     
     print(f"\n🎉 Created {len(locations)} maps!")
     print(f"📁 Output: {output_dir}/")